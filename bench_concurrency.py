@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+并发吞吐量基准测试
+
+两种模式：
+  1. 在线模式（默认）：对运行中的服务并发发送 /query_work_items 请求，
+     分别在改动前后的版本上运行即可对比吞吐量
+         python bench_concurrency.py --url http://localhost:8000 --concurrency 1,8,32
+  2. 模拟模式：不依赖数据库，用固定延迟模拟一次查询，对比
+     "在事件循环中直接调用同步代码"（改动前）与 "DatabaseManager.run"（改动后）
+         python bench_concurrency.py --simulate --latency 0.02
+"""
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+HEADERS = {
+    "Content-Type": "application/json",
+    "X-Dify-User-ID": "bench_user"
+}
+
+
+def bench_live(url: str, concurrency: int, total: int) -> dict:
+    """对在线服务进行并发压测"""
+    import requests
+
+    payload = json.dumps({"time_range": "recent"})
+    session = requests.Session()
+
+    def one_request(_):
+        start = time.perf_counter()
+        response = session.post(f"{url}/query_work_items", headers=HEADERS, data=payload)
+        return time.perf_counter() - start, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one_request, range(total)))
+    elapsed = time.perf_counter() - start
+
+    errors = sum(1 for _, status in results if status != 200)
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+    }
+
+
+async def _simulate(concurrency: int, total: int, latency: float, use_executor: bool) -> float:
+    """模拟 total 个请求、每个包含一次 latency 秒的阻塞查询"""
+    from database import db_manager
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def handler():
+        async with semaphore:
+            if use_executor:
+                await db_manager.run(time.sleep, latency)
+            else:
+                time.sleep(latency)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(handler() for _ in range(total)))
+    return time.perf_counter() - start
+
+
+def bench_simulated(concurrency: int, total: int, latency: float) -> dict:
+    """对比阻塞调用和线程池调用的吞吐量"""
+    blocking = asyncio.run(_simulate(concurrency, total, latency, use_executor=False))
+    offloaded = asyncio.run(_simulate(concurrency, total, latency, use_executor=True))
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "before_rps": round(total / blocking, 1),
+        "after_rps": round(total / offloaded, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="并发吞吐量基准测试")
+    parser.add_argument("--url", default="http://localhost:8000", help="服务地址")
+    parser.add_argument("--concurrency", default="1,8,32", help="并发数列表，逗号分隔")
+    parser.add_argument("--requests", type=int, default=200, help="每个并发级别的请求总数")
+    parser.add_argument("--simulate", action="store_true", help="使用模拟延迟，不依赖服务和数据库")
+    parser.add_argument("--latency", type=float, default=0.02, help="模拟模式下每次查询的延迟（秒）")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    print("🚀 并发吞吐量基准测试")
+    print("=" * 50)
+    for level in levels:
+        if args.simulate:
+            result = bench_simulated(level, args.requests, args.latency)
+        else:
+            result = bench_live(args.url, level, args.requests)
+        print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+列表查询读取字节数对比（使用临时 SQLite 数据库，不依赖 MySQL 和服务进程）
+
+写入几个用户交替插入的事项（content 为数 KB 的中文文本，带 tags），对同一组查询条件比较：
+- 默认列表字段：由覆盖索引 idx_work_items_user_list 返回，以及换回旧索引（只有排序列）时的对比
+- fields 只取小列：status / due_date / priority
+- fields 取详情列：summary / content / tags
+
+每种情况报告 EXPLAIN QUERY PLAN 是否只读索引、冷缓存下从数据库文件读取的字节数
+（每次查询使用新连接并关闭 mmap，按 /proc/self/io 的 rchar 差值计算）和返回结果的字节数。
+
+    python bench_field_selection.py
+    python bench_field_selection.py --items 50000 --page-size 100
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from database import DatabaseManager
+from models import ItemStatus, QueryWorkItemsRequest
+from query_builder import build_list_query
+from storage import SQLiteBackend, SQLiteCursor
+
+USERS = ["field_user_0", "field_user_1", "field_user_2", "field_user_3"]
+TARGET_USER = USERS[0]
+
+PHRASES = [
+    "整理项目周报并同步给相关同事", "跟进客户反馈的问题", "评审接口设计文档", "准备下周例会的材料",
+    "排查线上告警并记录处理过程", "更新部署脚本和配置说明", "和产品确认需求细节", "补充单元测试用例",
+]
+
+PROJECTIONS = [
+    ("默认列表字段", None),
+    ("fields=status,due_date,priority", ["status", "due_date", "priority"]),
+    ("fields=summary,content,tags", ["summary", "content", "tags"]),
+]
+
+OLD_LIST_INDEX = "CREATE INDEX idx_work_items_user_due_date ON work_items(user_id, due_date, created_at DESC, id DESC)"
+
+
+def seed(db_manager: DatabaseManager, items: int, content_chars: int):
+    rng = random.Random(42)
+    today = date.today()
+    rows = []
+    for i in range(items):
+        text = ""
+        while len(text) < content_chars:
+            text += rng.choice(PHRASES) + "。"
+        created = datetime.combine(today, datetime.min.time()) - timedelta(minutes=i)
+        rows.append((
+            USERS[i % len(USERS)], "task", text[:content_chars], f"事项{i}：{rng.choice(PHRASES)}",
+            "UMS" if i % 3 else None, today + timedelta(days=rng.randint(-60, 60)),
+            rng.choice([status.value for status in ItemStatus]), rng.randint(1, 5),
+            json.dumps(["周报", "跟进"], ensure_ascii=False), created, created,
+        ))
+    with db_manager.get_db_cursor() as cursor:
+        cursor.executemany(
+            "INSERT INTO work_items (user_id, type, content, summary, project_name, due_date, status, priority, "
+            "tags, created_at, updated_at) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+            rows
+        )
+    with db_manager.get_db_cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+
+def read_chars() -> Optional[int]:
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("rchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def measure(path: str, sql: str, params) -> dict:
+    """冷缓存执行一次查询：新连接、关闭 mmap，先加载表结构再计量"""
+    conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)
+    try:
+        conn.execute("PRAGMA mmap_size = 0")
+        conn.execute("SELECT 1 FROM work_items LIMIT 0").fetchall()
+        cursor = conn.cursor(SQLiteCursor)
+        plan = " | ".join(row[3] for row in cursor.execute("EXPLAIN QUERY PLAN " + sql, params))
+        before = read_chars()
+        rows = cursor.execute(sql, params).fetchall()
+        after = read_chars()
+    finally:
+        conn.close()
+    return {
+        'rows': len(rows),
+        'file_bytes': after - before if before is not None else None,
+        'result_bytes': sum(len(str(value).encode("utf-8")) for row in rows for value in row if value is not None),
+        'covering': "COVERING INDEX" in plan,
+        'plan': plan,
+    }
+
+
+def report(label: str, result: dict):
+    file_bytes = f"{result['file_bytes']:>10,}" if result['file_bytes'] is not None else f"{'N/A':>10}"
+    mark = "✅" if result['covering'] else "  "
+    print(f"  {mark} {label:<36} 读取 {file_bytes} 字节  返回 {result['result_bytes']:>8,} 字节  ({result['rows']} 行)")
+
+
+def run(path: str, requests: List[tuple], page_size: int):
+    for title, request in requests:
+        print(f"\n{title}")
+        for label, fields in PROJECTIONS:
+            query = QueryWorkItemsRequest.model_validate({**request.model_dump(), 'fields': fields, 'page_size': page_size})
+            sql, params = build_list_query(query, TARGET_USER)
+            report(label, measure(path, sql, params))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="列表查询读取字节数对比")
+    parser.add_argument("--items", type=int, default=20000, help="写入的事项总数（平均分给几个用户）")
+    parser.add_argument("--content-chars", type=int, default=1500, help="每条事项 content 的字符数")
+    parser.add_argument("--page-size", type=int, default=100, help="每页条数")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    db_manager = DatabaseManager(backend=SQLiteBackend(path))
+    try:
+        print(f"📦 写入 {args.items} 条事项（content {args.content_chars} 字符）...")
+        seed(db_manager, args.items, args.content_chars)
+        db_manager.close()
+        with sqlite3.connect(path) as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        print(f"   数据库文件 {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+
+        requests = [
+            ("第一页（无过滤条件）", QueryWorkItemsRequest()),
+            ("按状态过滤", QueryWorkItemsRequest(status=ItemStatus.TODO)),
+        ]
+        print("\n⏱  冷缓存下每次查询从数据库文件读取的字节数（✅ 表示只读索引）")
+        run(path, requests, args.page_size)
+
+        # 换回只有排序列的旧索引，对比默认列表字段需要回表读取的数据量
+        conn = sqlite3.connect(path)
+        conn.execute("DROP INDEX idx_work_items_user_list")
+        conn.execute(OLD_LIST_INDEX)
+        conn.execute("ANALYZE")
+        conn.commit()
+        conn.close()
+        print("\n旧索引 (user_id, due_date, created_at, id)，默认列表字段")
+        for title, request in requests:
+            query = QueryWorkItemsRequest.model_validate({**request.model_dump(), 'page_size': args.page_size})
+            sql, params = build_list_query(query, TARGET_USER)
+            report(title, measure(path, sql, params))
+    finally:
+        db_manager.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
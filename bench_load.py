@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+端到端负载测试
+
+按配置的并发级别对运行中的服务发送混合请求（记录、查询、智能查询、更新、健康检查），
+用户按与 generate_dataset.py 相同的 Zipf 分布选择，报告每个接口和总体的
+p50 / p95 / p99 延迟与吞吐量。先用 generate_dataset.py 向本地数据库写入数据：
+
+    python generate_dataset.py --users 100 --items 1000000 --truncate
+    python bench_load.py --url http://localhost:8000 --concurrency 1,8,32 --duration 30
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+import requests
+
+from generate_dataset import VERBS, OBJECTS, ZipfPicker, user_ids
+
+QUERY_BODIES = [
+    {"time_range": "today"},
+    {"time_range": "this_week"},
+    {"time_range": "recent", "status": "in_progress"},
+    {"time_range": "this_month", "item_type": "meeting"},
+    {"keyword": "周报"},
+    {"keyword": "数据迁移", "time_range": "past_month"},
+    {"project_name": "UMS"},
+    {},
+]
+SMART_QUERIES = [
+    "今天有什么会议", "最近有什么任务", "本周的待办事项", "进行中的工作",
+    "上个月已完成的bug", "下周的会议", "UMS相关的任务", "明天的安排",
+]
+STATUSES = ["todo", "in_progress", "completed"]
+
+# 默认请求配比（权重）
+DEFAULT_MIX = "query=40,smart_query=30,record=15,update=10,health=5"
+
+
+class LoadClient:
+    """单个工作线程使用的客户端，持有自己的 HTTP 会话"""
+
+    def __init__(self, url: str, picker: ZipfPicker, item_ids: Dict[str, List[str]], seed: int):
+        self.url = url
+        self.picker = picker
+        self.item_ids = item_ids
+        self.rng = random.Random(seed)
+        self.session = requests.Session()
+
+    def _post(self, path: str, user_id: str, body) -> int:
+        response = self.session.post(
+            f"{self.url}{path}",
+            headers={"X-Dify-User-ID": user_id},
+            json=body,
+            timeout=30
+        )
+        return response.status_code
+
+    def query(self) -> int:
+        return self._post("/query_work_items", self.picker.pick(self.rng), self.rng.choice(QUERY_BODIES))
+
+    def smart_query(self) -> int:
+        return self._post("/smart_query_work_items", self.picker.pick(self.rng),
+                          {"user_input": self.rng.choice(SMART_QUERIES)})
+
+    def record(self) -> int:
+        summary = f"{self.rng.choice(VERBS)}{self.rng.choice(OBJECTS)}"
+        return self._post("/smart_record_work_item", self.picker.pick(self.rng), {
+            "user_input": f"压测记录：{summary}",
+            "item_type": "task",
+            "summary": summary,
+            "priority": self.rng.randint(1, 5),
+        })
+
+    def update(self) -> int:
+        """更新预先获取的事项；没有可用的事项ID时退化为查询"""
+        user_id = self.rng.choice(list(self.item_ids)) if self.item_ids else self.picker.pick(self.rng)
+        ids = self.item_ids.get(user_id)
+        if not ids:
+            return self.query()
+        status = self.rng.choice(STATUSES)
+        return self._post("/update_work_item", user_id, {
+            "user_input": f"把这个事项改成 {status}",
+            "item_id": self.rng.choice(ids),
+            "new_status": status,
+        })
+
+    def health(self) -> int:
+        return self.session.get(f"{self.url}/health", timeout=30).status_code
+
+
+def parse_mix(mix: str) -> List[Tuple[str, int]]:
+    pairs = []
+    for part in mix.split(","):
+        name, weight = part.split("=")
+        if not hasattr(LoadClient, name.strip()):
+            raise SystemExit(f"未知的接口类型: {name}")
+        pairs.append((name.strip(), int(weight)))
+    return pairs
+
+
+def collect_item_ids(url: str, users: List[str], per_user: int) -> Dict[str, List[str]]:
+    """预先查询一批已有事项ID，供更新请求使用"""
+    session = requests.Session()
+    result = {}
+    for user_id in users:
+        response = session.post(
+            f"{url}/query_work_items",
+            headers={"X-Dify-User-ID": user_id},
+            json={"page_size": per_user},
+            timeout=30
+        )
+        if response.status_code == 200:
+            ids = [item["id"] for item in response.json().get("data") or []]
+            if ids:
+                result[user_id] = ids
+    return result
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """最近秩百分位数"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[min(len(sorted_values), max(1, rank)) - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def run_level(
+    url: str,
+    concurrency: int,
+    duration: float,
+    mix: List[Tuple[str, int]],
+    picker: ZipfPicker,
+    item_ids: Dict[str, List[str]],
+    seed: int
+) -> dict:
+    """以指定并发持续发送 duration 秒的混合请求"""
+    names, weights = zip(*mix)
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(index: int):
+        client = LoadClient(url, picker, item_ids, seed + index)
+        actions: Dict[str, Callable[[], int]] = {name: getattr(client, name) for name in names}
+        local_latencies = defaultdict(list)
+        local_errors = defaultdict(int)
+        while time.perf_counter() < deadline:
+            name = client.rng.choices(names, weights=weights)[0]
+            start = time.perf_counter()
+            try:
+                status = actions[name]()
+            except requests.RequestException:
+                status = 0
+            local_latencies[name].append(time.perf_counter() - start)
+            # 4xx / 5xx 和连接失败记为错误
+            if status >= 400 or status == 0:
+                local_errors[name] += 1
+        with lock:
+            for name, values in local_latencies.items():
+                latencies[name].extend(values)
+            for name, count in local_errors.items():
+                errors[name] += count
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "overall": summarize(all_latencies, sum(errors.values()), elapsed),
+        "endpoints": {name: summarize(latencies[name], errors[name], elapsed) for name in names if latencies[name]},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端负载测试")
+    parser.add_argument("--url", default="http://localhost:8000", help="服务地址")
+    parser.add_argument("--concurrency", default="1,8,32", help="并发数列表，逗号分隔")
+    parser.add_argument("--duration", type=float, default=20, help="每个并发级别持续的秒数")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="请求配比，如 query=40,smart_query=30,record=15,update=10,health=5")
+    parser.add_argument("--users", type=int, default=100, help="与 generate_dataset.py 一致的用户数")
+    parser.add_argument("--skew", type=float, default=1.1, help="与 generate_dataset.py 一致的倾斜程度")
+    parser.add_argument("--seed", type=int, default=7, help="随机种子")
+    parser.add_argument("--output", help="保存结果的 JSON 文件")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    users = user_ids(args.users)
+    picker = ZipfPicker(users, args.skew)
+
+    print("🚀 端到端负载测试")
+    print("=" * 70)
+    item_ids = {}
+    if any(name == "update" for name, _ in mix):
+        item_ids = collect_item_ids(args.url, users[:20], 50)
+        print(f"📋 已获取 {sum(len(ids) for ids in item_ids.values())} 个事项ID用于更新请求")
+
+    results = []
+    for level in (int(level) for level in args.concurrency.split(",")):
+        result = run_level(args.url, level, args.duration, mix, picker, item_ids, args.seed)
+        results.append(result)
+        overall = result["overall"]
+        print(f"\n并发 {level}: {overall['throughput_rps']} req/s，"
+              f"p50 {overall['p50_ms']}ms / p95 {overall['p95_ms']}ms / p99 {overall['p99_ms']}ms，"
+              f"错误 {overall['errors']}")
+        for name, summary in result["endpoints"].items():
+            print(f"  {name:<12} {summary['requests']:>7} 次  {summary['throughput_rps']:>8} req/s  "
+                  f"p50 {summary['p50_ms']:>8}ms  p95 {summary['p95_ms']:>8}ms  p99 {summary['p99_ms']:>8}ms  "
+                  f"错误 {summary['errors']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 结果已保存到 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+指标中间件开销基准
+
+直接调用 ASGI 应用（不经过网络和 uvicorn），对比有无 MetricsMiddleware 时
+每个请求的耗时，差值即中间件本身的开销。
+
+    python bench_metrics_middleware.py --requests 200000
+"""
+import argparse
+import asyncio
+import time
+
+from metrics import HTTP_REQUEST_SECONDS, MetricsMiddleware
+
+
+class _Route:
+    path = "/query_work_items"
+
+
+async def bare_app(scope, receive, send):
+    """最小 ASGI 应用：模拟路由匹配后直接返回 200"""
+    scope["route"] = _Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def run(app, requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        scope = {"type": "http", "method": "POST", "path": "/query_work_items"}
+        await app(scope, receive, send)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="指标中间件开销基准")
+    parser.add_argument("--requests", type=int, default=200000, help="请求次数")
+    args = parser.parse_args()
+
+    wrapped = MetricsMiddleware(bare_app)
+
+    # 预热
+    asyncio.run(run(bare_app, 1000))
+    asyncio.run(run(wrapped, 1000))
+
+    bare = asyncio.run(run(bare_app, args.requests))
+    instrumented = asyncio.run(run(wrapped, args.requests))
+
+    bare_us = bare / args.requests * 1e6
+    instrumented_us = instrumented / args.requests * 1e6
+    print("⏱  指标中间件开销")
+    print("=" * 50)
+    print(f"无中间件:   {bare_us:6.2f} µs/请求")
+    print(f"有中间件:   {instrumented_us:6.2f} µs/请求")
+    print(f"中间件开销: {instrumented_us - bare_us:6.2f} µs/请求")
+
+    start = time.perf_counter()
+    child = HTTP_REQUEST_SECONDS.labels("POST", "/query_work_items")
+    for _ in range(args.requests):
+        child.observe(0.012)
+    observe_us = (time.perf_counter() - start) / args.requests * 1e6
+    print(f"直方图 observe: {observe_us:6.2f} µs/次")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+离线微基准套件：自然语言解析、日期范围、列表查询 SQL 构建、响应序列化
+
+不需要数据库和服务进程。结果以 JSON 输出，并可与保存的基线对比，
+任何一项比基线慢超过容忍度时以非零状态退出，便于在 CI 中发现性能回退。
+
+    python bench_suite.py                          # 运行并与 bench_baseline.json 对比
+    python bench_suite.py --output results.json    # 同时保存本次结果
+    python bench_suite.py --save-baseline          # 用本次结果覆盖基线
+    python bench_suite.py --filter serialize       # 只运行名称包含 serialize 的项
+
+基线与机器相关，更换运行环境（如 CI 机器）后应先用 --save-baseline 重新生成。
+
+微秒级的操作即使代码不变，连续两次运行也可能相差 30% 以上。为避免门禁随机失败：
+各时间范围的日期计算合为一项；绝对差值按每次调用被测函数的耗时计算，
+小于 --min-delta-us 的不算回退；超过容忍度的项重新测量 --confirm 次，每次都回退才报告。
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import timeit
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.utils import create_model_field
+
+import fast_json
+from main import _list_response_content, _work_item_fields
+
+from models import ApiResponse, ItemStatus, ItemType, ListQueryResponse, QueryWorkItemsRequest, TimeRange, WorkItemResponse
+from query_builder import build_list_query, encode_cursor
+from text_parser import QueryParser, parse_user_query
+from utils import get_date_range
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+# 用户实际使用的中文查询说法
+PARSER_CORPUS = [
+    "最近有什么任务",
+    "今天有什么会议",
+    "进行中的工作",
+    "明天的安排",
+    "本周的待办事项",
+    "UMS相关的任务",
+    "帮我找一下上个月已完成的bug",
+    "这个星期要做的事情有哪些",
+    "下周的会议讨论方案",
+    "看看最近的想法和点子",
+    "列出本月取消的任务",
+    "告诉我过去一周处理中的问题",
+    "查看当天的提醒",
+    "批量操作",
+    "今天下午要开的评审会",
+    "明天要交的周报写了没有",
+    "这周还有哪些没完成的任务",
+    "下周一的项目例会",
+    "最近记录的灵感",
+    "已经完成的客户需求有哪些",
+    "本月要跟进的合同",
+    "过去一个月的故障复盘",
+    "帮我查一下数据迁移的进度",
+    "有什么待办的报销",
+    "上周取消的会议",
+    "所有关于性能优化的想法",
+    "今天到期的提醒",
+    "看一下接口联调相关的问题",
+    "下周要准备的演示材料",
+    "最近一周新建的任务有多少",
+]
+
+# 覆盖常见筛选组合的列表查询请求
+QUERY_REQUESTS = [
+    QueryWorkItemsRequest(),
+    QueryWorkItemsRequest(time_range=TimeRange.TODAY),
+    QueryWorkItemsRequest(time_range=TimeRange.THIS_WEEK, item_type=ItemType.MEETING),
+    QueryWorkItemsRequest(time_range=TimeRange.RECENT, status=ItemStatus.IN_PROGRESS),
+    QueryWorkItemsRequest(time_range=TimeRange.PAST_MONTH, keyword="性能优化"),
+    QueryWorkItemsRequest(keyword="会议", project_name="UMS"),
+    QueryWorkItemsRequest(keyword="数据迁移", order_by_relevance=True),
+    QueryWorkItemsRequest(
+        time_range=TimeRange.NEXT_WEEK,
+        status=ItemStatus.TODO,
+        cursor=encode_cursor({'due_date': None, 'created_at': datetime(2025, 1, 2, 9, 30), 'id': 1234}),
+        page_size=50
+    ),
+]
+
+SERIALIZE_SIZES = (20, 200, 2000)
+
+
+def make_rows(count: int) -> List[WorkItemResponse]:
+    """生成与 query_work_items 返回格式一致的结果行"""
+    base = datetime(2025, 3, 1, 9, 0)
+    types = [item.value for item in ItemType]
+    statuses = [item.value for item in ItemStatus]
+    return [
+        WorkItemResponse(
+            id=str(100000 + i),
+            type=types[i % len(types)],
+            summary=f"第{i}号事项：整理项目周报并同步给相关同事",
+            project_name="UMS" if i % 3 else None,
+            due_date=str((base + timedelta(days=i % 60)).date()),
+            status=statuses[i % len(statuses)],
+            priority=i % 5 + 1,
+            created_at=str(base - timedelta(hours=i)),
+            updated_at=str(base - timedelta(hours=i // 2))
+        )
+        for i in range(count)
+    ]
+
+
+def make_db_rows(count: int) -> List[dict]:
+    """生成与 DictCursor 返回格式一致的列表查询结果行"""
+    base = datetime(2025, 3, 1, 9, 0)
+    types = [item.value for item in ItemType]
+    statuses = [item.value for item in ItemStatus]
+    return [
+        {
+            'id': 100000 + i,
+            'type': types[i % len(types)],
+            'summary': f"第{i}号事项：整理项目周报并同步给相关同事",
+            'project_name': "UMS" if i % 3 else None,
+            'due_date': (base + timedelta(days=i % 60)).date(),
+            'status': statuses[i % len(statuses)],
+            'priority': i % 5 + 1,
+            'created_at': base - timedelta(hours=i),
+            'updated_at': base - timedelta(hours=i // 2),
+        }
+        for i in range(count)
+    ]
+
+
+# FastAPI 为 response_model=ListQueryResponse 创建的响应字段
+RESPONSE_FIELD = create_model_field(name="Response_query_work_items", type_=ListQueryResponse, mode="serialization")
+
+
+def list_response_default(rows: List[dict]) -> bytes:
+    """默认路径：逐行构造 WorkItemResponse，再按 response_model 校验、序列化后由 JSONResponse 编码"""
+    content = _list_response_content([WorkItemResponse(**_work_item_fields(row)) for row in rows], None)
+    value, _ = RESPONSE_FIELD.validate(ApiResponse(**content), {}, loc=("response",))
+    return JSONResponse(RESPONSE_FIELD.serialize(value, mode="json")).body
+
+
+def list_response_fast(rows: List[dict]) -> bytes:
+    """快速路径（FAST_JSON_RESPONSE）：结果行转换为字典后直接编码"""
+    return fast_json.dumps(_list_response_content([_work_item_fields(row) for row in rows], None))
+
+
+def serialize(response: ApiResponse) -> bytes:
+    """与 FastAPI 对 response_model 的处理一致：jsonable_encoder 后由 JSONResponse 渲染"""
+    return JSONResponse(jsonable_encoder(response)).body
+
+
+def build_cases() -> List[Tuple[str, Callable[[], object], int]]:
+    """
+    Returns:
+        (名称, 被测函数, 函数内部处理的操作数) 列表；结果按单个操作计时
+    """
+    query_parser = QueryParser()
+    cases = []
+
+    def parse_corpus():
+        for text in PARSER_CORPUS:
+            query_parser.parse_query(text)
+    cases.append(("parser.parse_query", parse_corpus, len(PARSER_CORPUS)))
+
+    def parse_corpus_cached():
+        for text in PARSER_CORPUS:
+            parse_user_query(text)
+    cases.append(("parser.parse_user_query_cached", parse_corpus_cached, len(PARSER_CORPUS)))
+
+    # 单个时间范围只需 1~5 µs，分开计时抖动比差异还大，合为一项
+    time_ranges = [time_range.value for time_range in TimeRange]
+
+    def date_ranges():
+        for value in time_ranges:
+            get_date_range(value)
+    cases.append(("date_range.all_ranges", date_ranges, len(time_ranges)))
+
+    def build_queries():
+        for request in QUERY_REQUESTS:
+            build_list_query(request, "bench_user")
+    cases.append(("query_builder.build_list_query", build_queries, len(QUERY_REQUESTS)))
+
+    for size in SERIALIZE_SIZES:
+        response = ApiResponse(message="查询成功", data=make_rows(size), error=False)
+        cases.append((f"serialize.api_response_{size}", lambda response=response: serialize(response), 1))
+
+    # 从数据库结果行到响应体的完整过程，对比默认路径和快速路径
+    for size in SERIALIZE_SIZES:
+        rows = make_db_rows(size)
+        assert list_response_default(rows) == list_response_fast(rows)
+        cases.append((f"serialize.list_default_{size}", lambda rows=rows: list_response_default(rows), 1))
+        cases.append((f"serialize.list_fast_{size}", lambda rows=rows: list_response_fast(rows), 1))
+
+    return cases
+
+
+def measure(func: Callable[[], object], ops: int, repeat: int, min_time: float) -> Dict[str, float]:
+    """自动确定循环次数使每轮至少 min_time 秒，重复 repeat 轮，返回每个操作的耗时（µs）"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    # autorange 保证每轮至少 0.2 秒，按需要放大
+    number = max(1, int(number * max(1.0, min_time / 0.2)))
+    rounds = [elapsed / (number * ops) * 1e6 for elapsed in timer.repeat(repeat=repeat, number=number)]
+    return {
+        'min_us': round(min(rounds), 4),
+        'median_us': round(statistics.median(rounds), 4),
+        'ops_per_sec': round(1e6 / min(rounds), 1),
+        'loops': number * ops,
+        'ops': ops,
+    }
+
+
+def run_suite(
+    cases: List[Tuple[str, Callable[[], object], int]],
+    repeat: int,
+    min_time: float
+) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for name, func, ops in cases:
+        results[name] = measure(func, ops, repeat, min_time)
+        print(f"{name:<36} {results[name]['min_us']:>12.3f} µs  (中位数 {results[name]['median_us']:.3f})")
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float,
+    min_delta_us: float
+) -> List[str]:
+    """
+    按每项最小耗时对比基线，返回变慢超过容忍度的项
+
+    微秒级的操作受计时抖动影响较大，每次调用被测函数（ops 个操作）的绝对差值
+    小于 min_delta_us 的不算回退。
+    """
+    regressions = []
+    print()
+    print(f"📊 与基线对比（容忍度 {tolerance:.0%}）")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"  {name:<36} 基线中无此项")
+            continue
+        ratio = result['min_us'] / base['min_us'] if base['min_us'] else 1.0
+        delta_per_call = (result['min_us'] - base['min_us']) * result.get('ops', 1)
+        regressed = ratio > 1 + tolerance and delta_per_call > min_delta_us
+        mark = "❌" if regressed else "✅"
+        print(f"  {mark} {name:<34} {base['min_us']:>10.3f} → {result['min_us']:>10.3f} µs ({ratio - 1:+.1%})")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线微基准套件")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线文件路径")
+    parser.add_argument("--output", help="保存本次结果的 JSON 文件")
+    parser.add_argument("--save-baseline", action="store_true", help="用本次结果覆盖基线文件")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许比基线慢的比例")
+    parser.add_argument("--min-delta-us", type=float, default=3.0,
+                        help="每次调用被测函数的绝对差值小于该值（µs）时不算回退")
+    parser.add_argument("--confirm", type=int, default=2, help="疑似回退的项重新测量的次数，每次都回退才报告")
+    parser.add_argument("--repeat", type=int, default=5, help="每项重复轮数")
+    parser.add_argument("--min-time", type=float, default=0.2, help="每轮最短时间（秒）")
+    parser.add_argument("--filter", default="", help="只运行名称包含该字符串的项")
+    args = parser.parse_args()
+
+    print("⏱  离线微基准（每个操作的耗时）")
+    print("=" * 70)
+    cases = [case for case in build_cases() if not args.filter or args.filter in case[0]]
+    results = run_suite(cases, args.repeat, args.min_time)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'system': platform.system(),
+        },
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 结果已保存到 {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 基线已更新: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\n⚠️  未找到基线文件 {args.baseline}，使用 --save-baseline 生成")
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline.get('results', {}), args.tolerance, args.min_delta_us)
+    for attempt in range(args.confirm):
+        if not regressions:
+            break
+        # 只重新测量疑似回退的项，抖动造成的误报在重测中消失
+        print(f"\n🔁 重新测量疑似回退的项（第 {attempt + 1}/{args.confirm} 次）")
+        retry = run_suite([case for case in cases if case[0] in regressions], args.repeat, args.min_time)
+        regressions = compare(retry, baseline.get('results', {}), args.tolerance, args.min_delta_us)
+    if regressions:
+        print(f"\n❌ 性能回退: {', '.join(regressions)}")
+        sys.exit(1)
+    print("\n✅ 未发现性能回退")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+QueryParser 微基准：单次扫描匹配器 vs 旧的逐个正则匹配实现
+
+    python bench_text_parser.py --iterations 20000
+"""
+import argparse
+import re
+import time
+
+from text_parser import QueryParser
+
+CORPUS = [
+    "最近有什么任务",
+    "今天有什么会议",
+    "进行中的工作",
+    "明天的安排",
+    "本周的待办事项",
+    "UMS相关的任务",
+    "帮我找一下上个月已完成的bug",
+    "这个星期要做的事情有哪些",
+    "下周的会议讨论方案",
+    "看看最近的想法和点子",
+    "列出本月取消的任务",
+    "告诉我过去一周处理中的问题",
+    "查看当天的提醒",
+    "批量操作",
+]
+
+
+def legacy_parse(parser: QueryParser, user_input: str) -> dict:
+    """旧实现：每个关键词单独 re.search，提取关键词时再逐个 re.sub"""
+    user_input = user_input.lower().strip()
+    result = {'time_range': None, 'item_type': None, 'status': None, 'keyword': None, 'is_query': False}
+
+    for pattern in parser.query_intent_patterns:
+        if re.search(pattern, user_input):
+            result['is_query'] = True
+            break
+
+    for field, table in (('time_range', parser.time_patterns),
+                         ('item_type', parser.type_patterns),
+                         ('status', parser.status_patterns)):
+        for value, patterns in table.items():
+            if any(re.search(pattern, user_input) for pattern in patterns):
+                result[field] = value
+                break
+
+    cleaned_text = user_input
+    for pattern in parser.query_intent_patterns:
+        cleaned_text = re.sub(pattern, '', cleaned_text)
+    for table in (parser.time_patterns, parser.type_patterns, parser.status_patterns):
+        for patterns in table.values():
+            for pattern in patterns:
+                cleaned_text = re.sub(pattern, '', cleaned_text)
+    cleaned_text = re.sub(r'[，。！？、\s]+', ' ', cleaned_text).strip()
+    result['keyword'] = cleaned_text if cleaned_text and len(cleaned_text) > 1 else None
+    return result
+
+
+def run(label: str, func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for text in CORPUS:
+            func(text)
+    elapsed = time.perf_counter() - start
+    per_call = elapsed / (iterations * len(CORPUS)) * 1e6
+    print(f"{label:<12} {per_call:8.2f} µs/次")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QueryParser 微基准")
+    parser.add_argument("--iterations", type=int, default=5000, help="语料重复次数")
+    args = parser.parse_args()
+
+    query_parser = QueryParser()
+
+    # 时间范围、类型、状态和查询意图应与旧实现一致，只有 keyword 因按最长匹配剥离而不同
+    print("🔍 解析结果差异（旧实现 → 新实现）")
+    for text in CORPUS:
+        old, new = legacy_parse(query_parser, text), query_parser.parse_query(text)
+        if old != new:
+            diff = {key: (old[key], new[key]) for key in old if old[key] != new[key]}
+            print(f"  {text}: {diff}")
+    print()
+
+    print("⏱  解析耗时")
+    before = run("旧实现", lambda text: legacy_parse(query_parser, text), args.iterations)
+    after = run("单次扫描", query_parser.parse_query, args.iterations)
+    print(f"加速比: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
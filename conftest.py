@@ -0,0 +1,34 @@
+"""
+测试共用的夹具
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Generator
+
+import pytest
+
+from database import DatabaseManager
+from storage import SQLiteBackend
+
+
+@contextmanager
+def temp_sqlite_db_manager() -> Generator[DatabaseManager, None, None]:
+    """使用临时 SQLite 文件的数据库管理器，退出时关闭连接并删除数据库及 -wal/-shm 文件"""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    db_manager = DatabaseManager(backend=SQLiteBackend(path))
+    try:
+        yield db_manager
+    finally:
+        db_manager.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+@pytest.fixture
+def db_manager() -> Generator[DatabaseManager, None, None]:
+    """每个测试一个独立的临时 SQLite 数据库（不依赖 MySQL 和服务进程）"""
+    with temp_sqlite_db_manager() as manager:
+        yield manager
@@ -1,62 +1,378 @@
 """
 数据库连接和操作模块
 """
-import pymysql
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from typing import Generator, Optional
+from typing import Any, Callable, Dict, Generator, List, Optional, TypeVar
 import logging
 from config import settings
+from metrics import DB_CHECKOUT_WAIT_SECONDS, DB_CURSOR_ROWS
+from slow_query_log import SlowQueryRecorder
+from storage import StorageBackend, get_storage_backend
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+T = TypeVar('T')
+
+
+class PoolTimeoutError(Exception):
+    """等待连接池可用连接超时"""
+
+
+class _PooledConnection:
+    """连接池中的连接及其元数据"""
+
+    __slots__ = ('conn', 'created_at', 'last_used_at')
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+
+
+class ConnectionPool:
+    """
+    有界、带健康检查的数据库连接池
+
+    - 连接数限制在 min_size ~ max_size 之间，连接耗尽时等待 checkout_timeout 秒
+    - 空闲超过 idle_timeout 秒的连接会被回收（保留 min_size 个）
+    - 存活超过 max_lifetime 秒的连接在归还时关闭重建
+    - 空闲超过 ping_interval 秒的连接在取出时先 ping 一次，失败则重建
+    - 会话初始化语句只在连接创建时执行一次
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        min_size: int = 1,
+        max_size: int = 10,
+        idle_timeout: float = 300.0,
+        max_lifetime: float = 3600.0,
+        checkout_timeout: float = 10.0,
+        ping_interval: float = 1.0,
+        session_init: Optional[List[str]] = None,
+        ping: Optional[Callable[[Any], None]] = None
+    ):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("连接池大小配置无效")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.checkout_timeout = checkout_timeout
+        self.ping_interval = ping_interval
+        self.session_init = list(session_init or [])
+        self._ping = ping or (lambda conn: conn.ping(reconnect=False))
+
+        self._idle: deque = deque()
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition(threading.Lock())
+
+        # 统计信息，所有计数都在持有 _cond 时更新
+        self._stats = {
+            'created': 0,
+            'closed': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'wait_timeouts': 0,
+            'ping_failures': 0,
+            'recycled_idle': 0,
+            'recycled_lifetime': 0,
+        }
+
+    def _create(self) -> _PooledConnection:
+        """创建新连接并执行一次会话初始化"""
+        conn = self._connect()
+        try:
+            if self.session_init:
+                cursor = conn.cursor()
+                try:
+                    for statement in self.session_init:
+                        cursor.execute(statement)
+                finally:
+                    cursor.close()
+                conn.commit()
+        except Exception:
+            conn.close()
+            raise
+        with self._cond:
+            self._stats['created'] += 1
+        return _PooledConnection(conn)
+
+    def _destroy(self, entry: _PooledConnection):
+        """关闭连接（调用方负责维护 _size）"""
+        try:
+            entry.conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._stats['closed'] += 1
+
+    def _expired(self, entry: _PooledConnection, now: float) -> bool:
+        return self.max_lifetime > 0 and now - entry.created_at > self.max_lifetime
+
+    def _cull_idle(self, now: float) -> List[_PooledConnection]:
+        """取出需要回收的空闲连接（需持有锁）"""
+        culled = []
+        if self.idle_timeout <= 0:
+            return culled
+        # 空闲队列左侧是最久未使用的连接
+        while self._idle and self._size > self.min_size:
+            entry = self._idle[0]
+            if now - entry.last_used_at <= self.idle_timeout:
+                break
+            self._idle.popleft()
+            self._size -= 1
+            self._stats['recycled_idle'] += 1
+            culled.append(entry)
+        return culled
+
+    def _healthy(self, entry: _PooledConnection, now: float) -> bool:
+        """按需 ping 连接"""
+        if self.ping_interval < 0 or now - entry.last_used_at < self.ping_interval:
+            return True
+        try:
+            self._ping(entry.conn)
+            return True
+        except Exception as e:
+            with self._cond:
+                self._stats['ping_failures'] += 1
+            logger.warning(f"连接池连接 ping 失败，重新建立连接: {e}")
+            return False
+
+    def acquire(self, timeout: Optional[float] = None) -> _PooledConnection:
+        """从连接池取出一个连接；timeout 为等待可用连接的秒数，默认为 checkout_timeout"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            entry = None
+            culled = []
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("连接池已关闭")
+                now = time.monotonic()
+                culled = self._cull_idle(now)
+                if self._idle:
+                    # 后进先出，优先复用最近使用的热连接
+                    entry = self._idle.pop()
+                elif self._size < self.max_size:
+                    self._size += 1
+                else:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._stats['wait_timeouts'] += 1
+                        raise PoolTimeoutError(
+                            f"等待数据库连接超时（{timeout}s，连接池上限 {self.max_size}）"
+                        )
+                    self._stats['waits'] += 1
+                    self._cond.wait(remaining)
+                    continue
+                self._stats['checkouts'] += 1
+
+            for stale in culled:
+                self._destroy(stale)
+
+            if entry is None:
+                try:
+                    return self._create()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+
+            if self._healthy(entry, time.monotonic()):
+                return entry
+
+            # 连接已失效：关闭后在同一名额上重建
+            self._destroy(entry)
+            try:
+                return self._create()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+
+    def release(self, entry: _PooledConnection, discard: bool = False):
+        """归还连接；discard 为 True 或连接超过最大存活时间时直接关闭"""
+        now = time.monotonic()
+        expired = not discard and self._expired(entry, now)
+        discard = discard or expired
+
+        with self._cond:
+            if expired:
+                self._stats['recycled_lifetime'] += 1
+            if discard or self._closed:
+                self._size -= 1
+            else:
+                entry.last_used_at = now
+                self._idle.append(entry)
+                entry = None
+            self._cond.notify()
+
+        if entry is not None:
+            self._destroy(entry)
+
+    def warm_up(self):
+        """预先建立 min_size 个连接"""
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                entry = self._create()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                raise
+            self.release(entry)
+
+    def close(self):
+        """关闭连接池及所有空闲连接"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._size -= len(idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for entry in idle:
+            self._destroy(entry)
+
+    def stats(self) -> Dict[str, Any]:
+        """连接池统计信息，用于容量规划"""
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                'size': self._size,
+                'idle': idle,
+                'in_use': self._size - idle,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                **self._stats,
+            }
+
 
 class DatabaseManager:
     """数据库管理器"""
 
-    def __init__(self):
-        self.connection_params = {
-            'host': settings.db_host,
-            'database': settings.db_name,
-            'user': settings.db_user,
-            'password': settings.db_password,
-            'port': settings.db_port,
-            'charset': 'utf8mb4',
-            'autocommit': False
-        }
+    def __init__(self, backend: Optional[StorageBackend] = None):
+        # 存储后端由 db_backend 配置选择（mysql / sqlite）
+        self.backend = backend or get_storage_backend()
+        session_init = getattr(settings, 'db_session_init', None)
+        if isinstance(session_init, str):
+            session_init = [s.strip() for s in session_init.split(';') if s.strip()]
+
+        self.pool = ConnectionPool(
+            self.get_connection,
+            min_size=getattr(settings, 'db_pool_min_size', 1),
+            max_size=getattr(settings, 'db_pool_max_size', 10),
+            idle_timeout=getattr(settings, 'db_pool_idle_timeout', 300.0),
+            max_lifetime=getattr(settings, 'db_pool_max_lifetime', 3600.0),
+            checkout_timeout=getattr(settings, 'db_pool_checkout_timeout', 10.0),
+            ping_interval=getattr(settings, 'db_pool_ping_interval', 1.0),
+            session_init=session_init,
+            ping=self.backend.ping
+        )
+
+        # 专用于数据库访问的有界线程池，默认与连接池上限一致，
+        # 避免线程数超过可用连接后在 acquire 上空等
+        self.executor_workers = getattr(settings, 'db_executor_workers', None) or self.pool.max_size
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+        # 慢查询记录（slow_query_threshold_ms 为 0 时关闭）
+        self.slow_queries = SlowQueryRecorder(
+            threshold_ms=getattr(settings, 'slow_query_threshold_ms', 0),
+            capacity=getattr(settings, 'slow_query_capacity', 200),
+            redact=getattr(settings, 'slow_query_redact_params', True),
+            explain=self.explain if getattr(settings, 'slow_query_explain', False) else None
+        )
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.executor_workers,
+                        thread_name_prefix='db-worker'
+                    )
+        return self._executor
+
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        在数据库线程池中执行同步的数据库操作，避免阻塞事件循环
+
+        Args:
+            func: 同步函数，通常内部使用 get_db_cursor()
+            *args, **kwargs: 传给 func 的参数
+
+        Returns:
+            func 的返回值
+        """
+        loop = asyncio.get_running_loop()
+        # 复制当前上下文，使 contextvars 在工作线程中同样可见
+        ctx = contextvars.copy_context()
+        call = functools.partial(ctx.run, func, *args, **kwargs)
+        return await loop.run_in_executor(self._get_executor(), call)
 
     def get_connection(self):
         """获取数据库连接"""
         try:
-            conn = pymysql.connect(**self.connection_params)
-            return conn
-        except pymysql.Error as e:
+            return self.backend.connect()
+        except Exception as e:
             logger.error(f"数据库连接失败: {e}")
             raise
-    
+
     @contextmanager
-    def get_db_connection(self) -> Generator[pymysql.Connection, None, None]:
-        """获取数据库连接的上下文管理器"""
-        conn = None
+    def get_db_connection(self, checkout_timeout: Optional[float] = None) -> Generator[Any, None, None]:
+        """从连接池获取数据库连接的上下文管理器；checkout_timeout 默认使用连接池的配置"""
+        start = time.perf_counter()
+        entry = self.pool.acquire(checkout_timeout)
+        DB_CHECKOUT_WAIT_SECONDS.observe(time.perf_counter() - start)
+        conn = entry.conn
+        discard = False
         try:
-            conn = self.get_connection()
             yield conn
         except Exception as e:
-            if conn:
+            try:
                 conn.rollback()
+            except Exception:
+                discard = True
             logger.error(f"数据库操作失败: {e}")
             raise
         finally:
-            if conn:
-                conn.close()
+            if not discard:
+                try:
+                    # 归还前结束残留事务，避免下一个使用者看到旧快照
+                    if self.backend.in_transaction(conn):
+                        conn.rollback()
+                except Exception:
+                    discard = True
+            self.pool.release(entry, discard=discard)
 
     @contextmanager
-    def get_db_cursor(self, dict_cursor: bool = True) -> Generator[pymysql.cursors.Cursor, None, None]:
-        """获取数据库游标的上下文管理器"""
+    def get_db_cursor(self, dict_cursor: bool = True, unbuffered: bool = False) -> Generator[Any, None, None]:
+        """
+        获取数据库游标的上下文管理器
+
+        unbuffered 为 True 时返回流式字典游标，结果集不会一次性读入内存，用于导出等大结果集。
+        """
         with self.get_db_connection() as conn:
-            cursor_class = pymysql.cursors.DictCursor if dict_cursor else pymysql.cursors.Cursor
-            cursor = conn.cursor(cursor_class)
+            cursor = self.backend.cursor(conn, dict_cursor, unbuffered)
+            cursor.slow_query_recorder = self.slow_queries
             try:
                 yield cursor
                 conn.commit()
@@ -65,16 +381,42 @@ class DatabaseManager:
                 logger.error(f"数据库操作失败: {e}")
                 raise
             finally:
+                if cursor.rowcount >= 0:
+                    DB_CURSOR_ROWS.observe(cursor.rowcount)
                 cursor.close()
-    
+
+    def explain(self, sql: str, params: Any = None) -> List[Dict[str, Any]]:
+        """
+        获取 SQL 的执行计划
+
+        使用不计时的普通游标，EXPLAIN 本身不会再次触发慢查询记录。
+        """
+        with self.get_db_connection() as conn:
+            return self.backend.explain(conn, sql, params)
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """获取连接池统计信息"""
+        return self.pool.stats()
+
+    def close(self):
+        """关闭数据库线程池和连接池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.slow_queries.close()
+        self.pool.close()
+
+    def probe(self, checkout_timeout: Optional[float] = None):
+        """用连接池中的连接确认数据库可用，失败时抛出异常；不会为探测单独建立连接"""
+        with self.get_db_connection(checkout_timeout) as conn:
+            self.backend.ping(conn)
+
     def test_connection(self) -> bool:
         """测试数据库连接"""
         try:
-            with self.get_db_connection() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute("SELECT 1")
-                    result = cursor.fetchone()
-                    return result is not None
+            with self.get_db_cursor(dict_cursor=False) as cursor:
+                cursor.execute("SELECT 1")
+                return cursor.fetchone() is not None
         except Exception as e:
             logger.error(f"数据库连接测试失败: {e}")
             return False
@@ -85,9 +85,9 @@ USER app
 # 暴露端口
 EXPOSE 8000
 
-# 健康检查
+# 健康检查：存活探针不访问数据库；负载均衡应使用就绪探针 /health/ready
 HEALTHCHECK --interval=30s --timeout=30s --start-period=5s --retries=3 \
-    CMD curl -f http://localhost:8000/health || exit 1
+    CMD curl -f http://localhost:8000/health/live || exit 1
 
 # 启动命令
 CMD ["python", "main.py"]
@@ -0,0 +1,69 @@
+"""
+列表查询结果的 ETag
+
+ETag 由用户数据的版本和规范化的查询条件生成。数据版本直接从 work_items 读取
+（事项数、最大 ID、最近修改时间，按 user_id 前缀在 idx_work_items_user_list 上聚合），
+不依赖查询结果缓存：其他 worker 或其他实例的写入、导入脚本和手工 SQL 都会改变它，
+查询缓存关闭时同样可用。
+
+updated_at 精确到秒：最近一次修改发生在数据库当前这一秒内时，同一秒内随后的修改不会改变
+MAX(updated_at)，此时版本还不稳定，不生成 ETag。直接把 updated_at 改成更早的时间的写入无法感知。
+"""
+import hashlib
+from typing import Any, Dict, Optional, Tuple
+
+from models import QueryWorkItemsRequest
+from query_cache import QueryResultCache
+
+_DATA_VERSION_SQL = (
+    "SELECT COUNT(*) AS items, MAX(id) AS max_id, MAX(updated_at) AS updated_at, NOW() AS checked_at "
+    "FROM work_items WHERE user_id = %s"
+)
+
+# 条件请求统计，在 /metrics 中导出
+_stats = {'not_modified': 0}
+
+
+def _second(value: Any) -> str:
+    # MySQL 返回 datetime，SQLite 的聚合结果是文本，统一为 "YYYY-MM-DD HH:MM:SS" 再比较
+    return str(value)[:19]
+
+
+def read_data_version(cursor, user_id: str) -> Optional[Tuple[int, int, str]]:
+    """
+    读取用户数据的版本；最近一次修改就在当前这一秒内时返回 None
+
+    应在读取结果之前调用：两者之间发生的写入只会让 ETag 偏旧，下一次条件请求会重新取数据，
+    不会把新数据标成旧版本。
+    """
+    cursor.execute(_DATA_VERSION_SQL, (user_id,))
+    row = cursor.fetchone()
+    if row['updated_at'] is not None and _second(row['updated_at']) >= _second(row['checked_at']):
+        return None
+    return row['items'], row['max_id'] or 0, _second(row['updated_at']) if row['updated_at'] else ""
+
+
+def make_etag(user_id: str, request: QueryWorkItemsRequest, version: Optional[Tuple[int, int, str]]) -> Optional[str]:
+    """由用户、数据版本和规范化的查询条件生成弱 ETag；版本未知时返回 None"""
+    if version is None:
+        return None
+    payload = f"{user_id}:{version}:{QueryResultCache.normalize_request(request)}"
+    return f'W/"{hashlib.sha1(payload.encode("utf-8")).hexdigest()[:20]}"'
+
+
+def etag_matches(etag: Optional[str], if_none_match: Optional[str]) -> bool:
+    """If-None-Match 是否与当前 ETag 匹配（弱比较，支持逗号分隔的多个值和 *）"""
+    if etag is None or not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(',')]
+    matched = '*' in candidates or any(
+        value.removeprefix('W/') == etag.removeprefix('W/') for value in candidates
+    )
+    if matched:
+        _stats['not_modified'] += 1
+    return matched
+
+
+def get_etag_stats() -> Dict[str, int]:
+    """条件请求统计"""
+    return dict(_stats)
@@ -0,0 +1,53 @@
+"""
+快速 JSON 响应
+
+列表查询默认返回 pydantic 模型：每行构造一个 WorkItemResponse，再由 FastAPI 按 response_model
+重新校验、转换为 JSON 兼容的字典，最后用标准库 json 编码。结果行本来就是数据库返回的
+字符串、整数和 None，这两轮校验不改变任何值。
+
+开启 FAST_JSON_RESPONSE 后，列表查询直接把结果行转换成字典，由 FastJSONResponse 编码返回，
+跳过 FastAPI 的响应模型处理。安装了 orjson 时用 orjson 编码，否则用与 JSONResponse
+参数相同的标准库 json。两种编码器对这类数据的输出与默认路径逐字节相同
+（紧凑分隔符、非 ASCII 字符原样输出），见 test_fast_json.py。
+"""
+import json
+import time
+from typing import Any
+
+from fastapi.responses import Response
+
+from metrics import RESPONSE_SERIALIZE_SECONDS
+
+try:
+    import orjson
+except ImportError:  # 可选依赖，未安装时使用标准库 json
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """编码为与 JSONResponse 相同的紧凑 UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """
+    直接编码字典的 JSON 响应（记录序列化耗时）
+
+    内容必须已经是 JSON 兼容的类型（str / int / bool / None / list / dict），不做任何转换。
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        start = time.perf_counter()
+        body = dumps(content)
+        RESPONSE_SERIALIZE_SECONDS.observe(time.perf_counter() - start)
+        return body
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+合成数据集生成器
+
+生成接近真实分布的工作事项：中文摘要和内容、按 Zipf 分布倾斜的用户
+（少数用户拥有大部分数据）、分布在前后数月的截止/开始日期，以及标签。
+可以直接批量写入数据库，也可以输出为 NDJSON 文件。
+
+    # 向本地数据库写入 100 个用户共 100 万条数据（先删除上次生成的数据）
+    python generate_dataset.py --users 100 --items 1000000 --truncate
+
+    # 只生成文件，不连接数据库
+    python generate_dataset.py --items 10000 --output items.ndjson
+"""
+import argparse
+import bisect
+import json
+import random
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Iterator, List, Tuple
+
+USER_PREFIX = "load_user_"
+
+PROJECTS = ["UMS", "数据平台", "支付网关", "客户门户", "移动端", "运维自动化", "推荐系统", "内部工具", None, None]
+VERBS = ["整理", "评审", "跟进", "修复", "设计", "讨论", "准备", "确认", "上线", "复盘", "优化", "编写"]
+OBJECTS = [
+    "项目周报", "接口文档", "数据迁移方案", "性能测试报告", "客户需求", "线上故障", "部署脚本",
+    "季度目标", "演示材料", "合同条款", "报销单", "招聘计划", "技术方案", "发布计划", "监控告警",
+]
+CONTEXTS = [
+    "需要和产品经理对齐细节", "周五之前同步给团队", "注意兼容旧版本接口", "先在测试环境验证",
+    "客户反馈比较急", "涉及跨部门协作", "参考上次的会议纪要", "完成后更新知识库",
+]
+TAGS = ["紧急", "重要", "客户", "内部", "技术债", "文档", "会议", "跟进", "线上", "优化"]
+
+# 事项类型及其权重；想法和笔记通常没有截止日期
+TYPES = [("task", 45), ("meeting", 20), ("issue", 15), ("idea", 8), ("note", 8), ("other", 4)]
+STATUSES = [("todo", 40), ("in_progress", 25), ("completed", 25), ("resolved", 5), ("cancelled", 5)]
+
+INSERT_SQL = """
+INSERT INTO work_items (
+    user_id, type, content, summary, project_name,
+    due_date, start_date, status, priority, tags, created_at
+)
+VALUES """
+INSERT_ROW = "(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+
+
+def user_ids(users: int) -> List[str]:
+    return [f"{USER_PREFIX}{i:04d}" for i in range(users)]
+
+
+class ZipfPicker:
+    """按 1 / (rank + 1) ** skew 的权重选择用户"""
+
+    def __init__(self, items: List[str], skew: float):
+        self.items = items
+        cumulative = []
+        total = 0.0
+        for rank in range(len(items)):
+            total += 1.0 / (rank + 1) ** skew
+            cumulative.append(total)
+        self.cumulative = cumulative
+        self.total = total
+
+    def pick(self, rng: random.Random) -> str:
+        return self.items[bisect.bisect_left(self.cumulative, rng.random() * self.total)]
+
+
+def _weighted(rng: random.Random, choices: List[Tuple[str, int]]) -> str:
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights)[0]
+
+
+def generate_items(
+    users: int,
+    items: int,
+    seed: int = 42,
+    skew: float = 1.1,
+    spread_days: int = 180
+) -> Iterator[tuple]:
+    """
+    生成工作事项行，列顺序与 INSERT_SQL 一致
+
+    Args:
+        users: 用户数
+        items: 事项总数
+        seed: 随机种子，相同参数生成相同数据
+        skew: 用户分布的倾斜程度，越大越集中在少数用户
+        spread_days: 截止日期分布在今天前后多少天内
+    """
+    rng = random.Random(seed)
+    picker = ZipfPicker(user_ids(users), skew)
+    today = date.today()
+    now = datetime.now().replace(microsecond=0)
+
+    for i in range(items):
+        item_type = _weighted(rng, TYPES)
+        verb, obj = rng.choice(VERBS), rng.choice(OBJECTS)
+        project = rng.choice(PROJECTS)
+        summary = f"{verb}{project or ''}{obj}"
+        content = f"{summary}，{rng.choice(CONTEXTS)}。编号 {i}"
+
+        if item_type in ("idea", "note") and rng.random() < 0.7:
+            due_date = start_date = None
+            created_at = now - timedelta(minutes=rng.randint(0, spread_days * 24 * 60))
+        else:
+            due_date = today + timedelta(days=int(rng.triangular(-spread_days, spread_days, spread_days / 6)))
+            start_date = due_date - timedelta(days=rng.randint(0, 14))
+            created_at = datetime.combine(start_date, datetime.min.time()) - timedelta(minutes=rng.randint(0, 14 * 24 * 60))
+            created_at = min(created_at, now)
+
+        tags = rng.sample(TAGS, rng.randint(0, 3))
+        yield (
+            picker.pick(rng),
+            item_type,
+            content,
+            summary,
+            project,
+            due_date,
+            start_date,
+            _weighted(rng, STATUSES),
+            rng.randint(1, 5),
+            json.dumps(tags, ensure_ascii=False) if tags else None,
+            created_at,
+        )
+
+
+def load_into_database(rows: Iterator[tuple], chunk_size: int, truncate: bool) -> Counter:
+    """按块用多行 INSERT 写入数据库，每块一个事务"""
+    from database import db_manager
+
+    if truncate:
+        with db_manager.get_db_cursor() as cursor:
+            cursor.execute("DELETE FROM work_items WHERE user_id LIKE %s", (USER_PREFIX + "%",))
+            print(f"🧹 已删除上次生成的 {cursor.rowcount} 条数据")
+
+    per_user: Counter = Counter()
+    chunk: List[tuple] = []
+    loaded = 0
+    start = time.perf_counter()
+
+    def flush():
+        nonlocal loaded
+        sql = INSERT_SQL + ", ".join([INSERT_ROW] * len(chunk))
+        params = [value for row in chunk for value in row]
+        with db_manager.get_db_cursor() as cursor:
+            cursor.execute(sql, params)
+        loaded += len(chunk)
+        chunk.clear()
+        elapsed = time.perf_counter() - start
+        print(f"\r  已写入 {loaded} 条（{loaded / elapsed:,.0f} 行/秒）", end="", flush=True)
+
+    for row in rows:
+        per_user[row[0]] += 1
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+    print()
+    return per_user
+
+
+def write_ndjson(rows: Iterator[tuple], path: str) -> Counter:
+    """输出为 NDJSON，每行一个事项（字段名与 work_items 列名一致）"""
+    columns = ["user_id", "type", "content", "summary", "project_name",
+               "due_date", "start_date", "status", "priority", "tags", "created_at"]
+    per_user: Counter = Counter()
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            per_user[row[0]] += 1
+            record = dict(zip(columns, row))
+            record["tags"] = json.loads(record["tags"]) if record["tags"] else []
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    return per_user
+
+
+def main():
+    parser = argparse.ArgumentParser(description="合成数据集生成器")
+    parser.add_argument("--users", type=int, default=100, help="用户数")
+    parser.add_argument("--items", type=int, default=10000, help="事项总数")
+    parser.add_argument("--skew", type=float, default=1.1, help="用户分布倾斜程度（Zipf 指数）")
+    parser.add_argument("--spread-days", type=int, default=180, help="截止日期分布在今天前后的天数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="每个 INSERT 语句的行数")
+    parser.add_argument("--truncate", action="store_true", help="写入前删除上次生成的数据")
+    parser.add_argument("--output", help="输出 NDJSON 文件而不写入数据库")
+    args = parser.parse_args()
+
+    print(f"🏭 生成 {args.items} 条工作事项，{args.users} 个用户（skew={args.skew}）")
+    rows = generate_items(args.users, args.items, args.seed, args.skew, args.spread_days)
+    start = time.perf_counter()
+    if args.output:
+        per_user = write_ndjson(rows, args.output)
+        print(f"💾 已写入 {args.output}")
+    else:
+        per_user = load_into_database(rows, args.chunk_size, args.truncate)
+    elapsed = time.perf_counter() - start
+
+    print(f"✅ 完成，用时 {elapsed:.1f}s")
+    if not args.output:
+        print("💡 数据直接写入了 work_items，请执行 python rebuild_stats.py 更新统计汇总表")
+    print("👥 数据最多的用户:")
+    for user_id, count in per_user.most_common(5):
+        print(f"  {user_id}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+健康检查
+
+- 存活探针（/health/live）：只说明进程和事件循环在响应，不访问数据库，供 Docker HEALTHCHECK 使用
+- 就绪探针（/health/ready、/health）：读取后台线程定期刷新的数据库状态
+
+后台线程每隔 health_check_interval 秒从连接池取一个连接 ping 一次，等待连接最多
+health_probe_timeout 秒，不会为探测单独建立连接，也不占用数据库线程池。
+等待连接超时只说明连接池已满（连接都在被请求使用），不算探测失败，只报告饱和；
+只有建立连接或 ping 失败才立即视为未就绪，避免高负载时所有实例同时被摘除。
+饱和的探测也不算成功：连接全部卡在无响应的数据库上时连接池同样会占满，
+持续饱和超过 stale_after 秒即视为未就绪。
+探针请求本身不访问数据库，负载均衡再频繁地检查也不会与用户请求争用连接。
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from config import settings
+from database import DatabaseManager, PoolTimeoutError, db_manager
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """后台定期探测数据库，保存最近一次的结果供就绪探针读取"""
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        interval: float = 5.0,
+        probe_timeout: float = 2.0,
+        stale_after: Optional[float] = None
+    ):
+        self.db_manager = db_manager
+        self.interval = interval
+        self.probe_timeout = probe_timeout
+        # 超过这个时间没有成功的探测（包括探测线程卡在连接上）即视为未就绪
+        self.stale_after = stale_after or interval * 3
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.last_check_at: Optional[datetime] = None
+        self.last_success_at: Optional[datetime] = None
+        self._last_success_monotonic: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_latency_ms: Optional[float] = None
+        # 最近一次探测因连接池已满没有取到连接
+        self.saturated = False
+        self.probes = 0
+        self.failures = 0
+        self.saturated_probes = 0
+
+    def probe_once(self) -> bool:
+        """探测一次数据库并记录结果，返回是否成功（连接池已满不算成功）"""
+        start = time.perf_counter()
+        saturated = False
+        try:
+            self.db_manager.probe(self.probe_timeout)
+            error = None
+        except PoolTimeoutError:
+            # 连接都在被请求使用，不能说明数据库不可用；摘除实例只会把负载压到其他实例上。
+            # 也不能说明数据库可用，不刷新最近成功时间，由 stale_after 兜底
+            error = None
+            saturated = True
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        latency_ms = round((time.perf_counter() - start) * 1000, 3)
+
+        with self._lock:
+            self.probes += 1
+            self.last_check_at = datetime.now()
+            self.last_latency_ms = latency_ms
+            self.last_error = error
+            self.saturated = saturated
+            if saturated:
+                self.saturated_probes += 1
+            elif error is None:
+                self.last_success_at = self.last_check_at
+                self._last_success_monotonic = time.monotonic()
+            else:
+                self.failures += 1
+        if error is not None:
+            logger.warning(f"数据库就绪探测失败: {error}")
+        elif saturated:
+            logger.warning(f"数据库连接池已满，{self.probe_timeout:g} 秒内没有取到探测连接")
+        return error is None and not saturated
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.probe_once()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """启动后台探测线程，第一次探测立即执行"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='health-probe', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台探测线程"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.probe_timeout + 1)
+            self._thread = None
+
+    def is_ready(self) -> bool:
+        """最近一次探测没有失败（连接池已满不算失败），且距上次成功不超过 stale_after 秒"""
+        with self._lock:
+            return (
+                self.last_error is None
+                and self._last_success_monotonic is not None
+                and time.monotonic() - self._last_success_monotonic <= self.stale_after
+            )
+
+    def _last_success_age(self) -> Optional[float]:
+        if self._last_success_monotonic is None:
+            return None
+        return round(time.monotonic() - self._last_success_monotonic, 3)
+
+    def status(self) -> Dict[str, Any]:
+        """就绪状态和连接池使用情况"""
+        ready = self.is_ready()
+        pool = self.db_manager.get_pool_stats()
+        with self._lock:
+            return {
+                'ready': ready,
+                'saturated': self.saturated,
+                'last_check_at': self.last_check_at,
+                'last_success_at': self.last_success_at,
+                'last_success_age_seconds': self._last_success_age(),
+                'last_error': self.last_error,
+                'probe_latency_ms': self.last_latency_ms,
+                'pool': {
+                    'size': pool['size'],
+                    'in_use': pool['in_use'],
+                    'idle': pool['idle'],
+                    'max_size': pool['max_size'],
+                    # 使用中的连接占上限的比例，1 表示新的请求需要排队等待连接
+                    'saturation': round(pool['in_use'] / pool['max_size'], 3),
+                    'waits': pool['waits'],
+                    'wait_timeouts': pool['wait_timeouts'],
+                },
+            }
+
+    def metrics(self) -> Dict[str, float]:
+        """/metrics 中的就绪状态指标"""
+        ready = self.is_ready()
+        with self._lock:
+            age = self._last_success_age()
+            return {
+                'ready': int(ready),
+                'saturated': int(self.saturated),
+                'last_success_age_seconds': age if age is not None else -1,
+                'probes': self.probes,
+                'failures': self.failures,
+                'saturated_probes': self.saturated_probes,
+            }
+
+
+def create_health_monitor() -> HealthMonitor:
+    """按配置创建健康检查监视器"""
+    stale_after = getattr(settings, 'health_stale_after', None)
+    return HealthMonitor(
+        db_manager,
+        interval=float(getattr(settings, 'health_check_interval', 5.0)),
+        probe_timeout=float(getattr(settings, 'health_probe_timeout', 2.0)),
+        stale_after=float(stale_after) if stale_after else None
+    )
+
+
+# 全局健康检查监视器实例
+health_monitor = create_health_monitor()
+
+
+def get_health_monitor() -> HealthMonitor:
+    """获取健康检查监视器实例"""
+    return health_monitor
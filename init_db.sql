@@ -32,13 +32,36 @@ CREATE INDEX idx_work_items_created_at ON work_items(created_at);
 CREATE INDEX idx_work_items_updated_at ON work_items(updated_at);
 
 -- 创建全文搜索索引 (MySQL版本)
-CREATE FULLTEXT INDEX idx_work_items_summary_fulltext ON work_items(summary);
-CREATE FULLTEXT INDEX idx_work_items_content_fulltext ON work_items(content);
+-- 使用 ngram 分词器以支持中文关键词检索，summary 和 content 合并为一个索引，
+-- 与 MATCH(summary, content) AGAINST (...) 查询对应。
+-- 关闭停用词，避免 ngram 切分出的英文片段（如 "at"、"is"）被忽略
+SET SESSION innodb_ft_enable_stopword = OFF;
+CREATE FULLTEXT INDEX idx_work_items_summary_content_ngram ON work_items(summary, content) WITH PARSER ngram;
 
 -- 创建复合索引
 CREATE INDEX idx_work_items_user_status ON work_items(user_id, status);
 CREATE INDEX idx_work_items_user_type ON work_items(user_id, type);
 CREATE INDEX idx_work_items_user_project ON work_items(user_id, project_name);
+-- 时间范围查询使用的复合索引：user_id 等值 + 日期列范围
+-- (user_id, due_date) 索引同时按列表排序 due_date ASC, created_at DESC, id DESC 排列，
+-- 游标分页可以直接沿索引顺序读取，不需要 filesort。
+-- 后面附带列表字段，状态/类型/项目条件可以在索引上判断；InnoDB 索引键最长 3072 字节，
+-- user_id、project_name 之外放不下 summary VARCHAR(500)，不含 summary 的 fields 查询只读索引
+CREATE INDEX idx_work_items_user_list ON work_items(user_id, due_date, created_at DESC, id DESC, type, status, priority, project_name, updated_at);
+CREATE INDEX idx_work_items_user_start_date ON work_items(user_id, start_date);
+CREATE INDEX idx_work_items_user_created_at ON work_items(user_id, created_at);
+
+-- 按用户的统计汇总表，由记录/更新操作在同一事务中增量维护（见 work_item_stats.py）
+-- dimension: status / type / project 为对应取值的事项数；
+-- open_due 为未结束事项按截止日期的计数，用于计算逾期数和本周到期数
+DROP TABLE IF EXISTS work_item_stats;
+CREATE TABLE work_item_stats (
+    user_id VARCHAR(255) NOT NULL,
+    dimension VARCHAR(32) NOT NULL,
+    value VARCHAR(255) NOT NULL,
+    item_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, dimension, value)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- 插入示例数据（可选）
 INSERT INTO work_items (
@@ -82,6 +105,18 @@ INSERT INTO work_items (
     JSON_ARRAY('功能', '优化', '自动化')
 );
 
+-- 用示例数据填充统计汇总表（与 rebuild_stats.py 的计算方式一致）
+INSERT INTO work_item_stats (user_id, dimension, value, item_count)
+SELECT user_id, 'status', COALESCE(status, ''), COUNT(*) FROM work_items GROUP BY user_id, status
+UNION ALL
+SELECT user_id, 'type', type, COUNT(*) FROM work_items GROUP BY user_id, type
+UNION ALL
+SELECT user_id, 'project', COALESCE(project_name, ''), COUNT(*) FROM work_items GROUP BY user_id, project_name
+UNION ALL
+SELECT user_id, 'open_due', DATE_FORMAT(due_date, '%Y-%m-%d'), COUNT(*) FROM work_items
+WHERE due_date IS NOT NULL AND (status IS NULL OR status NOT IN ('completed', 'resolved', 'cancelled'))
+GROUP BY user_id, due_date;
+
 -- MySQL 中 updated_at 字段已经通过 ON UPDATE CURRENT_TIMESTAMP 自动更新
 -- 不需要额外的触发器
 
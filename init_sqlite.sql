@@ -0,0 +1,81 @@
+-- Work Manager 数据库初始化脚本 (SQLite版本)
+-- 与 init_db.sql 的表结构和索引对应；使用 SQLite 存储后端时在首次连接时自动执行
+
+CREATE TABLE IF NOT EXISTS work_items (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    type TEXT NOT NULL CHECK (type IN ('task', 'meeting', 'issue', 'idea', 'note', 'other')),
+    content TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    project_name TEXT,
+    due_date DATE,
+    start_date DATE,
+    status TEXT CHECK (status IN ('todo', 'in_progress', 'completed', 'resolved', 'cancelled')),
+    priority INTEGER CHECK (priority >= 1 AND priority <= 5),
+    tags TEXT,
+    -- 与 MySQL 的 CURRENT_TIMESTAMP 一致使用本地时间，格式为 'YYYY-MM-DD HH:MM:SS'
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+
+-- 单列索引
+CREATE INDEX IF NOT EXISTS idx_work_items_user_id ON work_items(user_id);
+CREATE INDEX IF NOT EXISTS idx_work_items_type ON work_items(type);
+CREATE INDEX IF NOT EXISTS idx_work_items_status ON work_items(status);
+CREATE INDEX IF NOT EXISTS idx_work_items_due_date ON work_items(due_date);
+CREATE INDEX IF NOT EXISTS idx_work_items_start_date ON work_items(start_date);
+CREATE INDEX IF NOT EXISTS idx_work_items_project_name ON work_items(project_name);
+CREATE INDEX IF NOT EXISTS idx_work_items_created_at ON work_items(created_at);
+CREATE INDEX IF NOT EXISTS idx_work_items_updated_at ON work_items(updated_at);
+
+-- 复合索引
+CREATE INDEX IF NOT EXISTS idx_work_items_user_status ON work_items(user_id, status);
+CREATE INDEX IF NOT EXISTS idx_work_items_user_type ON work_items(user_id, type);
+CREATE INDEX IF NOT EXISTS idx_work_items_user_project ON work_items(user_id, project_name);
+-- 列表查询的覆盖索引：按列表排序排列并包含默认列表字段，默认列表查询只读索引，
+-- 不读取表中的 content / tags；替换早期版本的 idx_work_items_user_due_date
+DROP INDEX IF EXISTS idx_work_items_user_due_date;
+CREATE INDEX IF NOT EXISTS idx_work_items_user_list ON work_items(user_id, due_date, created_at DESC, id DESC, type, status, priority, project_name, summary, updated_at);
+CREATE INDEX IF NOT EXISTS idx_work_items_user_start_date ON work_items(user_id, start_date);
+CREATE INDEX IF NOT EXISTS idx_work_items_user_created_at ON work_items(user_id, created_at);
+
+-- MySQL 的 ON UPDATE CURRENT_TIMESTAMP：只在更新语句没有显式设置 updated_at 时补上
+CREATE TRIGGER IF NOT EXISTS trg_work_items_updated_at
+AFTER UPDATE ON work_items
+FOR EACH ROW WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE work_items SET updated_at = datetime('now', 'localtime') WHERE id = NEW.id;
+END;
+
+-- 全文检索：外部内容 FTS5 表，trigram 分词支持中文子串匹配
+-- （对应 MySQL 的 ngram 索引；trigram 要求每个检索词至少 3 个字符）
+CREATE VIRTUAL TABLE IF NOT EXISTS work_items_fts USING fts5(
+    summary, content,
+    content='work_items', content_rowid='id',
+    tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_work_items_fts_insert AFTER INSERT ON work_items BEGIN
+    INSERT INTO work_items_fts(rowid, summary, content) VALUES (NEW.id, NEW.summary, NEW.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_work_items_fts_delete AFTER DELETE ON work_items BEGIN
+    INSERT INTO work_items_fts(work_items_fts, rowid, summary, content)
+    VALUES ('delete', OLD.id, OLD.summary, OLD.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_work_items_fts_update
+AFTER UPDATE OF summary, content ON work_items BEGIN
+    INSERT INTO work_items_fts(work_items_fts, rowid, summary, content)
+    VALUES ('delete', OLD.id, OLD.summary, OLD.content);
+    INSERT INTO work_items_fts(rowid, summary, content) VALUES (NEW.id, NEW.summary, NEW.content);
+END;
+
+-- 按用户的统计汇总表，由记录/更新操作在同一事务中增量维护（见 work_item_stats.py）
+CREATE TABLE IF NOT EXISTS work_item_stats (
+    user_id TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    value TEXT NOT NULL,
+    item_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, dimension, value)
+) WITHOUT ROWID;
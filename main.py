@@ -1,38 +1,93 @@
 """
 Work Manager Backend - FastAPI 主应用
 """
-from fastapi import FastAPI, HTTPException, Request, Depends
+from fastapi import FastAPI, HTTPException, Request, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from contextlib import asynccontextmanager
+import anyio
+from pydantic import ValidationError
+import codecs
+import hmac
 import json
 import logging
+import time
 from datetime import datetime
-from typing import List
+from typing import Any, List, Optional, Tuple
 
 from config import settings, get_allowed_origins
-from database import get_db_manager, DatabaseManager
+from database import get_db_manager, DatabaseManager, db_manager as default_db_manager
 from models import (
     SmartRecordWorkItemRequest,
     QueryWorkItemsRequest,
     UpdateWorkItemRequest,
+    BulkUpdateWorkItemsRequest,
+    ExportWorkItemsRequest,
+    FileFormat,
     ApiResponse,
+    BatchRecordResponse,
+    BulkUpdateResponse,
     HealthResponse,
-    WorkItemResponse
+    ImportResponse,
+    ImportRowError,
+    ListQueryResponse,
+    ReadinessResponse,
+    WorkItemStatsResponse
+)
+from utils import get_date_range, validate_priority
+from work_item_export import ENCODERS, MEDIA_TYPES, ExportLimiter, ExportStreamingResponse, GzipStream, fetch_batches
+from work_item_import import DEFAULT_MAX_RECORD_CHARS, READERS
+from work_item_stats import apply_deltas, read_stats, row_deltas
+from request_context import RequestContextMiddleware, annotate, current_user_id, log_payload, timed
+from text_parser import get_parse_cache_stats, parse_user_query
+from fast_json import FastJSONResponse
+from health import HealthMonitor, get_health_monitor
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, TimedJSONResponse, registry, render_metrics
+from query_cache import QueryResultCache, get_query_cache
+from etag import etag_matches, get_etag_stats, make_etag, read_data_version
+from query_builder import (
+    InvalidCursorError,
+    UPDATE_TARGET_COLUMNS,
+    build_bulk_update_queries,
+    build_export_query,
+    build_list_query,
+    build_update_target_query,
+    encode_cursor,
+    get_page_size,
+    get_template_stats,
+    select_fields,
+    uses_relevance_order
 )
-from utils import get_date_range, get_user_id_from_request, validate_priority
-from text_parser import parse_user_query
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：启动时预热连接池并开始后台就绪探测，关闭时停止探测、释放连接"""
+    try:
+        default_db_manager.pool.warm_up()
+    except Exception as e:
+        logger.warning(f"连接池预热失败，将在首次请求时建立连接: {e}")
+    get_health_monitor().start()
+    if not getattr(settings, 'admin_token', None):
+        logger.warning("未配置 ADMIN_TOKEN，管理和统计接口（/admin/*、/pool_stats、/cache_stats）将拒绝所有请求")
+    yield
+    get_health_monitor().stop()
+    default_db_manager.close()
+
+
 # 创建 FastAPI 应用实例
 app = FastAPI(
     title="Work Manager Backend",
     description="为 Dify AI 助手提供工作事项管理功能的后端服务",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan,
+    default_response_class=TimedJSONResponse
 )
 
 # 添加 CORS 中间件
@@ -44,6 +99,319 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 指标中间件统计包括 CORS 处理在内的完整耗时
+app.add_middleware(MetricsMiddleware)
+
+# 请求上下文放在最外层：一次性解析用户ID和请求ID，请求结束时输出一行 JSON 访问日志
+app.add_middleware(RequestContextMiddleware)
+
+# 抓取 /metrics 时读取连接池和缓存状态
+registry.add_gauge_collector("db_pool", "数据库连接池状态", default_db_manager.get_pool_stats)
+registry.add_gauge_collector("query_cache", "查询结果缓存状态", lambda: get_query_cache().stats())
+registry.add_gauge_collector("parse_cache", "解析缓存状态", get_parse_cache_stats)
+registry.add_gauge_collector("health", "就绪探针状态", lambda: get_health_monitor().metrics())
+registry.add_gauge_collector("etag", "条件请求统计", get_etag_stats)
+
+# 同时进行的导出数上限：每个导出在下载完之前占用一个连接池连接
+export_limiter = ExportLimiter(getattr(settings, 'export_max_concurrent', 2))
+registry.add_gauge_collector("export", "流式导出状态", export_limiter.stats)
+
+
+def _read_data_version(db_manager: DatabaseManager, user_id: str):
+    """读取用户数据的版本（同步，在数据库线程池中调用）"""
+    with db_manager.get_db_cursor() as cursor:
+        return read_data_version(cursor, user_id)
+
+
+def _fetch_versioned(db_manager: DatabaseManager, user_id: str, sql: str, params: tuple, read_version: bool):
+    """
+    执行列表查询，需要时先在同一连接上读取数据版本（同步，在数据库线程池中调用）
+
+    Returns:
+        (数据版本, 结果行)；未读取版本时版本为 None
+    """
+    with db_manager.get_db_cursor() as cursor:
+        version = read_data_version(cursor, user_id) if read_version else None
+        cursor.execute(sql, params)
+        return version, cursor.fetchall()
+
+
+_SELECT_FOR_UPDATE_SQL = f"SELECT {UPDATE_TARGET_COLUMNS} FROM work_items WHERE id = %s AND user_id = %s FOR UPDATE"
+
+
+def _apply_stat_changes(cursor, db_manager: DatabaseManager, user_id: str, old_rows: List[dict], stat_changes: dict):
+    """按更新前的行和更新的统计列计算变化量，写入统计汇总表"""
+    if stat_changes and old_rows:
+        new_rows = [{**row, **stat_changes} for row in old_rows]
+        apply_deltas(cursor, db_manager.backend, user_id, row_deltas(old_rows, new_rows))
+
+
+def _update_work_item(
+    db_manager: DatabaseManager,
+    user_id: str,
+    item_id: Optional[str],
+    target_query: Optional[Tuple[str, tuple]],
+    set_clause: str,
+    set_params: List[Any],
+    stat_changes: dict
+) -> Tuple[Optional[str], List[dict], int]:
+    """
+    在一个事务中定位并更新工作事项（同步，在数据库线程池中调用）
+
+    没有 item_id 时先用 SELECT ... LIMIT 2 FOR UPDATE 查找并锁住候选行，
+    唯一命中才在同一连接上执行 UPDATE，查找和更新之间事项不会被其他请求修改。
+    更新涉及统计列（stat_changes 非空）时，直接指定的事项也先锁定读出旧值，
+    统计汇总表在同一事务中更新。
+
+    Returns:
+        (更新的事项ID, 候选行, 受影响行数)；候选行不唯一时不执行更新，事项ID为 None
+    """
+    sql = f"UPDATE work_items SET {set_clause} WHERE id = %s AND user_id = %s"
+    with db_manager.get_db_cursor() as cursor:
+        candidates: List[dict] = []
+        old_rows: List[dict] = []
+        if not item_id:
+            target_sql, target_params = target_query
+            db_manager.backend.begin_write(cursor)
+            cursor.execute(target_sql, target_params)
+            candidates = cursor.fetchall()
+            if len(candidates) != 1:
+                return None, candidates, 0
+            item_id = str(candidates[0]['id'])
+            old_rows = candidates
+        elif stat_changes:
+            db_manager.backend.begin_write(cursor)
+            cursor.execute(_SELECT_FOR_UPDATE_SQL, (item_id, user_id))
+            old_rows = cursor.fetchall()
+            if not old_rows:
+                return item_id, candidates, 0
+
+        cursor.execute(sql, (*set_params, item_id, user_id))
+        affected = cursor.rowcount
+        _apply_stat_changes(cursor, db_manager, user_id, old_rows, stat_changes)
+        return item_id, candidates, affected
+
+
+def _work_item_fields(row: dict) -> dict:
+    """
+    把列表查询的一行转换为 WorkItemResponse 的字段（键顺序与模型字段一致）
+
+    默认路径由 ApiResponse 校验为 WorkItemResponse，快速路径直接编码这个字典，两者输出相同。
+    """
+    return {
+        'id': str(row['id']),
+        'type': row['type'],
+        'summary': row['summary'],
+        'project_name': row['project_name'],
+        'due_date': str(row['due_date']) if row['due_date'] else None,
+        'status': row['status'],
+        'priority': row['priority'],
+        'created_at': str(row['created_at']) if row['created_at'] else None,
+        'updated_at': str(row['updated_at']) if row['updated_at'] else None,
+    }
+
+
+def _selected_fields(row: dict, fields: List[str]) -> dict:
+    """
+    把指定了 fields 的列表查询结果行转换为只含这些字段的字典
+
+    取值格式与 WorkItemResponse 一致（ID 和日期为字符串），tags 为列表。
+    """
+    item = {}
+    for name in fields:
+        value = row[name]
+        if name == 'tags':
+            value = json.loads(value) if value else []
+        elif name == 'id' or (value is not None and name in ('due_date', 'start_date', 'created_at', 'updated_at')):
+            value = str(value)
+        item[name] = value
+    return item
+
+
+def _list_response_content(items: List[dict], next_cursor: Optional[str]) -> dict:
+    """列表查询的响应内容（键顺序与 ApiResponse 字段一致）"""
+    if not items:
+        return {"message": "没有找到符合条件的工作事项", "error": False, "data": [], "next_cursor": None}
+    return {"message": "查询成功", "error": False, "data": items, "next_cursor": next_cursor}
+
+
+def _etag_headers(etag: Optional[str]) -> dict:
+    """查询结果的校验响应头：只允许客户端私有缓存，每次使用前用 If-None-Match 重新验证"""
+    if etag is None:
+        return {}
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def _update_set_parts(request) -> Tuple[List[str], List[Any]]:
+    """
+    把请求中的 new_* 字段转换为 SET 子句和参数
+
+    单条更新和批量更新的请求模型使用相同的 new_* 字段名。
+    """
+    update_parts = []
+    update_params = []
+
+    if request.new_status:
+        update_parts.append("status = %s")
+        update_params.append(request.new_status.value)
+
+    if request.new_due_date:
+        update_parts.append("due_date = %s")
+        update_params.append(request.new_due_date)
+
+    if request.new_priority is not None:
+        update_parts.append("priority = %s")
+        update_params.append(request.new_priority)
+
+    if request.new_summary:
+        update_parts.append("summary = %s")
+        update_params.append(request.new_summary)
+
+    if request.new_content:
+        update_parts.append("content = %s")
+        update_params.append(request.new_content)
+
+    if update_parts:
+        # 添加更新时间
+        update_parts.append("updated_at = NOW()")
+
+    return update_parts, update_params
+
+
+def _stat_changes(request) -> dict:
+    """请求中会改变统计汇总的列及其新值"""
+    changes = {}
+    if request.new_status:
+        changes['status'] = request.new_status.value
+    if request.new_due_date:
+        changes['due_date'] = request.new_due_date
+    return changes
+
+
+def _bulk_update_work_items(
+    db_manager: DatabaseManager,
+    user_id: str,
+    count_sql: str,
+    chunk_sql: str,
+    filter_params: tuple,
+    set_clause: str,
+    set_params: List[Any],
+    stat_changes: dict,
+    max_rows: int,
+    chunk_size: int,
+    dry_run: bool
+) -> Tuple[int, int]:
+    """
+    按条件分块批量更新工作事项（同步，在数据库线程池中调用）
+
+    先统计符合条件的事项数和最大ID，超过 max_rows 时不做任何更新；
+    然后按主键升序每次锁定并更新 chunk_size 行，每块一个事务，
+    任何时刻最多只有一块的行被锁住。ID 上界固定为统计时的最大ID，
+    更新过程中新插入的事项不受影响。统计汇总表随每块在同一事务中更新。
+
+    Returns:
+        (符合条件的事项数, 更新的事项数)
+    """
+    with db_manager.get_db_cursor() as cursor:
+        cursor.execute(count_sql, filter_params)
+        row = cursor.fetchone()
+    matched, max_id = row['matched'], row['max_id']
+    if dry_run or matched == 0 or matched > max_rows:
+        return matched, 0
+
+    updated = 0
+    last_id = 0
+    while True:
+        with db_manager.get_db_cursor() as cursor:
+            db_manager.backend.begin_write(cursor)
+            cursor.execute(chunk_sql, (*filter_params, last_id, max_id, chunk_size))
+            rows = cursor.fetchall()
+            ids = [row['id'] for row in rows]
+            if ids:
+                placeholders = ", ".join(["%s"] * len(ids))
+                cursor.execute(
+                    f"UPDATE work_items SET {set_clause} WHERE id IN ({placeholders}) AND user_id = %s",
+                    (*set_params, *ids, user_id)
+                )
+                _apply_stat_changes(cursor, db_manager, user_id, rows, stat_changes)
+                # 行已被锁定，值未变化时 MySQL 的 rowcount 不计入，这里按锁定的行数统计
+                updated += len(ids)
+        if len(ids) < chunk_size:
+            return matched, updated
+        last_id = ids[-1]
+
+
+_INSERT_WORK_ITEM_SQL = """
+INSERT INTO work_items (
+    user_id, type, content, summary, project_name,
+    due_date, start_date, status, priority, tags
+)
+VALUES """
+_INSERT_WORK_ITEM_ROW = "(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+
+
+def _work_item_row(user_id: str, request: SmartRecordWorkItemRequest) -> tuple:
+    """把记录请求转换成 INSERT 参数"""
+    return (
+        user_id,
+        request.item_type.value,
+        request.user_input,
+        request.summary,
+        request.project_name,
+        request.due_date,
+        request.start_date,
+        request.status.value if request.status else None,
+        request.priority,
+        json.dumps(request.tags) if request.tags else None
+    )
+
+
+def _insert_work_item(db_manager: DatabaseManager, user_id: str, request: SmartRecordWorkItemRequest) -> int:
+    """插入一条工作事项并返回新ID（同步，在数据库线程池中调用）"""
+    return _insert_work_items(db_manager, user_id, [request])[0]
+
+
+def _insert_work_items(
+    db_manager: DatabaseManager,
+    user_id: str,
+    requests: List[SmartRecordWorkItemRequest]
+) -> List[int]:
+    """
+    在同一个事务中用多行 INSERT 批量插入工作事项（同步，在数据库线程池中调用）
+
+    Returns:
+        按请求顺序排列的新ID列表
+    """
+    chunk_size = max(1, getattr(settings, 'batch_insert_chunk_size', 100))
+    item_ids: List[int] = []
+    new_rows = [
+        {
+            'type': item.item_type.value,
+            'project_name': item.project_name,
+            'status': item.status.value if item.status else None,
+            'due_date': item.due_date,
+        }
+        for item in requests
+    ]
+
+    with db_manager.get_db_cursor() as cursor:
+        for offset in range(0, len(requests), chunk_size):
+            chunk = requests[offset:offset + chunk_size]
+            sql = _INSERT_WORK_ITEM_SQL + ", ".join([_INSERT_WORK_ITEM_ROW] * len(chunk))
+            params = []
+            for item in chunk:
+                params.extend(_work_item_row(user_id, item))
+            cursor.execute(sql, params)
+
+            # 同一条多行 INSERT 插入的ID是连续的，由存储后端换算出第一行ID
+            first_id = db_manager.backend.first_insert_id(cursor, len(chunk))
+            item_ids.extend(range(first_id, first_id + len(chunk)))
+
+        # 统计汇总表与事项在同一事务中提交
+        apply_deltas(cursor, db_manager.backend, user_id, row_deltas([], new_rows))
+
+    return item_ids
+
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -62,51 +430,131 @@ async def root():
         "message": "Work Manager Backend API",
         "version": "1.0.0",
         "docs": "/docs",
-        "health": "/health"
+        "health": "/health",
+        "liveness": "/health/live",
+        "readiness": "/health/ready"
     }
 
 
+@app.get("/health/live", response_model=HealthResponse)
+async def health_live():
+    """存活探针：只说明进程在响应，不访问数据库"""
+    return HealthResponse(
+        status="alive",
+        message="服务进程运行正常",
+        timestamp=datetime.now()
+    )
+
+
+def _not_ready_reason(health: HealthMonitor) -> str:
+    if health.last_check_at is None:
+        return "尚未完成数据库探测"
+    if health.last_error:
+        return f"数据库连接失败: {health.last_error}"
+    if health.saturated:
+        return f"连接池已满，超过 {health.stale_after:g} 秒没有取到连接完成数据库探测"
+    return f"超过 {health.stale_after:g} 秒没有成功的数据库探测"
+
+
+def _ready_message(status: dict) -> str:
+    if status['saturated']:
+        return "数据库连接正常，连接池已满"
+    return "数据库连接正常"
+
+
+@app.get("/health/ready", response_model=ReadinessResponse)
+async def health_ready(response: Response, health: HealthMonitor = Depends(get_health_monitor)):
+    """就绪探针：返回后台探测的最近结果和连接池使用情况，不访问数据库"""
+    status = health.status()
+    if not status['ready']:
+        response.status_code = 503
+    return ReadinessResponse(
+        status="ready" if status['ready'] else "not_ready",
+        message=_ready_message(status) if status['ready'] else _not_ready_reason(health),
+        timestamp=datetime.now(),
+        **status
+    )
+
+
 @app.get("/health", response_model=HealthResponse)
-async def health_check(db_manager: DatabaseManager = Depends(get_db_manager)):
-    """健康检查接口"""
-    try:
-        # 测试数据库连接
-        is_db_healthy = db_manager.test_connection()
-        
-        if is_db_healthy:
-            return HealthResponse(
-                status="healthy",
-                message="服务运行正常，数据库连接成功",
-                timestamp=datetime.now()
-            )
-        else:
-            raise HTTPException(
-                status_code=503,
-                detail="数据库连接失败"
-            )
-    except Exception as e:
-        logger.error(f"健康检查失败: {e}")
+async def health_check(health: HealthMonitor = Depends(get_health_monitor)):
+    """健康检查接口（与就绪探针使用同一个后台探测结果，不访问数据库）"""
+    if not health.is_ready():
         raise HTTPException(
             status_code=503,
-            detail=f"健康检查失败: {str(e)}"
+            detail=_not_ready_reason(health)
         )
+    return HealthResponse(
+        status="healthy",
+        message="服务运行正常，数据库连接成功",
+        timestamp=datetime.now()
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus 指标"""
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+def require_admin_token(request: Request):
+    """管理接口鉴权：要求请求头 X-Admin-Token 与 admin_token 一致；未配置 admin_token 时拒绝所有请求"""
+    admin_token = getattr(settings, 'admin_token', None)
+    if not admin_token:
+        raise HTTPException(status_code=403, detail="未配置 ADMIN_TOKEN，管理接口已禁用")
+    if not hmac.compare_digest(request.headers.get('x-admin-token', ''), admin_token):
+        raise HTTPException(status_code=403, detail="管理接口令牌无效")
+
+
+@app.get("/pool_stats", response_model=dict, dependencies=[Depends(require_admin_token)])
+async def pool_stats(db_manager: DatabaseManager = Depends(get_db_manager)):
+    """数据库连接池统计信息"""
+    return db_manager.get_pool_stats()
+
+
+@app.get("/admin/slow_queries", response_model=dict, dependencies=[Depends(require_admin_token)])
+async def slow_queries(
+    limit: int = Query(50, ge=1, le=1000),
+    db_manager: DatabaseManager = Depends(get_db_manager)
+):
+    """最近的慢查询记录（按时间倒序）"""
+    return {
+        "stats": db_manager.slow_queries.stats(),
+        "entries": db_manager.slow_queries.entries(limit)
+    }
+
+
+@app.delete("/admin/slow_queries", response_model=dict, dependencies=[Depends(require_admin_token)])
+async def clear_slow_queries(db_manager: DatabaseManager = Depends(get_db_manager)):
+    """清空慢查询记录"""
+    db_manager.slow_queries.clear()
+    return {"message": "慢查询记录已清空", "error": False}
+
+
+@app.get("/cache_stats", response_model=dict, dependencies=[Depends(require_admin_token)])
+async def cache_stats(query_cache: QueryResultCache = Depends(get_query_cache)):
+    """查询结果缓存、解析缓存的命中统计和 SQL 模板复用统计"""
+    return {
+        "query_cache": query_cache.stats(),
+        "parse_cache": get_parse_cache_stats(),
+        "sql_templates": get_template_stats()
+    }
 
 
 @app.post("/smart_record_work_item", response_model=ApiResponse)
 async def smart_record_work_item(
     request: SmartRecordWorkItemRequest,
     http_request: Request,
-    db_manager: DatabaseManager = Depends(get_db_manager)
+    db_manager: DatabaseManager = Depends(get_db_manager),
+    query_cache: QueryResultCache = Depends(get_query_cache)
 ):
     """智能记录工作事项"""
     try:
         # 获取用户ID
-        user_id = get_user_id_from_request(dict(http_request.headers))
+        user_id = current_user_id(http_request)
 
-        # 调试日志
-        logger.info(f"记录请求 - 用户ID: {user_id}")
-        logger.info(f"记录请求 - 请求头: {dict(http_request.headers)}")
-        logger.info(f"记录请求 - 请求内容: {request}")
+        # 调试日志（按请求采样）
+        log_payload(logger, "记录请求 - 请求内容: %r", request)
 
         # 验证优先级
         if not validate_priority(request.priority):
@@ -115,33 +563,12 @@ async def smart_record_work_item(
                 detail="优先级必须在1-5之间"
             )
         
-        # 插入数据库
-        with db_manager.get_db_cursor() as cursor:
-            sql = """
-            INSERT INTO work_items (
-                user_id, type, content, summary, project_name,
-                due_date, start_date, status, priority, tags
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
+        # 插入数据库（在数据库线程池中执行）
+        item_id = await db_manager.run(_insert_work_item, db_manager, user_id, request)
 
-            cursor.execute(sql, (
-                user_id,
-                request.item_type.value,
-                request.user_input,
-                request.summary,
-                request.project_name,
-                request.due_date,
-                request.start_date,
-                request.status.value if request.status else None,
-                request.priority,
-                json.dumps(request.tags) if request.tags else None
-            ))
-
-            # MySQL 使用 lastrowid 获取插入的ID
-            item_id = cursor.lastrowid
-        
-        logger.info(f"成功记录工作事项: {item_id}")
+        await query_cache.ainvalidate_user(user_id)
+
+        annotate(item_id=item_id)
         return ApiResponse(
             message=f"好的，我已经帮您记录了「{request.summary}」",
             error=False
@@ -157,124 +584,154 @@ async def smart_record_work_item(
         )
 
 
-@app.post("/query_work_items", response_model=ApiResponse)
-async def query_work_items(
-    request: QueryWorkItemsRequest,
+@app.post("/smart_record_work_items", response_model=BatchRecordResponse)
+async def smart_record_work_items(
+    request: List[SmartRecordWorkItemRequest],
     http_request: Request,
-    db_manager: DatabaseManager = Depends(get_db_manager)
+    db_manager: DatabaseManager = Depends(get_db_manager),
+    query_cache: QueryResultCache = Depends(get_query_cache)
 ):
-    """查询工作事项"""
+    """批量记录工作事项 - 所有事项在一个事务中写入"""
     try:
         # 获取用户ID
-        user_id = get_user_id_from_request(dict(http_request.headers))
-
-        # 调试日志
-        logger.info(f"查询请求 - 用户ID: {user_id}")
-        logger.info(f"查询请求 - 请求头: {dict(http_request.headers)}")
-        logger.info(f"查询请求 - 查询参数: {request}")
-
-        # 构建查询条件
-        query_parts = ["user_id = %s"]
-        query_params = [user_id]
-
-        # 添加各种查询条件
-        if request.item_id:
-            query_parts.append("id = %s")
-            query_params.append(request.item_id)
-
-        if request.project_name:
-            query_parts.append("project_name LIKE %s")
-            query_params.append(f"%{request.project_name}%")
-
-        if request.item_type:
-            query_parts.append("type = %s")
-            query_params.append(request.item_type.value)
-
-        if request.status:
-            query_parts.append("status = %s")
-            query_params.append(request.status.value)
-
-        if request.keyword:
-            query_parts.append("(summary LIKE %s OR content LIKE %s)")
-            query_params.extend([f"%{request.keyword}%", f"%{request.keyword}%"])
-
-        # 处理时间范围
-        if request.time_range:
-            start_date, end_date = get_date_range(request.time_range.value)
-
-            # 对于"最近"查询，使用混合时间逻辑：创建时间 + 截止日期 + 开始日期
-            if request.time_range.value == 'recent':
-                if start_date and end_date:
-                    # 最近：查找在时间范围内创建的，或者截止日期/开始日期在范围内的
-                    query_parts.append("""(
-                        DATE(created_at) BETWEEN %s AND %s OR
-                        due_date BETWEEN %s AND %s OR
-                        start_date BETWEEN %s AND %s
-                    )""")
-                    query_params.extend([start_date, end_date, start_date, end_date, start_date, end_date])
-            # 对于"过去"类查询，主要使用创建时间
-            elif request.time_range.value in ['past_week', 'past_month']:
-                if start_date and end_date:
-                    query_parts.append("DATE(created_at) BETWEEN %s AND %s")
-                    query_params.extend([start_date, end_date])
-                elif start_date:
-                    query_parts.append("DATE(created_at) = %s")
-                    query_params.append(start_date)
-            else:
-                # 对于其他时间范围，使用截止日期和开始日期
-                if start_date and end_date:
-                    query_parts.append("(due_date BETWEEN %s AND %s OR start_date BETWEEN %s AND %s)")
-                    query_params.extend([start_date, end_date, start_date, end_date])
-                elif start_date:
-                    query_parts.append("(due_date = %s OR start_date = %s)")
-                    query_params.extend([start_date, start_date])
-
-        # 执行查询
-        with db_manager.get_db_cursor() as cursor:
-            query_str = """
-            SELECT id, type, summary, project_name, due_date, status, priority, created_at, updated_at
-            FROM work_items
-            """
-            if query_parts:
-                query_str += " WHERE " + " AND ".join(query_parts)
-            query_str += " ORDER BY due_date ASC, created_at DESC LIMIT 20"
-
-            # 调试SQL查询
-            logger.info(f"执行SQL: {query_str}")
-            logger.info(f"查询参数: {tuple(query_params)}")
-
-            cursor.execute(query_str, tuple(query_params))
-            rows = cursor.fetchall()
+        user_id = current_user_id(http_request)
 
-        # 格式化结果
-        result_list = []
-        for row in rows:
-            result_list.append(WorkItemResponse(
-                id=str(row['id']),
-                type=row['type'],
-                summary=row['summary'],
-                project_name=row['project_name'],
-                due_date=str(row['due_date']) if row['due_date'] else None,
-                status=row['status'],
-                priority=row['priority'],
-                created_at=str(row['created_at']) if row['created_at'] else None,
-                updated_at=str(row['updated_at']) if row['updated_at'] else None
-            ))
-
-        if not result_list:
-            return ApiResponse(
-                message="没有找到符合条件的工作事项",
-                data=[],
-                error=False
+        annotate(items=len(request))
+
+        if not request:
+            raise HTTPException(
+                status_code=400,
+                detail="请至少提供一个工作事项"
             )
 
-        logger.info(f"查询到 {len(result_list)} 个工作事项")
-        return ApiResponse(
-            message="查询成功",
-            data=result_list,
-            error=False
+        max_items = getattr(settings, 'batch_record_max_items', 100)
+        if len(request) > max_items:
+            raise HTTPException(
+                status_code=400,
+                detail=f"单次最多记录 {max_items} 个工作事项"
+            )
+
+        # 写入前先校验全部事项，任何一项不合法则整批不写入
+        for index, item in enumerate(request, 1):
+            if not validate_priority(item.priority):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"第 {index} 个事项的优先级必须在1-5之间"
+                )
+
+        item_ids = await db_manager.run(_insert_work_items, db_manager, user_id, request)
+
+        await query_cache.ainvalidate_user(user_id)
+
+        log_payload(logger, "成功批量记录工作事项: %s", item_ids)
+        summaries = "」、「".join(item.summary for item in request)
+        return BatchRecordResponse(
+            message=f"好的，我已经帮您记录了 {len(item_ids)} 个事项：「{summaries}」",
+            error=False,
+            item_ids=[str(item_id) for item_id in item_ids]
         )
 
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"批量记录工作事项失败: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"批量记录工作事项失败: {str(e)}"
+        )
+
+
+@app.post("/query_work_items", response_model=ListQueryResponse)
+async def query_work_items(
+    request: QueryWorkItemsRequest,
+    http_request: Request,
+    response: Response,
+    db_manager: DatabaseManager = Depends(get_db_manager),
+    query_cache: QueryResultCache = Depends(get_query_cache)
+):
+    """
+    查询工作事项
+
+    默认返回 ApiResponse（列表字段）；指定 fields 时返回 SparseApiResponse，
+    每个事项只包含 id 和所选字段。
+    """
+    try:
+        # 获取用户ID
+        user_id = current_user_id(http_request)
+
+        # 调试日志（按请求采样）
+        log_payload(logger, "查询请求 - 查询参数: %r", request)
+
+        # 开启快速 JSON 响应时直接编码字典，跳过 pydantic 模型构造和 FastAPI 的响应模型校验；
+        # 指定了 fields 时按 SparseApiResponse 的形状直接编码（未选择的字段不输出，不能用 null 占位）
+        fields = select_fields(request)
+        fast_json = bool(fields) or getattr(settings, 'fast_json_response', False)
+
+        # ETag 由数据库中的用户数据版本生成：客户端带 If-None-Match 时先读版本（一次索引聚合），
+        # 仍然有效就直接返回 304，不读取缓存、不执行查询
+        etag = None
+        probed = False
+        if http_request.headers.get("if-none-match"):
+            with timed("db"):
+                etag = make_etag(user_id, request, await db_manager.run(_read_data_version, db_manager, user_id))
+            probed = True
+            if etag_matches(etag, http_request.headers.get("if-none-match")):
+                annotate(cache="not_modified")
+                return Response(status_code=304, headers=_etag_headers(etag))
+
+        # 再查结果缓存；缓存条目带着生成时的 ETag，已读到更新的版本时不使用旧条目
+        with timed("cache"):
+            cache_key, cached = await query_cache.alookup(user_id, request)
+        if cached is not None and 'content' in cached and (not probed or cached['etag'] == etag):
+            content = cached['content']
+            etag = cached['etag']
+            annotate(cache="hit", rows=len(content.get('data') or []))
+            response.headers.update(_etag_headers(etag))
+            if fast_json:
+                return FastJSONResponse(content, headers=_etag_headers(etag))
+            return ApiResponse(**content)
+
+        # 构建查询
+        try:
+            query_str, query_params = build_list_query(request, user_id, db_manager.backend)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        # SQL 模板是预先拼好的，只在调试级别采样输出
+        log_payload(logger, "执行SQL: %s 参数: %s", query_str, query_params)
+
+        # 版本在结果之前读取：两者之间的写入只会让 ETag 偏旧，不会把新结果标成旧版本
+        with timed("db"):
+            version, rows = await db_manager.run(
+                _fetch_versioned, db_manager, user_id, query_str, query_params, not probed
+            )
+        if not probed:
+            etag = make_etag(user_id, request, version)
+
+        # 多取的一行表示还有下一页；按相关度排序时只返回第一页
+        next_cursor = None
+        page_size = get_page_size(request)
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            if not uses_relevance_order(request, db_manager.backend):
+                next_cursor = encode_cursor(rows[-1])
+
+        # 格式化结果
+        if fields:
+            items = [_selected_fields(row, fields) for row in rows]
+        else:
+            items = [_work_item_fields(row) for row in rows]
+        content = _list_response_content(items, next_cursor)
+
+        annotate(cache="miss" if cache_key else "off", rows=len(rows))
+        if etag is not None:
+            # 版本还不稳定（最近一秒内有修改）时不缓存，避免结果和 ETag 对不上
+            await query_cache.astore(cache_key, {'etag': etag, 'content': content})
+        response.headers.update(_etag_headers(etag))
+        if fast_json:
+            return FastJSONResponse(content, headers=_etag_headers(etag))
+        return ApiResponse(**content)
+
     except HTTPException:
         raise
     except Exception as e:
@@ -285,11 +742,13 @@ async def query_work_items(
         )
 
 
-@app.post("/smart_query_work_items", response_model=ApiResponse)
+@app.post("/smart_query_work_items", response_model=ListQueryResponse)
 async def smart_query_work_items(
     request: dict,
     http_request: Request,
-    db_manager: DatabaseManager = Depends(get_db_manager)
+    response: Response,
+    db_manager: DatabaseManager = Depends(get_db_manager),
+    query_cache: QueryResultCache = Depends(get_query_cache)
 ):
     """智能查询工作事项 - 支持自然语言输入"""
     try:
@@ -301,21 +760,23 @@ async def smart_query_work_items(
                 detail="请提供查询内容"
             )
 
-        # 获取用户ID
-        user_id = get_user_id_from_request(dict(http_request.headers))
-
-        # 调试日志
-        logger.info(f"智能查询 - 用户ID: {user_id}")
-        logger.info(f"智能查询 - 用户输入: {user_input}")
-
         # 解析用户输入
-        parsed_query = parse_user_query(user_input)
-        logger.info(f"智能查询 - 解析结果: {parsed_query}")
+        with timed("parse"):
+            parsed_query = parse_user_query(user_input)
+        log_payload(logger, "智能查询 - 用户输入: %s 解析结果: %s", user_input, parsed_query)
 
         # 构建查询请求
         from models import QueryWorkItemsRequest, TimeRange, ItemType, ItemStatus
 
-        query_request = QueryWorkItemsRequest()
+        # 翻页参数和返回字段原样透传
+        try:
+            query_request = QueryWorkItemsRequest(
+                cursor=request.get('cursor'),
+                page_size=request.get('page_size'),
+                fields=request.get('fields')
+            )
+        except ValidationError as e:
+            raise HTTPException(status_code=400, detail=f"分页或字段参数无效: {e}")
 
         # 设置时间范围
         if parsed_query['time_range']:
@@ -348,7 +809,7 @@ async def smart_query_work_items(
             query_request.keyword = user_input
 
         # 调用标准查询接口
-        return await query_work_items(query_request, http_request, db_manager)
+        return await query_work_items(query_request, http_request, response, db_manager, query_cache)
 
     except HTTPException:
         raise
@@ -364,38 +825,13 @@ async def smart_query_work_items(
 async def update_work_item(
     request: UpdateWorkItemRequest,
     http_request: Request,
-    db_manager: DatabaseManager = Depends(get_db_manager)
+    db_manager: DatabaseManager = Depends(get_db_manager),
+    query_cache: QueryResultCache = Depends(get_query_cache)
 ):
     """更新工作事项"""
     try:
         # 获取用户ID
-        user_id = get_user_id_from_request(dict(http_request.headers))
-        target_item_id = request.item_id
-
-        # 如果没有提供item_id，尝试通过关键词或时间上下文查找
-        if not target_item_id:
-            # 构建查询请求
-            query_request = QueryWorkItemsRequest(
-                keyword=request.keyword,
-                time_range=request.time_context
-            )
-
-            # 执行查询
-            query_result = await query_work_items(query_request, http_request, db_manager)
-
-            if query_result.data and len(query_result.data) == 1:
-                target_item_id = query_result.data[0].id
-            elif query_result.data and len(query_result.data) > 1:
-                item_summaries = ", ".join([item.summary for item in query_result.data])
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"找到了多个符合条件的工作事项，请提供更具体的描述或ID：{item_summaries}"
-                )
-            else:
-                raise HTTPException(
-                    status_code=404,
-                    detail="未能找到符合条件的工作事项进行更新"
-                )
+        user_id = current_user_id(http_request)
 
         # 验证新优先级
         if not validate_priority(request.new_priority):
@@ -405,28 +841,7 @@ async def update_work_item(
             )
 
         # 构建更新语句
-        update_parts = []
-        update_params = []
-
-        if request.new_status:
-            update_parts.append("status = %s")
-            update_params.append(request.new_status.value)
-
-        if request.new_due_date:
-            update_parts.append("due_date = %s")
-            update_params.append(request.new_due_date)
-
-        if request.new_priority is not None:
-            update_parts.append("priority = %s")
-            update_params.append(request.new_priority)
-
-        if request.new_summary:
-            update_parts.append("summary = %s")
-            update_params.append(request.new_summary)
-
-        if request.new_content:
-            update_parts.append("content = %s")
-            update_params.append(request.new_content)
+        update_parts, update_params = _update_set_parts(request)
 
         if not update_parts:
             return ApiResponse(
@@ -434,23 +849,42 @@ async def update_work_item(
                 error=False
             )
 
-        # 添加更新时间
-        update_parts.append("updated_at = NOW()")
-
-        # 执行更新
-        with db_manager.get_db_cursor() as cursor:
-            sql = f"UPDATE work_items SET {', '.join(update_parts)} WHERE id = %s AND user_id = %s"
-            update_params.extend([target_item_id, user_id])
+        # 如果没有提供item_id，通过关键词或时间上下文在同一事务中查找
+        target_query = None
+        if not request.item_id:
+            target_query = build_update_target_query(
+                QueryWorkItemsRequest(keyword=request.keyword, time_range=request.time_context),
+                user_id,
+                db_manager.backend
+            )
 
-            cursor.execute(sql, tuple(update_params))
+        target_item_id, candidates, affected = await db_manager.run(
+            _update_work_item, db_manager, user_id, request.item_id,
+            target_query, ', '.join(update_parts), update_params, _stat_changes(request)
+        )
 
-            if cursor.rowcount == 0:
+        if target_item_id is None:
+            if candidates:
+                item_summaries = ", ".join(row['summary'] for row in candidates)
                 raise HTTPException(
-                    status_code=404,
-                    detail=f"未能找到ID为 {target_item_id} 的工作事项或无权更新"
+                    status_code=400,
+                    detail=f"找到了多个符合条件的工作事项，请提供更具体的描述或ID：{item_summaries} 等"
                 )
+            raise HTTPException(
+                status_code=404,
+                detail="未能找到符合条件的工作事项进行更新"
+            )
 
-        logger.info(f"成功更新工作事项: {target_item_id}")
+        # 通过查找锁定的事项一定存在；直接指定ID时 0 行表示不存在或不属于该用户
+        if affected == 0 and request.item_id:
+            raise HTTPException(
+                status_code=404,
+                detail=f"未能找到ID为 {target_item_id} 的工作事项或无权更新"
+            )
+
+        await query_cache.ainvalidate_user(user_id)
+
+        annotate(item_id=target_item_id)
         return ApiResponse(
             message=f"工作事项 {target_item_id} 已成功更新",
             error=False
@@ -466,6 +900,356 @@ async def update_work_item(
         )
 
 
+@app.post("/bulk_update_work_items", response_model=BulkUpdateResponse)
+async def bulk_update_work_items(
+    request: BulkUpdateWorkItemsRequest,
+    http_request: Request,
+    db_manager: DatabaseManager = Depends(get_db_manager),
+    query_cache: QueryResultCache = Depends(get_query_cache)
+):
+    """按条件批量更新工作事项 - 如「把本周的会议都标记为完成」"""
+    try:
+        # 获取用户ID
+        user_id = current_user_id(http_request)
+
+        log_payload(logger, "批量更新请求 - 请求内容: %r", request)
+
+        filter_request = QueryWorkItemsRequest(
+            time_range=request.time_range,
+            project_name=request.project_name,
+            item_type=request.item_type,
+            status=request.status,
+            keyword=request.keyword
+        )
+        # 不允许没有任何筛选条件的批量更新，避免误改用户的全部事项
+        if not any([filter_request.time_range, filter_request.project_name, filter_request.item_type,
+                    filter_request.status, filter_request.keyword]):
+            raise HTTPException(
+                status_code=400,
+                detail="请至少提供一个筛选条件"
+            )
+
+        if not validate_priority(request.new_priority):
+            raise HTTPException(
+                status_code=400,
+                detail="优先级必须在1-5之间"
+            )
+
+        update_parts, update_params = _update_set_parts(request)
+        if not update_parts:
+            return BulkUpdateResponse(
+                message="没有提供更新内容",
+                error=False,
+                dry_run=request.dry_run
+            )
+
+        max_rows = getattr(settings, 'bulk_update_max_rows', 500)
+        chunk_size = max(1, getattr(settings, 'bulk_update_chunk_size', 100))
+        count_sql, chunk_sql, filter_params = build_bulk_update_queries(
+            filter_request, user_id, db_manager.backend
+        )
+
+        with timed("db"):
+            matched, updated = await db_manager.run(
+                _bulk_update_work_items, db_manager, user_id, count_sql, chunk_sql, filter_params,
+                ', '.join(update_parts), update_params, _stat_changes(request),
+                max_rows, chunk_size, request.dry_run
+            )
+        annotate(matched=matched, updated=updated, dry_run=request.dry_run)
+
+        if matched == 0:
+            raise HTTPException(
+                status_code=404,
+                detail="未能找到符合条件的工作事项进行更新"
+            )
+
+        if request.dry_run:
+            message = f"共有 {matched} 个工作事项符合条件，尚未更新"
+            if matched > max_rows:
+                message += f"（超过单次批量更新上限 {max_rows} 个，请缩小范围）"
+            return BulkUpdateResponse(message=message, error=False, matched=matched, dry_run=True)
+
+        if matched > max_rows:
+            raise HTTPException(
+                status_code=400,
+                detail=f"共有 {matched} 个工作事项符合条件，超过单次批量更新上限 {max_rows} 个，请缩小范围"
+            )
+
+        await query_cache.ainvalidate_user(user_id)
+
+        return BulkUpdateResponse(
+            message=f"已成功更新 {updated} 个工作事项",
+            error=False,
+            matched=matched,
+            updated=updated
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"批量更新工作事项失败: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"批量更新工作事项失败: {str(e)}"
+        )
+
+
+@app.post("/export_work_items")
+async def export_work_items(
+    request: ExportWorkItemsRequest,
+    http_request: Request,
+    db_manager: DatabaseManager = Depends(get_db_manager)
+):
+    """
+    流式导出工作事项 - NDJSON 或 CSV，可选 gzip
+
+    使用流式游标按主键顺序逐批读取，每批编码后立即发送，内存占用与导出行数无关。
+    """
+    # 获取用户ID
+    user_id = current_user_id(http_request)
+
+    filter_request = QueryWorkItemsRequest(
+        time_range=request.time_range,
+        project_name=request.project_name,
+        item_type=request.item_type,
+        status=request.status,
+        keyword=request.keyword
+    )
+    sql, params = build_export_query(filter_request, user_id, db_manager.backend)
+    batch_size = max(1, getattr(settings, 'export_batch_size', 500))
+
+    if not export_limiter.try_acquire():
+        raise HTTPException(
+            status_code=429,
+            detail=f"同时进行的导出已达上限 {export_limiter.max_concurrent} 个，请稍后重试",
+            headers={"Retry-After": "5"}
+        )
+
+    batches = fetch_batches(db_manager, sql, params, batch_size)
+
+    # 先读第一批：查询出错时还能返回错误响应，而不是已经开始发送后中断
+    try:
+        first_batch = await db_manager.run(next, batches, None)
+    except Exception as e:
+        export_limiter.release()
+        logger.error(f"导出工作事项失败: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"导出工作事项失败: {str(e)}"
+        )
+
+    encoder = ENCODERS[request.format.value]()
+    gzip_stream = GzipStream() if request.gzip else None
+
+    def encode(data: bytes) -> bytes:
+        return gzip_stream.compress(data) if gzip_stream else data
+
+    async def body():
+        exported = 0
+        batch = first_batch
+        try:
+            data = encoder.header()
+            while batch is not None:
+                exported += len(batch)
+                yield encode(data + encoder.encode(batch))
+                data = b""
+                # 一批的读取很短，不让客户端断开打断它，否则下面关闭生成器时读取可能仍在进行
+                with anyio.CancelScope(shield=True):
+                    batch = await db_manager.run(next, batches, None)
+            tail = encode(data) if data else b""
+            if gzip_stream:
+                tail += gzip_stream.finish()
+            if tail:
+                yield tail
+        finally:
+            annotate(rows=exported)
+
+    async def close():
+        # 响应结束、客户端断开或发送超时后，在数据库线程池中关闭游标并归还连接
+        # （MySQL 会在关闭时读完并丢弃剩余的结果），然后释放导出名额
+        try:
+            await db_manager.run(batches.close)
+        finally:
+            export_limiter.release()
+
+    headers = {"Content-Disposition": f'attachment; filename="work_items.{request.format.value}"'}
+    if gzip_stream:
+        headers["Content-Encoding"] = "gzip"
+    return ExportStreamingResponse(
+        body(),
+        send_timeout=getattr(settings, 'export_send_timeout', 30.0),
+        on_close=close,
+        media_type=MEDIA_TYPES[request.format.value],
+        headers=headers
+    )
+
+
+def _insert_import_chunk(
+    db_manager: DatabaseManager,
+    user_id: str,
+    chunk: List[Tuple[int, SmartRecordWorkItemRequest]]
+) -> List[Tuple[int, str]]:
+    """
+    导入一块事项（同步，在数据库线程池中调用）
+
+    整块用一个事务写入；失败时逐条重试，定位出数据库拒绝的行，其余行照常写入。
+
+    Returns:
+        失败行的 (行号, 错误信息) 列表
+    """
+    try:
+        _insert_work_items(db_manager, user_id, [item for _, item in chunk])
+        return []
+    except Exception as e:
+        if len(chunk) == 1:
+            return [(chunk[0][0], f"写入失败: {e}")]
+    failures = []
+    for line_no, item in chunk:
+        try:
+            _insert_work_item(db_manager, user_id, item)
+        except Exception as e:
+            failures.append((line_no, f"写入失败: {e}"))
+    return failures
+
+
+@app.post("/import_work_items", response_model=ImportResponse)
+async def import_work_items(
+    http_request: Request,
+    format: Optional[FileFormat] = Query(None, description="请求体格式，默认按 Content-Type 判断（text/csv 为 CSV，其余为 NDJSON）"),
+    db_manager: DatabaseManager = Depends(get_db_manager),
+    query_cache: QueryResultCache = Depends(get_query_cache)
+):
+    """
+    流式批量导入工作事项 - 请求体为 NDJSON 或 CSV，每条记录与 smart_record_work_item 的请求一致
+
+    边接收边解析校验，每凑满一块就用多行 INSERT 在一个事务中写入。
+    校验或写入失败的行记录在 errors 中，不影响其他行。
+    """
+    # 获取用户ID
+    user_id = current_user_id(http_request)
+
+    if format is None:
+        content_type = http_request.headers.get('content-type', '')
+        format = FileFormat.CSV if content_type.startswith('text/csv') else FileFormat.NDJSON
+
+    chunk_size = max(1, getattr(settings, 'import_chunk_size', 500))
+    max_rows = getattr(settings, 'import_max_rows', 100000)
+    max_errors = getattr(settings, 'import_max_errors', 100)
+    reader = READERS[format.value](getattr(settings, 'import_max_record_chars', DEFAULT_MAX_RECORD_CHARS))
+    # 增量解码：多字节字符可能被网络数据块切开；utf-8-sig 去掉 Excel 导出的 BOM
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+
+    pending: List[Tuple[int, SmartRecordWorkItemRequest]] = []
+    errors: List[ImportRowError] = []
+    imported = 0
+    failed = 0
+    truncated = False
+    start = time.perf_counter()
+
+    def add_error(line_no: int, message: str):
+        nonlocal failed
+        failed += 1
+        if len(errors) < max_errors:
+            errors.append(ImportRowError(line=line_no, error=message))
+
+    async def flush():
+        nonlocal imported
+        if not pending:
+            return
+        failures = await db_manager.run(_insert_import_chunk, db_manager, user_id, list(pending))
+        for line_no, message in failures:
+            add_error(line_no, message)
+        imported += len(pending) - len(failures)
+        pending.clear()
+        await query_cache.ainvalidate_user(user_id)
+
+    async def consume(records) -> bool:
+        """处理解析出的记录，达到行数上限时返回 False"""
+        nonlocal truncated
+        for line_no, parsed in records:
+            if imported + failed + len(pending) >= max_rows:
+                truncated = True
+                return False
+            if isinstance(parsed, str):
+                add_error(line_no, parsed)
+                continue
+            pending.append((line_no, parsed))
+            if len(pending) >= chunk_size:
+                await flush()
+        return True
+
+    try:
+        with timed("import"):
+            async for data in http_request.stream():
+                if not await consume(reader.feed(decoder.decode(data))):
+                    break
+            else:
+                await consume(reader.feed(decoder.decode(b'', final=True)))
+                await consume(reader.finish())
+            await flush()
+    except Exception as e:
+        logger.error(f"导入工作事项失败: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"导入工作事项失败，已导入 {imported} 条: {str(e)}"
+        )
+
+    elapsed = time.perf_counter() - start
+    rows_per_second = round(imported / elapsed, 1) if elapsed > 0 else 0.0
+    annotate(imported=imported, failed=failed)
+
+    message = f"导入完成：成功 {imported} 条，失败 {failed} 条（{rows_per_second} 行/秒）"
+    if truncated:
+        message += f"；超过单次导入上限 {max_rows} 条，其余记录未处理"
+    return ImportResponse(
+        message=message,
+        error=failed > 0 or truncated,
+        imported=imported,
+        failed=failed,
+        errors=errors,
+        elapsed_ms=round(elapsed * 1000, 2),
+        rows_per_second=rows_per_second
+    )
+
+
+def _read_work_item_stats(db_manager: DatabaseManager, user_id: str) -> dict:
+    """读取统计汇总（同步，在数据库线程池中调用）"""
+    week_start, week_end = get_date_range('this_week')
+    with db_manager.get_db_cursor() as cursor:
+        return read_stats(cursor, user_id, datetime.now().date(), week_start, week_end)
+
+
+@app.get("/work_item_stats", response_model=WorkItemStatsResponse)
+async def work_item_stats(
+    http_request: Request,
+    db_manager: DatabaseManager = Depends(get_db_manager)
+):
+    """工作事项统计 - 按状态、类型、项目的数量，以及逾期和本周到期数"""
+    try:
+        # 获取用户ID
+        user_id = current_user_id(http_request)
+
+        with timed("db"):
+            stats = await db_manager.run(_read_work_item_stats, db_manager, user_id)
+
+        annotate(total=stats['total'])
+        return WorkItemStatsResponse(
+            message=f"共有 {stats['total']} 个工作事项，其中 {stats['overdue']} 个已逾期，"
+                    f"本周到期 {stats['due_this_week']} 个",
+            error=False,
+            **stats
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"查询工作事项统计失败: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"查询工作事项统计失败: {str(e)}"
+        )
+
+
 if __name__ == "__main__":
     import uvicorn
     from dotenv import load_dotenv
@@ -0,0 +1,298 @@
+"""
+轻量级指标模块，输出 Prometheus 文本格式（text/plain; version=0.0.4）
+
+不依赖 prometheus_client；直方图按固定桶计数，observe 只做一次二分查找和
+几次加法，开销在微秒以下，可以在满负载下常开。
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from fastapi.responses import JSONResponse
+
+# 延迟类直方图的默认桶（秒）
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 行数类直方图的默认桶
+ROW_BUCKETS = (0, 1, 5, 10, 20, 50, 100, 500, 1000, 5000)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(labelnames: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _CounterChild:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum', 'count', '_lock')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # 最后一个桶对应 +Inf
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._child(())
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _child(self, values: Tuple[str, ...]):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._new_child()
+                    self._children[values] = child
+        return child
+
+    def labels(self, *values):
+        """获取某组标签值对应的子指标（结果会被缓存）"""
+        return self._child(tuple(str(value) for value in values))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values, child) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+
+class Histogram(_Metric):
+    """固定桶直方图"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self):
+        """计时上下文管理器"""
+        return _Timer(self._default)
+
+    def _render_child(self, values, child):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds + (float('inf'),), child.counts):
+            cumulative += count
+            le = 'le="' + _format_value(bound if bound == float('inf') else float(bound)) + '"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ('_child', '_start')
+
+    def __init__(self, child: _HistogramChild):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._start)
+        return False
+
+
+class Registry:
+    """指标注册表；collector 用于在抓取时读取外部状态（如连接池）作为 gauge 输出"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Tuple[str, str, Callable[[], Dict[str, float]]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_gauge_collector(self, prefix: str, documentation: str, collect: Callable[[], Dict[str, float]]):
+        """注册 gauge 采集函数，返回的每个数值键输出为 prefix_<键>"""
+        self._collectors.append((prefix, documentation, collect))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for prefix, documentation, collect in self._collectors:
+            try:
+                values = collect()
+            except Exception:
+                continue
+            for key, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"{prefix}_{key}"
+                lines.append(f"# HELP {name} {documentation}: {key}")
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# 全局注册表和指标
+registry = Registry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "HTTP 请求处理耗时", ("method", "route"))
+HTTP_REQUESTS_TOTAL = registry.counter(
+    "http_requests_total", "HTTP 请求数", ("method", "route", "status"))
+HTTP_ERRORS_TOTAL = registry.counter(
+    "http_errors_total", "HTTP 错误响应数（状态码 >= 400）", ("status",))
+RESPONSE_SERIALIZE_SECONDS = registry.histogram(
+    "http_response_serialize_seconds", "响应 JSON 序列化耗时")
+DB_CHECKOUT_WAIT_SECONDS = registry.histogram(
+    "db_checkout_wait_seconds", "从连接池取得连接的等待时间")
+DB_EXECUTE_SECONDS = registry.histogram(
+    "db_execute_seconds", "单条 SQL 执行耗时")
+DB_CURSOR_ROWS = registry.histogram(
+    "db_cursor_rows", "每次 get_db_cursor 返回或影响的行数", buckets=ROW_BUCKETS)
+PARSER_SECONDS = registry.histogram(
+    "query_parser_seconds", "parse_user_query 解析耗时（含缓存命中）")
+
+
+class TimedJSONResponse(JSONResponse):
+    """记录 JSON 序列化耗时的响应类"""
+
+    def render(self, content) -> bytes:
+        start = time.perf_counter()
+        body = super().render(content)
+        RESPONSE_SERIALIZE_SECONDS.observe(time.perf_counter() - start)
+        return body
+
+
+class MetricsMiddleware:
+    """
+    纯 ASGI 中间件：按路由模板统计请求耗时和状态码
+
+    使用路由模板（如 /query_work_items）而不是原始路径作为标签，
+    未匹配任何路由的请求统一记为 "unmatched"，避免标签基数失控。
+    """
+
+    def __init__(self, app):
+        self.app = app
+        # (method, route, status) -> 对应的子指标，避免每个请求重复做标签查找
+        self._children: Dict[Tuple[str, str, int], tuple] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            key = (scope.get("method", ""), route_path, status_code)
+            children = self._children.get(key)
+            if children is None:
+                children = self._children[key] = self._resolve_children(*key)
+            latency, requests, errors = children
+            latency.observe(elapsed)
+            requests.inc()
+            if errors is not None:
+                errors.inc()
+
+    @staticmethod
+    def _resolve_children(method: str, route_path: str, status_code: int) -> tuple:
+        return (
+            HTTP_REQUEST_SECONDS.labels(method, route_path),
+            HTTP_REQUESTS_TOTAL.labels(method, route_path, status_code),
+            HTTP_ERRORS_TOTAL.labels(status_code) if status_code >= 400 else None,
+        )
+
+
+def render_metrics() -> str:
+    """输出所有指标的 Prometheus 文本格式"""
+    return registry.render()
@@ -0,0 +1,14 @@
+-- 迁移 001：关键词检索改用 ngram 全文索引
+-- 适用于已按旧版 init_db.sql 建表的数据库，新建库直接使用 init_db.sql 即可
+--
+-- 旧的两个 FULLTEXT 索引使用默认分词器，无法切分中文，查询也一直使用 LIKE '%kw%'，
+-- 这里替换为 summary + content 的 ngram 合并索引。
+-- ngram 分词长度由服务端参数 ngram_token_size 决定（默认 2），
+-- 若修改该参数，需同步配置 FULLTEXT_NGRAM_TOKEN_SIZE 并重建此索引。
+
+ALTER TABLE work_items DROP INDEX idx_work_items_summary_fulltext;
+ALTER TABLE work_items DROP INDEX idx_work_items_content_fulltext;
+
+-- 关闭停用词，避免 ngram 切分出的英文片段（如 "at"、"is"）被忽略
+SET SESSION innodb_ft_enable_stopword = OFF;
+CREATE FULLTEXT INDEX idx_work_items_summary_content_ngram ON work_items(summary, content) WITH PARSER ngram;
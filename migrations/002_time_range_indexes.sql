@@ -0,0 +1,9 @@
+-- 迁移 002：时间范围查询的复合索引
+-- 查询条件统一为 user_id = ? AND 日期列 >= ? AND 日期列 < ?，
+-- 单列日期索引无法同时利用 user_id 等值条件，这里补充 (user_id, 日期列) 复合索引。
+
+CREATE INDEX idx_work_items_user_due_date ON work_items(user_id, due_date);
+CREATE INDEX idx_work_items_user_start_date ON work_items(user_id, start_date);
+CREATE INDEX idx_work_items_user_created_at ON work_items(user_id, created_at);
+
+ANALYZE TABLE work_items;
@@ -0,0 +1,9 @@
+-- 迁移 003：列表排序索引
+-- 列表查询按 due_date ASC, created_at DESC, id DESC 排序并使用游标分页，
+-- 把 (user_id, due_date) 索引扩展为与排序一致的降序复合索引（需要 MySQL 8.0+），
+-- 使任意一页都只需沿索引顺序读取 page_size + 1 行。
+
+ALTER TABLE work_items DROP INDEX idx_work_items_user_due_date;
+CREATE INDEX idx_work_items_user_due_date ON work_items(user_id, due_date, created_at DESC, id DESC);
+
+ANALYZE TABLE work_items;
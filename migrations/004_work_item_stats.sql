@@ -0,0 +1,12 @@
+-- 迁移 004：按用户的统计汇总表
+-- /work_item_stats 从这张表读取按状态、类型、项目统计的事项数和逾期/本周到期数，
+-- 记录和更新接口在写入事项的同一个事务中增量维护。
+-- 建表后执行一次 python rebuild_stats.py，用已有数据填充。
+
+CREATE TABLE IF NOT EXISTS work_item_stats (
+    user_id VARCHAR(255) NOT NULL,
+    dimension VARCHAR(32) NOT NULL,
+    value VARCHAR(255) NOT NULL,
+    item_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, dimension, value)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,13 @@
+-- 迁移 005：列表查询的覆盖索引
+-- 列表查询新增 fields 参数，只查询请求的列。把按列表排序排列的 (user_id, due_date, created_at, id)
+-- 索引扩展为附带列表字段的索引：
+--   - status / type / project_name 条件在索引上判断（索引条件下推），只对返回的行回表；
+--   - 不含 summary 的 fields 查询（如 fields=["status", "due_date", "priority"]）只读索引。
+-- InnoDB 索引键最长 3072 字节，user_id 和 project_name 各占 1020 字节（utf8mb4），
+-- 放不下 summary VARCHAR(500) 的 2000 字节，因此默认列表字段仍需按主键回表读取 summary；
+-- SQLite 没有这个限制，init_sqlite.sql 中同名索引包含 summary，默认列表查询只读索引。
+
+ALTER TABLE work_items DROP INDEX idx_work_items_user_due_date;
+CREATE INDEX idx_work_items_user_list ON work_items(user_id, due_date, created_at DESC, id DESC, type, status, priority, project_name, updated_at);
+
+ANALYZE TABLE work_items;
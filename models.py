@@ -2,7 +2,7 @@
 数据模型定义
 """
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Annotated, Any, Dict, List, Optional, Union
 from datetime import date, datetime
 from enum import Enum
 
@@ -39,6 +39,28 @@ class TimeRange(str, Enum):
     ALL = "all"
 
 
+class WorkItemField(str, Enum):
+    """列表查询可以选择返回的字段（白名单，与数据库列一一对应）"""
+    ID = "id"
+    TYPE = "type"
+    SUMMARY = "summary"
+    CONTENT = "content"
+    PROJECT_NAME = "project_name"
+    DUE_DATE = "due_date"
+    START_DATE = "start_date"
+    STATUS = "status"
+    PRIORITY = "priority"
+    TAGS = "tags"
+    CREATED_AT = "created_at"
+    UPDATED_AT = "updated_at"
+
+
+class FileFormat(str, Enum):
+    """导入导出文件格式枚举"""
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
 class SmartRecordWorkItemRequest(BaseModel):
     """智能记录工作事项请求模型"""
     user_input: str = Field(..., description="用户输入的原始文本信息")
@@ -60,6 +82,13 @@ class QueryWorkItemsRequest(BaseModel):
     status: Optional[ItemStatus] = Field(None, description="工作事项状态")
     keyword: Optional[str] = Field(None, description="关键词搜索")
     item_id: Optional[str] = Field(None, description="特定事项ID")
+    order_by_relevance: bool = Field(False, description="有关键词时按全文检索相关度排序")
+    cursor: Optional[str] = Field(None, description="分页游标，取自上一页响应的 next_cursor")
+    page_size: Optional[int] = Field(None, ge=1, le=100, description="每页条数，默认20")
+    fields: Optional[List[WorkItemField]] = Field(
+        None, min_length=1,
+        description="只返回这些字段（id 总是返回）；默认返回列表字段，不含 content、start_date 和 tags"
+    )
 
 
 class UpdateWorkItemRequest(BaseModel):
@@ -75,6 +104,33 @@ class UpdateWorkItemRequest(BaseModel):
     new_content: Optional[str] = Field(None, description="新详细内容")
 
 
+class BulkUpdateWorkItemsRequest(BaseModel):
+    """按条件批量更新工作事项请求模型（筛选条件同查询接口，更新字段同单条更新接口）"""
+    user_input: str = Field(..., description="用户原始指令")
+    time_range: Optional[TimeRange] = Field(None, description="查询的时间范围")
+    project_name: Optional[str] = Field(None, description="项目名称")
+    item_type: Optional[ItemType] = Field(None, description="工作事项类型")
+    status: Optional[ItemStatus] = Field(None, description="工作事项状态")
+    keyword: Optional[str] = Field(None, description="关键词搜索")
+    new_status: Optional[ItemStatus] = Field(None, description="新状态")
+    new_due_date: Optional[date] = Field(None, description="新截止日期")
+    new_priority: Optional[int] = Field(None, ge=1, le=5, description="新优先级")
+    new_summary: Optional[str] = Field(None, description="新摘要")
+    new_content: Optional[str] = Field(None, description="新详细内容")
+    dry_run: bool = Field(False, description="只返回符合条件的事项数，不执行更新")
+
+
+class ExportWorkItemsRequest(BaseModel):
+    """导出工作事项请求模型（筛选条件同查询接口，不分页）"""
+    time_range: Optional[TimeRange] = Field(None, description="查询的时间范围")
+    project_name: Optional[str] = Field(None, description="项目名称")
+    item_type: Optional[ItemType] = Field(None, description="工作事项类型")
+    status: Optional[ItemStatus] = Field(None, description="工作事项状态")
+    keyword: Optional[str] = Field(None, description="关键词搜索")
+    format: FileFormat = Field(FileFormat.NDJSON, description="导出格式：ndjson 或 csv")
+    gzip: bool = Field(False, description="是否以 gzip 压缩传输（Content-Encoding: gzip）")
+
+
 class WorkItemResponse(BaseModel):
     """工作事项响应模型"""
     id: str
@@ -93,6 +149,73 @@ class ApiResponse(BaseModel):
     message: str
     error: bool = False
     data: Optional[List[WorkItemResponse]] = None
+    next_cursor: Optional[str] = None
+
+
+class SparseWorkItemResponse(BaseModel):
+    """指定 fields 时返回的事项：只包含 id 和所选字段，未选择的字段不出现在响应中"""
+    id: str
+    type: Optional[str] = None
+    summary: Optional[str] = None
+    content: Optional[str] = None
+    project_name: Optional[str] = None
+    due_date: Optional[str] = None
+    start_date: Optional[str] = None
+    status: Optional[str] = None
+    priority: Optional[int] = None
+    tags: Optional[List[str]] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+
+
+class SparseApiResponse(BaseModel):
+    """指定 fields 的列表查询响应模型"""
+    message: str
+    error: bool = False
+    data: Optional[List[SparseWorkItemResponse]] = None
+    next_cursor: Optional[str] = None
+
+
+# 列表查询的响应：默认为完整的列表字段，指定 fields 时为部分字段；
+# 按从左到右的顺序校验，默认路径只按 ApiResponse 校验一次
+ListQueryResponse = Annotated[Union[ApiResponse, SparseApiResponse], Field(union_mode='left_to_right')]
+
+
+class BatchRecordResponse(ApiResponse):
+    """批量记录工作事项响应模型"""
+    item_ids: List[str] = Field(default_factory=list, description="新建事项ID，顺序与请求一致")
+
+
+class BulkUpdateResponse(ApiResponse):
+    """批量更新工作事项响应模型"""
+    matched: int = Field(0, description="符合条件的事项数")
+    updated: int = Field(0, description="实际更新的事项数，预览模式下为 0")
+    dry_run: bool = Field(False, description="是否为预览模式")
+
+
+class ImportRowError(BaseModel):
+    """导入失败的一行"""
+    line: int = Field(..., description="行号（CSV 跨行记录为起始行号，表头为第 1 行）")
+    error: str = Field(..., description="失败原因")
+
+
+class ImportResponse(ApiResponse):
+    """导入工作事项响应模型"""
+    imported: int = Field(0, description="成功导入的事项数")
+    failed: int = Field(0, description="失败的记录数")
+    errors: List[ImportRowError] = Field(default_factory=list, description="失败记录明细（最多返回配置的条数）")
+    elapsed_ms: float = Field(0, description="导入耗时（毫秒）")
+    rows_per_second: float = Field(0, description="导入吞吐量（行/秒）")
+
+
+class WorkItemStatsResponse(ApiResponse):
+    """工作事项统计响应模型"""
+    total: int = Field(0, description="事项总数")
+    by_status: Dict[str, int] = Field(default_factory=dict, description="按状态统计")
+    by_type: Dict[str, int] = Field(default_factory=dict, description="按类型统计")
+    by_project: Dict[str, int] = Field(default_factory=dict, description="按项目统计")
+    overdue: int = Field(0, description="已逾期（截止日期早于今天且未结束）的事项数")
+    due_this_week: int = Field(0, description="本周到期且未结束的事项数")
 
 
 class HealthResponse(BaseModel):
@@ -100,3 +223,15 @@ class HealthResponse(BaseModel):
     status: str
     message: str
     timestamp: datetime
+
+
+class ReadinessResponse(HealthResponse):
+    """就绪探针响应模型（数据库状态由后台探测定期刷新）"""
+    ready: bool
+    saturated: bool = False
+    last_check_at: Optional[datetime] = None
+    last_success_at: Optional[datetime] = None
+    last_success_age_seconds: Optional[float] = None
+    last_error: Optional[str] = None
+    probe_latency_ms: Optional[float] = None
+    pool: Dict[str, Any]
@@ -0,0 +1,468 @@
+"""
+工作事项查询 SQL 构建模块
+
+查询条件的组合是有限的（item_id、项目、类型、状态、关键词、时间范围、分页游标），
+每个条件对应一个位标志。同一组合的 SQL 模板只在第一次用到时拼接一次并缓存，
+之后的请求只需按相同顺序收集参数。
+
+PyMySQL 只支持客户端参数插值，不支持服务端预处理语句；模板文本固定后，
+同一组合发到服务端的语句形态一致，也便于在 performance_schema 中按语句摘要统计。
+
+全文检索条件和相关度排序由存储后端的方言钩子提供（MySQL ngram / SQLite FTS5）。
+各 build_* 函数接受执行查询的 DatabaseManager 所用的后端（默认为全局配置的后端），
+模板缓存按 (后端, 位掩码) 区分，同一进程中使用不同后端的管理器不会拿到对方方言的 SQL。
+"""
+import base64
+import json
+import re
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import settings
+from models import QueryWorkItemsRequest, WorkItemField
+from storage import StorageBackend, get_storage_backend
+from utils import get_date_range
+
+# 全文检索表达式中有特殊含义的字符（MySQL BOOLEAN MODE / FTS5 查询语法）
+_BOOLEAN_OPERATORS = re.compile(r'[+\-<>()~*"@]+')
+
+# 默认的列表字段；init_db.sql / init_sqlite.sql 中的 idx_work_items_user_list 按列表排序覆盖这些列
+LIST_COLUMNS = "id, type, summary, project_name, due_date, status, priority, created_at, updated_at"
+
+# 请求可以指定的返回字段（fields 白名单），顺序即 SELECT 中的列顺序
+SELECTABLE_FIELDS = [field.value for field in WorkItemField]
+
+# 游标分页需要的列：指定了 fields 时也总是查询，但只返回请求的字段
+_CURSOR_COLUMNS = ('id', 'due_date', 'created_at')
+
+# 导出的列：包含列表查询不返回的 content、start_date 和 tags
+EXPORT_COLUMNS = ("id, type, summary, content, project_name, due_date, start_date, "
+                  "status, priority, tags, created_at, updated_at")
+
+# 更新前读取的列：ID 加上统计汇总表依赖的列（旧值用于计算统计变化量）
+UPDATE_TARGET_COLUMNS = "id, type, project_name, status, due_date"
+
+# 列表排序；id 作为最后一列保证顺序唯一，游标分页依赖这个顺序
+LIST_ORDER_BY = "due_date ASC, created_at DESC, id DESC"
+
+# 过滤条件位标志
+FILTER_ITEM_ID = 1 << 0
+FILTER_PROJECT = 1 << 1
+FILTER_TYPE = 1 << 2
+FILTER_STATUS = 1 << 3
+FILTER_KEYWORD_FULLTEXT = 1 << 4
+FILTER_KEYWORD_LIKE = 1 << 5
+FILTER_TIME_CREATED = 1 << 6
+FILTER_TIME_SCHEDULED = 1 << 7
+FILTER_TIME_RECENT = 1 << 8
+FILTER_CURSOR = 1 << 9
+FILTER_CURSOR_NULL_DUE = 1 << 10
+ORDER_RELEVANCE = 1 << 11
+# 指定返回字段时，每个字段在以上标志之上占一位（SELECTABLE_FIELDS 中的第 i 个字段为 1 << (12 + i)）
+_FIELDS_SHIFT = 12
+
+# 时间范围条件涉及的列
+_SCHEDULED_COLUMNS = ('due_date', 'start_date')
+_RECENT_COLUMNS = ('created_at', 'due_date', 'start_date')
+
+
+def _half_open_range(column: str) -> str:
+    """[start, end) 半开区间条件，列上不包函数，可以使用索引范围扫描"""
+    return f"{column} >= %s AND {column} < %s"
+
+
+def _user_ranges(columns: Tuple[str, ...]) -> str:
+    """
+    多列时间范围的 OR 条件
+
+    每个分支里重复 user_id，使每个分支都能使用 (user_id, 日期列) 复合索引，
+    由优化器做 index merge。
+    """
+    branches = [f"(user_id = %s AND {_half_open_range(column)})" for column in columns]
+    return "(" + " OR ".join(branches) + ")"
+
+
+_CURSOR_TAIL = "(created_at < %s OR (created_at = %s AND id < %s))"
+
+# (标志, 条件SQL)，顺序固定；参数也必须按这个顺序收集。条件SQL 为 None 的由存储后端的方言提供
+_CONDITIONS: List[Tuple[int, Optional[str]]] = [
+    (FILTER_ITEM_ID, "id = %s"),
+    (FILTER_PROJECT, "project_name LIKE %s"),
+    (FILTER_TYPE, "type = %s"),
+    (FILTER_STATUS, "status = %s"),
+    (FILTER_KEYWORD_FULLTEXT, None),
+    (FILTER_KEYWORD_LIKE, "(summary LIKE %s OR content LIKE %s)"),
+    (FILTER_TIME_CREATED, _half_open_range('created_at')),
+    (FILTER_TIME_SCHEDULED, _user_ranges(_SCHEDULED_COLUMNS)),
+    (FILTER_TIME_RECENT, _user_ranges(_RECENT_COLUMNS)),
+    # 游标条件与 LIST_ORDER_BY 对应（MySQL 和 SQLite 中 NULL 在升序排序时都排在最前）
+    (FILTER_CURSOR, f"(due_date > %s OR (due_date = %s AND {_CURSOR_TAIL}))"),
+    (FILTER_CURSOR_NULL_DUE, f"(due_date IS NOT NULL OR (due_date IS NULL AND {_CURSOR_TAIL}))"),
+]
+
+
+class InvalidCursorError(ValueError):
+    """分页游标无效"""
+
+
+class SqlTemplateCache:
+    """按 (存储后端, 过滤条件位掩码) 缓存 SQL 模板，并统计模板复用次数"""
+
+    def __init__(self, name: str, build: Callable[[int, StorageBackend], str]):
+        self.name = name
+        self._build = build
+        self._templates: Dict[Tuple[str, int], str] = {}
+        self._uses: Dict[Tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, mask: int, backend: StorageBackend) -> str:
+        key = (backend.name, mask)
+        # 计数和新模板的写入都在锁内完成，多个数据库线程并发调用时计数不会丢失
+        with self._lock:
+            template = self._templates.get(key)
+            if template is None:
+                template = self._build(mask, backend)
+                self._uses[key] = 0
+                self._templates[key] = template
+            self._uses[key] += 1
+        return template
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            by_key = dict(self._uses)
+        uses = sum(by_key.values())
+        return {
+            'templates': len(by_key),
+            'uses': uses,
+            'reuses': uses - len(by_key),
+            'by_mask': {f"{name}:{mask:#06x}": count for (name, mask), count in sorted(by_key.items())},
+        }
+
+
+class CompiledFilters:
+    """一次请求的过滤条件：位掩码 + 按模板顺序排列的参数"""
+
+    __slots__ = ('mask', 'params', 'fulltext_query')
+
+    def __init__(self, mask: int, params: List[Any], fulltext_query: str):
+        self.mask = mask
+        self.params = params
+        self.fulltext_query = fulltext_query
+
+
+def get_page_size(request: QueryWorkItemsRequest) -> int:
+    """请求的每页条数，未指定时使用配置的默认值"""
+    return request.page_size or getattr(settings, 'query_page_size', 20)
+
+
+def encode_cursor(row: dict) -> str:
+    """把一页最后一行的 (due_date, created_at, id) 编码为不透明游标"""
+    due_date = row['due_date']
+    created_at = row['created_at']
+    payload = [
+        due_date.isoformat() if due_date else None,
+        created_at.isoformat() if created_at else None,
+        row['id']
+    ]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[date], datetime, int]:
+    """解码游标，格式错误时抛出 InvalidCursorError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        due_date, created_at, item_id = json.loads(raw)
+        return (
+            date.fromisoformat(due_date) if due_date else None,
+            datetime.fromisoformat(created_at),
+            int(item_id)
+        )
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("分页游标无效") from e
+
+
+def build_fulltext_query(keyword: str, backend: Optional[StorageBackend] = None) -> str:
+    """
+    把关键词转换为全文检索表达式
+
+    每个空白分隔的词作为必须出现的短语，ngram / trigram 分词下等价于子串匹配。
+    如果任何一个词短于分词长度，返回空字符串，由调用方回退到 LIKE。
+    """
+    terms = _BOOLEAN_OPERATORS.sub(' ', keyword).split()
+    if not terms:
+        return ""
+    backend = backend or get_storage_backend()
+    min_length = backend.fulltext_min_term_length()
+    if any(len(term) < min_length for term in terms):
+        return ""
+    return backend.fulltext_expression(terms)
+
+
+def uses_relevance_order(request: QueryWorkItemsRequest, backend: Optional[StorageBackend] = None) -> bool:
+    """请求是否按全文检索相关度排序（关键词回退到 LIKE 时仍使用默认排序）"""
+    return bool(request.order_by_relevance and request.keyword and build_fulltext_query(request.keyword, backend))
+
+
+def _time_range_filter(time_range: str, user_id: str) -> Tuple[int, List[Any]]:
+    """
+    时间范围条件的标志和参数
+
+    所有日期都转换为半开区间（结束日期 + 1 天），避免 DATE(created_at) 这类
+    包在列上的函数导致索引失效。
+    """
+    start_date, end_date = get_date_range(time_range)
+    if not start_date:
+        return 0, []
+    end_date = end_date or start_date
+
+    # 日期列直接使用 DATE 边界，created_at 使用对应的零点时间戳
+    start_bound = start_date
+    end_bound = end_date + timedelta(days=1)
+    start_ts = datetime.combine(start_bound, time.min)
+    end_ts = datetime.combine(end_bound, time.min)
+
+    if time_range == 'recent':
+        # 最近：查找在时间范围内创建的，或者截止日期/开始日期在范围内的
+        return FILTER_TIME_RECENT, [
+            user_id, start_ts, end_ts,
+            user_id, start_bound, end_bound,
+            user_id, start_bound, end_bound,
+        ]
+    if time_range in ['past_week', 'past_month']:
+        # 对于"过去"类查询，主要使用创建时间
+        return FILTER_TIME_CREATED, [start_ts, end_ts]
+    # 对于其他时间范围，使用截止日期和开始日期
+    return FILTER_TIME_SCHEDULED, [
+        user_id, start_bound, end_bound,
+        user_id, start_bound, end_bound,
+    ]
+
+
+def compile_filters(
+    request: QueryWorkItemsRequest,
+    user_id: str,
+    with_cursor: bool = True,
+    backend: Optional[StorageBackend] = None
+) -> CompiledFilters:
+    """
+    把查询请求转换为过滤条件位掩码和参数列表
+
+    参数的收集顺序必须与 _CONDITIONS 一致。
+    """
+    mask = 0
+    params: List[Any] = [user_id]
+    fulltext_query = ""
+
+    if request.item_id:
+        mask |= FILTER_ITEM_ID
+        params.append(request.item_id)
+
+    if request.project_name:
+        mask |= FILTER_PROJECT
+        params.append(f"%{request.project_name}%")
+
+    if request.item_type:
+        mask |= FILTER_TYPE
+        params.append(request.item_type.value)
+
+    if request.status:
+        mask |= FILTER_STATUS
+        params.append(request.status.value)
+
+    if request.keyword:
+        fulltext_query = build_fulltext_query(request.keyword, backend)
+        if fulltext_query:
+            mask |= FILTER_KEYWORD_FULLTEXT
+            params.append(fulltext_query)
+        else:
+            # 关键词短于分词长度时全文索引无法命中，只能回退到 LIKE
+            mask |= FILTER_KEYWORD_LIKE
+            params.extend([f"%{request.keyword}%", f"%{request.keyword}%"])
+
+    if request.time_range:
+        flag, time_params = _time_range_filter(request.time_range.value, user_id)
+        mask |= flag
+        params.extend(time_params)
+
+    if with_cursor and request.cursor:
+        if request.order_by_relevance and fulltext_query:
+            raise InvalidCursorError("按相关度排序时不支持分页游标")
+        due_date, created_at, item_id = decode_cursor(request.cursor)
+        if due_date is None:
+            mask |= FILTER_CURSOR_NULL_DUE
+            params.extend([created_at, created_at, item_id])
+        else:
+            mask |= FILTER_CURSOR
+            params.extend([due_date, due_date, created_at, created_at, item_id])
+
+    return CompiledFilters(mask, params, fulltext_query)
+
+
+def build_where_template(mask: int, backend: StorageBackend) -> str:
+    """根据位掩码拼接 WHERE 条件（不含 WHERE 关键字）"""
+    parts = ["user_id = %s"]
+    parts.extend(sql or backend.fulltext_condition() for flag, sql in _CONDITIONS if mask & flag)
+    return " AND ".join(parts)
+
+
+def select_fields(request: QueryWorkItemsRequest) -> Optional[List[str]]:
+    """
+    请求返回的字段：id 在前，其余按 SELECTABLE_FIELDS 的顺序去重
+
+    未指定 fields 时返回 None，表示默认的列表字段。
+    """
+    if not request.fields:
+        return None
+    requested = {field.value for field in request.fields}
+    return ['id'] + [name for name in SELECTABLE_FIELDS if name != 'id' and name in requested]
+
+
+def _list_columns(mask: int) -> str:
+    field_bits = mask >> _FIELDS_SHIFT
+    if not field_bits:
+        return LIST_COLUMNS
+    return ", ".join(
+        name for i, name in enumerate(SELECTABLE_FIELDS)
+        if field_bits & (1 << i) or name in _CURSOR_COLUMNS
+    )
+
+
+def _build_list_template(mask: int, backend: StorageBackend) -> str:
+    sql = f"SELECT {_list_columns(mask)} FROM work_items WHERE {build_where_template(mask, backend)}"
+    if mask & ORDER_RELEVANCE:
+        # 按全文检索相关度排序，相关度相同时保持默认排序
+        sql += f" ORDER BY {backend.fulltext_order()}, {LIST_ORDER_BY}"
+    else:
+        sql += f" ORDER BY {LIST_ORDER_BY}"
+    return sql + " LIMIT %s"
+
+
+list_templates = SqlTemplateCache('list', _build_list_template)
+
+
+def build_list_query(
+    request: QueryWorkItemsRequest,
+    user_id: str,
+    backend: Optional[StorageBackend] = None
+) -> Tuple[str, Tuple[Any, ...]]:
+    """
+    构建列表查询 SQL
+
+    多取一行（page_size + 1）用于判断是否还有下一页。
+
+    Returns:
+        (SQL 模板, 参数元组)
+    """
+    backend = backend or get_storage_backend()
+    filters = compile_filters(request, user_id, backend=backend)
+    mask = filters.mask
+    params = filters.params
+
+    if request.order_by_relevance and filters.fulltext_query:
+        mask |= ORDER_RELEVANCE
+        params.append(filters.fulltext_query)
+
+    # 只查询请求的列，不读取用不到的 TEXT / JSON 列
+    for name in select_fields(request) or ():
+        mask |= 1 << (_FIELDS_SHIFT + SELECTABLE_FIELDS.index(name))
+
+    params.append(get_page_size(request) + 1)
+    return list_templates.get(mask, backend), tuple(params)
+
+
+def _build_export_template(mask: int, backend: StorageBackend) -> str:
+    # 按主键顺序读取，流式游标无需排序缓冲
+    return f"SELECT {EXPORT_COLUMNS} FROM work_items WHERE {build_where_template(mask, backend)} ORDER BY id"
+
+
+export_templates = SqlTemplateCache('export', _build_export_template)
+
+
+def build_export_query(
+    request: QueryWorkItemsRequest,
+    user_id: str,
+    backend: Optional[StorageBackend] = None
+) -> Tuple[str, Tuple[Any, ...]]:
+    """
+    构建导出 SQL（与列表查询使用相同的过滤条件，不分页）
+
+    Returns:
+        (SQL 模板, 参数元组)
+    """
+    backend = backend or get_storage_backend()
+    filters = compile_filters(request, user_id, with_cursor=False, backend=backend)
+    return export_templates.get(filters.mask, backend), tuple(filters.params)
+
+
+def _build_update_target_template(mask: int, backend: StorageBackend) -> str:
+    # 只取 ID、摘要和统计列；LIMIT 2 足以判断是否唯一，FOR UPDATE 锁住候选行直到更新提交
+    return (f"SELECT {UPDATE_TARGET_COLUMNS}, summary FROM work_items "
+            f"WHERE {build_where_template(mask, backend)} LIMIT 2 FOR UPDATE")
+
+
+update_target_templates = SqlTemplateCache('update_target', _build_update_target_template)
+
+
+def build_update_target_query(
+    request: QueryWorkItemsRequest,
+    user_id: str,
+    backend: Optional[StorageBackend] = None
+) -> Tuple[str, Tuple[Any, ...]]:
+    """
+    构建更新操作的目标查找 SQL（与列表查询使用相同的过滤条件，不分页、不排序）
+
+    Returns:
+        (SQL 模板, 参数元组)
+    """
+    backend = backend or get_storage_backend()
+    filters = compile_filters(request, user_id, with_cursor=False, backend=backend)
+    return update_target_templates.get(filters.mask, backend), tuple(filters.params)
+
+
+def _build_bulk_count_template(mask: int, backend: StorageBackend) -> str:
+    # MAX(id) 作为批量更新的上界，统计之后新插入的事项不会被更新
+    return (f"SELECT COUNT(*) AS matched, MAX(id) AS max_id FROM work_items "
+            f"WHERE {build_where_template(mask, backend)}")
+
+
+def _build_bulk_chunk_template(mask: int, backend: StorageBackend) -> str:
+    # 按主键键集分块：每块只锁住本块的行，锁在块的事务提交时释放
+    return (f"SELECT {UPDATE_TARGET_COLUMNS} FROM work_items WHERE {build_where_template(mask, backend)} "
+            "AND id > %s AND id <= %s ORDER BY id LIMIT %s FOR UPDATE")
+
+
+bulk_count_templates = SqlTemplateCache('bulk_count', _build_bulk_count_template)
+bulk_chunk_templates = SqlTemplateCache('bulk_chunk', _build_bulk_chunk_template)
+
+
+def build_bulk_update_queries(
+    request: QueryWorkItemsRequest,
+    user_id: str,
+    backend: Optional[StorageBackend] = None
+) -> Tuple[str, str, Tuple[Any, ...]]:
+    """
+    构建批量更新使用的统计 SQL 和分块查找 SQL
+
+    分块查找 SQL 在过滤参数之后还需要 (上一块最后的ID, ID上界, 块大小) 三个参数。
+
+    Returns:
+        (统计 SQL 模板, 分块查找 SQL 模板, 过滤参数元组)
+    """
+    backend = backend or get_storage_backend()
+    filters = compile_filters(request, user_id, with_cursor=False, backend=backend)
+    return (
+        bulk_count_templates.get(filters.mask, backend),
+        bulk_chunk_templates.get(filters.mask, backend),
+        tuple(filters.params)
+    )
+
+
+def get_template_stats() -> Dict[str, Any]:
+    """各类 SQL 模板的复用统计"""
+    return {
+        cache.name: cache.stats()
+        for cache in (list_templates, export_templates, update_target_templates,
+                      bulk_count_templates, bulk_chunk_templates)
+    }
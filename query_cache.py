@@ -0,0 +1,278 @@
+"""
+查询结果缓存模块
+
+缓存键由 (user_id, 用户代数, 规范化的查询请求, 解析后的日期范围) 组成。
+写操作只需把该用户的代数加一，旧代数下的缓存条目就再也不会被命中，
+随后按 TTL / LRU 自然淘汰，不需要逐条删除。
+
+进程内缓存的代数不在 worker 之间共享，其他 worker 的写入要等条目按 TTL 过期后才能看到；
+结果的 ETag 由数据库中的数据版本生成（见 etag.py），不依赖这里的代数。
+"""
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import logging
+
+from config import settings
+from models import QueryWorkItemsRequest
+from utils import get_date_range
+
+try:
+    import redis
+except ImportError:  # 仅在使用共享缓存时需要
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend:
+    """缓存存储后端接口"""
+
+    # 是否涉及网络 I/O；为 True 时异步接口会在线程中调用，避免阻塞事件循环
+    is_remote = False
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float):
+        raise NotImplementedError
+
+    def get_generation(self, user_id: str) -> int:
+        raise NotImplementedError
+
+    def bump_generation(self, user_id: str) -> int:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """进程内缓存：TTL 过期 + LRU 淘汰，适用于单 worker 部署"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def get_generation(self, user_id: str) -> int:
+        return self._generations.get(user_id, 0)
+
+    def bump_generation(self, user_id: str) -> int:
+        with self._lock:
+            generation = self._generations.get(user_id, 0) + 1
+            self._generations[user_id] = generation
+            return generation
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'evictions': self._evictions,
+        }
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    共享缓存：多 worker / 多实例部署时使用
+
+    只依赖 get / set(ex=, nx=) / incr 三个命令，测试中可以传入任何实现了这三个方法的本地替身。
+    LRU 淘汰交给 Redis 的 maxmemory-policy（建议 allkeys-lru）。
+
+    代数键不存在（新用户、被淘汰或 Redis 重启后）时从当前毫秒时间戳开始计数，
+    不会回到淘汰前用过的代数，尚未过期的旧缓存键不会被误命中。
+    """
+
+    is_remote = True
+
+    def __init__(self, client=None, url: Optional[str] = None, prefix: str = 'wm:'):
+        if client is None:
+            if redis is None:
+                raise RuntimeError("使用 redis 查询缓存需要安装 redis 包: pip install redis")
+            client = redis.Redis.from_url(url or 'redis://localhost:6379/0')
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: float):
+        self.client.set(self.prefix + key, json.dumps(value, ensure_ascii=False), ex=max(1, int(ttl)))
+
+    def _seed_generation(self, key: str):
+        self.client.set(key, int(time.time() * 1000), nx=True)
+
+    def get_generation(self, user_id: str) -> int:
+        key = f"{self.prefix}gen:{user_id}"
+        raw = self.client.get(key)
+        if raw is None:
+            self._seed_generation(key)
+            raw = self.client.get(key)
+        return int(raw)
+
+    def bump_generation(self, user_id: str) -> int:
+        key = f"{self.prefix}gen:{user_id}"
+        if self.client.get(key) is None:
+            self._seed_generation(key)
+        return int(self.client.incr(key))
+
+
+class QueryResultCache:
+    """按用户缓存查询结果，写操作通过代数计数器精确失效"""
+
+    def __init__(self, backend: Optional[CacheBackend], ttl: float = 60.0):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None and self.ttl > 0
+
+    @staticmethod
+    def normalize_request(request: QueryWorkItemsRequest) -> str:
+        """规范化查询请求；相对时间范围解析为具体日期，跨天后自动换键"""
+        payload = request.model_dump(mode='json')
+        if request.time_range:
+            start_date, end_date = get_date_range(request.time_range.value)
+            payload['resolved_range'] = [
+                start_date.isoformat() if start_date else None,
+                end_date.isoformat() if end_date else None
+            ]
+        return json.dumps(payload, sort_keys=True, ensure_ascii=False)
+
+    def make_key(self, user_id: str, generation: int, request: QueryWorkItemsRequest) -> str:
+        digest = hashlib.sha1(self.normalize_request(request).encode('utf-8')).hexdigest()
+        return f"q:{user_id}:{generation}:{digest}"
+
+    def current_key(self, user_id: str, request: QueryWorkItemsRequest) -> Optional[str]:
+        """
+        当前代数下的缓存键；缓存关闭或读取代数失败时返回 None
+
+        键用于随后读取和写入结果，保证两者对应查询开始时的代数。
+        """
+        if not self.enabled:
+            return None
+        try:
+            return self.make_key(user_id, self.backend.get_generation(user_id), request)
+        except Exception as e:
+            logger.warning(f"查询缓存读取失败: {e}")
+            return None
+
+    def fetch(self, key: Optional[str]) -> Optional[Any]:
+        """读取缓存键对应的结果"""
+        if key is None:
+            return None
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"查询缓存读取失败: {e}")
+            return None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def lookup(self, user_id: str, request: QueryWorkItemsRequest) -> Tuple[Optional[str], Optional[Any]]:
+        """
+        查找缓存
+
+        Returns:
+            (缓存键, 缓存值)；键用于随后写入结果，保证写入的是查询开始时的代数
+        """
+        key = self.current_key(user_id, request)
+        return key, self.fetch(key)
+
+    def store(self, key: Optional[str], value: Any):
+        if key is None:
+            return
+        try:
+            self.backend.set(key, value, self.ttl)
+        except Exception as e:
+            logger.warning(f"查询缓存写入失败: {e}")
+
+    def invalidate_user(self, user_id: str):
+        """用户数据发生写入后调用，使其所有缓存结果失效"""
+        if self.backend is None:
+            return
+        try:
+            self.backend.bump_generation(user_id)
+        except Exception as e:
+            logger.warning(f"查询缓存失效失败: {e}")
+
+    async def _call(self, func, *args):
+        if self.backend is not None and self.backend.is_remote:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+    async def alookup(self, user_id: str, request: QueryWorkItemsRequest) -> Tuple[Optional[str], Optional[Any]]:
+        return await self._call(self.lookup, user_id, request)
+
+    async def astore(self, key: Optional[str], value: Any):
+        await self._call(self.store, key, value)
+
+    async def ainvalidate_user(self, user_id: str):
+        await self._call(self.invalidate_user, user_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'backend': type(self.backend).__name__ if self.backend else None,
+            'hits': self.hits,
+            'misses': self.misses,
+            **(self.backend.stats() if self.backend else {}),
+        }
+
+
+def create_query_cache() -> QueryResultCache:
+    """按配置创建查询缓存：memory（默认）、redis 或 none"""
+    backend_name = getattr(settings, 'query_cache_backend', 'memory')
+    ttl = getattr(settings, 'query_cache_ttl', 60.0)
+
+    if backend_name == 'none':
+        backend = None
+    elif backend_name == 'redis':
+        backend = RedisCacheBackend(url=getattr(settings, 'query_cache_redis_url', None))
+    else:
+        backend = InMemoryCacheBackend(max_entries=getattr(settings, 'query_cache_max_entries', 10000))
+
+    return QueryResultCache(backend, ttl=ttl)
+
+
+# 全局查询缓存实例
+query_cache = create_query_cache()
+
+
+def get_query_cache() -> QueryResultCache:
+    """获取查询缓存实例"""
+    return query_cache
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+重建工作事项统计汇总表
+
+用一次 GROUP BY 从 work_items 重新计算 work_item_stats。以下情况需要执行：
+首次建表（migrations/004_work_item_stats.sql）之后、绕过接口直接写入 work_items 之后
+（如 generate_dataset.py），或怀疑汇总数据与明细不一致时。
+
+    python rebuild_stats.py                 # 重建全部用户
+    python rebuild_stats.py --user alice    # 只重建一个用户
+"""
+import argparse
+import time
+
+from database import db_manager
+from work_item_stats import rebuild_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="重建工作事项统计汇总表")
+    parser.add_argument("--user", help="只重建该用户的统计")
+    args = parser.parse_args()
+
+    target = f"用户 {args.user}" if args.user else "全部用户"
+    print(f"📊 重建{target}的统计汇总...")
+    start = time.perf_counter()
+    rows = rebuild_stats(db_manager, args.user)
+    print(f"✅ 完成，写入 {rows} 条汇总行，用时 {time.perf_counter() - start:.2f}s")
+    db_manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+请求上下文与结构化访问日志
+
+RequestContextMiddleware 在请求进入时一次性解析 user_id 和请求ID，保存在
+contextvar 中（db_manager.run 会复制上下文，数据库线程中同样可见），
+请求结束时输出一行 JSON 访问日志。
+
+调试级别的请求内容日志按 debug_log_sample_rate 采样：每个请求只掷一次骰子，
+被采中的请求输出全部调试内容，其余请求一行都不输出。
+"""
+import json
+import logging
+import random
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from starlette.datastructures import Headers
+
+from config import settings
+from utils import get_user_id_from_request
+
+# 访问日志单独输出纯 JSON 行，便于日志系统直接解析
+access_logger = logging.getLogger("work_manager.access")
+if not access_logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    access_logger.addHandler(_handler)
+    access_logger.setLevel(logging.INFO)
+    access_logger.propagate = False
+
+
+class RequestContext:
+    """单个请求的上下文：身份、计时和需要写入访问日志的附加字段"""
+
+    __slots__ = ('request_id', 'user_id', 'method', 'path', 'start', 'sampled', 'timings', 'fields')
+
+    def __init__(self, request_id: str, user_id: str, method: str, path: str, sampled: bool):
+        self.request_id = request_id
+        self.user_id = user_id
+        self.method = method
+        self.path = path
+        self.start = time.perf_counter()
+        self.sampled = sampled
+        self.timings: Dict[str, float] = {}
+        self.fields: Dict[str, Any] = {}
+
+    def add_timing(self, stage: str, seconds: float):
+        """累加某个阶段的耗时（秒）"""
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+    def annotate(self, **fields):
+        """附加写入访问日志的字段"""
+        self.fields.update(fields)
+
+
+_current: ContextVar[Optional[RequestContext]] = ContextVar('request_context', default=None)
+
+
+def get_request_context() -> Optional[RequestContext]:
+    """当前请求的上下文；不在请求中（如脚本、测试直接调用）时返回 None"""
+    return _current.get()
+
+
+def current_user_id(request) -> str:
+    """当前请求的用户ID，优先使用中间件已解析的结果"""
+    ctx = _current.get()
+    if ctx is not None:
+        return ctx.user_id
+    return get_user_id_from_request(request.headers)
+
+
+def annotate(**fields):
+    """给当前请求的访问日志附加字段（不在请求中时忽略）"""
+    ctx = _current.get()
+    if ctx is not None:
+        ctx.fields.update(fields)
+
+
+class _StageTimer:
+    __slots__ = ('stage', '_start')
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        ctx = _current.get()
+        if ctx is not None:
+            ctx.add_timing(self.stage, time.perf_counter() - self._start)
+        return False
+
+
+def timed(stage: str) -> _StageTimer:
+    """把代码块耗时累加到当前请求上下文的指定阶段"""
+    return _StageTimer(stage)
+
+
+def log_payload(target: logging.Logger, message: str, *args):
+    """
+    采样输出调试内容
+
+    参数按 logging 的惰性格式化传入，只有请求被采中且 DEBUG 级别开启时才会格式化。
+    """
+    if not target.isEnabledFor(logging.DEBUG):
+        return
+    ctx = _current.get()
+    if ctx is not None and not ctx.sampled:
+        return
+    target.debug(message, *args)
+
+
+def _sample_rate() -> float:
+    return float(getattr(settings, 'debug_log_sample_rate', 0.01))
+
+
+class RequestContextMiddleware:
+    """纯 ASGI 中间件：建立请求上下文，回写 X-Request-ID，并输出一行 JSON 访问日志"""
+
+    def __init__(self, app):
+        self.app = app
+        self.access_log = getattr(settings, 'access_log_enabled', True)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        request_id = (headers.get('x-request-id') or '')[:64] or uuid.uuid4().hex[:16]
+        rate = _sample_rate()
+        ctx = RequestContext(
+            request_id=request_id,
+            user_id=get_user_id_from_request(headers),
+            method=scope.get("method", ""),
+            path=scope.get("path", ""),
+            sampled=rate >= 1 or (rate > 0 and random.random() < rate)
+        )
+        token = _current.set(ctx)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            if self.access_log and access_logger.isEnabledFor(logging.INFO):
+                access_logger.info(self._format(ctx, scope, status_code))
+
+    @staticmethod
+    def _format(ctx: RequestContext, scope, status_code: int) -> str:
+        route = scope.get("route")
+        record = {
+            'ts': datetime.now().isoformat(timespec='milliseconds'),
+            'request_id': ctx.request_id,
+            'user_id': ctx.user_id,
+            'method': ctx.method,
+            'route': getattr(route, "path", None) or "unmatched",
+            'path': ctx.path,
+            'status': status_code,
+            'duration_ms': round((time.perf_counter() - ctx.start) * 1000, 3),
+        }
+        if ctx.timings:
+            record['timings_ms'] = {stage: round(seconds * 1000, 3) for stage, seconds in ctx.timings.items()}
+        if ctx.fields:
+            record.update(ctx.fields)
+        return json.dumps(record, ensure_ascii=False, default=str)
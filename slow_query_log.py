@@ -0,0 +1,201 @@
+"""
+慢查询记录模块
+
+执行时间超过阈值的 SQL 会被记录到有界环形缓冲区中：规范化后的 SQL 模板、
+脱敏后的参数、耗时、返回/影响行数，以及（可选）异步执行 EXPLAIN 得到的
+查询计划和预估扫描行数。默认关闭（阈值为 0）。
+"""
+import hashlib
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import logging
+
+from metrics import registry
+from request_context import get_request_context
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERIES_TOTAL = registry.counter("db_slow_queries_total", "超过慢查询阈值的 SQL 数")
+
+_WHITESPACE = re.compile(r"\s+")
+# 只对这些语句执行 EXPLAIN；EXPLAIN 本身不会真正执行写操作
+_EXPLAINABLE = ("SELECT", "UPDATE", "DELETE")
+
+
+def normalize_sql(sql: str) -> str:
+    """合并空白，得到稳定的 SQL 模板文本"""
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def redact_value(value: Any) -> Any:
+    """脱敏单个参数：字符串只保留长度，数字、日期、布尔和 None 原样保留"""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (date, datetime, Decimal)):
+        return _to_jsonable(value)
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def redact_params(params: Any) -> Any:
+    """按参数结构（序列或字典）逐个脱敏"""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: redact_value(value) for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [redact_value(value) for value in params]
+    return redact_value(params)
+
+
+def _to_jsonable(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'replace')
+    return value
+
+
+def _to_jsonable_params(params: Any) -> Any:
+    if isinstance(params, dict):
+        return {key: _to_jsonable(value) for key, value in params.items()}
+    if isinstance(params, Sequence) and not isinstance(params, (str, bytes)):
+        return [_to_jsonable(value) for value in params]
+    return _to_jsonable(params)
+
+
+class SlowQueryRecorder:
+    """
+    慢查询环形缓冲区
+
+    record() 在执行 SQL 的线程中被调用，只做阈值比较和一次加锁追加；
+    EXPLAIN 提交到单独的单线程执行器中完成，不阻塞业务请求。
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = 0,
+        capacity: int = 200,
+        redact: bool = True,
+        explain: Optional[Callable[[str, Any], List[Dict[str, Any]]]] = None,
+        max_pending_explains: int = 8
+    ):
+        self.threshold = threshold_ms / 1000.0
+        self.capacity = capacity
+        self.redact = redact
+        self.explain = explain
+        self.max_pending_explains = max_pending_explains
+
+        self._entries: deque = deque(maxlen=max(1, capacity))
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._recorded = 0
+        self._pending_explains = 0
+        self._skipped_explains = 0
+        self._explain_executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def record(self, sql: str, params: Any, elapsed: float, rows: int) -> Optional[Dict[str, Any]]:
+        """
+        记录一条 SQL 的执行情况；未超过阈值时直接返回 None
+
+        Args:
+            sql: 传给 cursor.execute 的 SQL 模板（参数占位符未替换）
+            params: 执行参数
+            elapsed: 执行耗时（秒）
+            rows: 返回或影响的行数
+        """
+        if not self.enabled or elapsed < self.threshold:
+            return None
+
+        template = normalize_sql(sql)
+        # db_manager.run 复制了请求上下文，这里能拿到发起查询的请求ID
+        ctx = get_request_context()
+        entry = {
+            'id': 0,
+            'recorded_at': datetime.now().isoformat(timespec='milliseconds'),
+            'fingerprint': hashlib.sha1(template.encode('utf-8')).hexdigest()[:12],
+            'sql': template,
+            'params': redact_params(params) if self.redact else _to_jsonable_params(params),
+            'elapsed_ms': round(elapsed * 1000, 3),
+            'rows': rows,
+            'request_id': ctx.request_id if ctx is not None else None,
+            'rows_examined_estimate': None,
+            'explain': None,
+        }
+        with self._lock:
+            self._seq += 1
+            self._recorded += 1
+            entry['id'] = self._seq
+            self._entries.append(entry)
+        SLOW_QUERIES_TOTAL.inc()
+        logger.warning(f"慢查询 #{entry['id']} {entry['elapsed_ms']}ms rows={rows}: {template[:200]}")
+
+        if self.explain is not None and template.upper().startswith(_EXPLAINABLE):
+            self._submit_explain(entry, sql, params)
+        return entry
+
+    def _submit_explain(self, entry: Dict[str, Any], sql: str, params: Any):
+        with self._lock:
+            if self._pending_explains >= self.max_pending_explains:
+                self._skipped_explains += 1
+                return
+            self._pending_explains += 1
+            if self._explain_executor is None:
+                self._explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='slow-query-explain')
+            executor = self._explain_executor
+        entry['explain'] = 'pending'
+        executor.submit(self._run_explain, entry, sql, params)
+
+    def _run_explain(self, entry: Dict[str, Any], sql: str, params: Any):
+        try:
+            plan = [{key: _to_jsonable(value) for key, value in row.items()} for row in self.explain(sql, params)]
+            entry['explain'] = plan
+            # 各表预估扫描行数之和（EXPLAIN 的 rows 列是估计值；SQLite 的查询计划没有这一列）
+            if any('rows' in row for row in plan):
+                entry['rows_examined_estimate'] = sum(int(row.get('rows') or 0) for row in plan)
+        except Exception as e:
+            entry['explain'] = f"EXPLAIN 失败: {e}"
+        finally:
+            with self._lock:
+                self._pending_explains -= 1
+
+    def entries(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """按时间倒序返回最近的慢查询记录"""
+        with self._lock:
+            items = list(self._entries)
+        items.reverse()
+        return items[:limit] if limit else items
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def close(self):
+        if self._explain_executor is not None:
+            self._explain_executor.shutdown(wait=False)
+            self._explain_executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'threshold_ms': self.threshold * 1000,
+                'capacity': self.capacity,
+                'buffered': len(self._entries),
+                'recorded': self._recorded,
+                'pending_explains': self._pending_explains,
+                'skipped_explains': self._skipped_explains,
+            }
@@ -0,0 +1,363 @@
+"""
+存储后端模块
+
+DatabaseManager 通过存储后端完成建连、游标创建、事务状态检查和方言差异处理：
+
+- mysql（默认）：PyMySQL 连接远程 MySQL
+- sqlite：嵌入式 SQLite，适合单机部署，省去每个请求的网络往返
+
+业务 SQL 统一按 MySQL 方言和 %s 占位符书写，SQLite 游标在执行前把占位符
+和 NOW() 转换为 SQLite 写法；全文检索这类无法直接转换的部分由后端提供方言钩子，
+在 query_builder 拼接 SQL 模板时使用。
+"""
+import functools
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import pymysql
+from pymysql.constants import SERVER_STATUS
+
+from config import settings
+from metrics import DB_EXECUTE_SECONDS
+from slow_query_log import SlowQueryRecorder
+
+# 全文检索使用的列（需与 init_db.sql / init_sqlite.sql 中的全文索引一致）
+FULLTEXT_COLUMNS = "summary, content"
+
+SQLITE_SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "init_sqlite.sql")
+
+
+class _TimedExecuteMixin:
+    """记录每条 SQL 执行耗时的游标混入类；设置了 slow_query_recorder 时同时记录慢查询"""
+
+    slow_query_recorder: Optional[SlowQueryRecorder] = None
+
+    def execute(self, query, args=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, args)
+        finally:
+            elapsed = time.perf_counter() - start
+            DB_EXECUTE_SECONDS.observe(elapsed)
+            recorder = self.slow_query_recorder
+            if recorder is not None and recorder.enabled:
+                recorder.record(query, args, elapsed, self.rowcount)
+
+
+class TimedCursor(_TimedExecuteMixin, pymysql.cursors.Cursor):
+    """带执行计时的元组游标"""
+
+
+class TimedDictCursor(_TimedExecuteMixin, pymysql.cursors.DictCursor):
+    """带执行计时的字典游标"""
+
+
+class TimedSSDictCursor(_TimedExecuteMixin, pymysql.cursors.SSDictCursor):
+    """
+    带执行计时的无缓冲字典游标
+
+    结果集留在服务端，fetchmany 按需从连接上读取，客户端内存占用与结果行数无关。
+    结果读完（或游标关闭）之前，同一连接不能执行其他语句。
+    """
+
+    def _query(self, q):
+        super()._query(q)
+        # 无缓冲结果读完之前行数未知，按 DB-API 约定记为 -1
+        self.rowcount = -1
+        return self.rowcount
+
+
+class StorageBackend:
+    """存储后端接口"""
+
+    name = ""
+
+    def connect(self):
+        """建立一个新连接"""
+        raise NotImplementedError
+
+    def cursor(self, conn, dict_cursor: bool = True, unbuffered: bool = False):
+        """创建带执行计时的游标；unbuffered 为 True 时创建逐批读取结果的流式字典游标"""
+        raise NotImplementedError
+
+    def in_transaction(self, conn) -> bool:
+        """连接上是否还有未结束的事务"""
+        raise NotImplementedError
+
+    def ping(self, conn):
+        """检查连接是否可用，不可用时抛出异常"""
+        raise NotImplementedError
+
+    def begin_write(self, cursor):
+        """在即将先读后写的事务开始前调用，提前获取写锁"""
+
+    def first_insert_id(self, cursor, rows: int) -> int:
+        """多行 INSERT 插入的第一行ID"""
+        raise NotImplementedError
+
+    def explain(self, conn, sql: str, params: Any = None) -> List[Dict[str, Any]]:
+        """获取执行计划（使用不计时的游标，不会触发慢查询记录）"""
+        raise NotImplementedError
+
+    # ---- 方言钩子 ----
+
+    def fulltext_min_term_length(self) -> int:
+        """全文检索词的最短长度，短于该长度的关键词回退到 LIKE"""
+        raise NotImplementedError
+
+    def fulltext_expression(self, terms: Sequence[str]) -> str:
+        """把检索词转换为全文检索表达式（所有词都必须出现）"""
+        raise NotImplementedError
+
+    def fulltext_condition(self) -> str:
+        """全文检索 WHERE 条件，带一个 %s 参数"""
+        raise NotImplementedError
+
+    def fulltext_order(self) -> str:
+        """按相关度排序的 ORDER BY 表达式（含方向），带一个 %s 参数"""
+        raise NotImplementedError
+
+    def upsert_increment_sql(self, table: str, key_columns: Sequence[str], count_column: str, rows: int) -> str:
+        """多行 INSERT，主键已存在时把 count_column 累加到已有行上"""
+        raise NotImplementedError
+
+    @staticmethod
+    def _multi_row_insert(table: str, columns: Sequence[str], rows: int) -> str:
+        row = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        return f"INSERT INTO {table} ({', '.join(columns)}) VALUES " + ", ".join([row] * rows)
+
+
+class MySQLBackend(StorageBackend):
+    """PyMySQL 连接的 MySQL 后端"""
+
+    name = "mysql"
+
+    def __init__(self):
+        self.connection_params = {
+            'host': settings.db_host,
+            'database': settings.db_name,
+            'user': settings.db_user,
+            'password': settings.db_password,
+            'port': settings.db_port,
+            'charset': 'utf8mb4',
+            'autocommit': False
+        }
+
+    def connect(self):
+        return pymysql.connect(**self.connection_params)
+
+    def cursor(self, conn, dict_cursor: bool = True, unbuffered: bool = False):
+        if unbuffered:
+            return conn.cursor(TimedSSDictCursor)
+        return conn.cursor(TimedDictCursor if dict_cursor else TimedCursor)
+
+    def in_transaction(self, conn) -> bool:
+        return bool(conn.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS)
+
+    def ping(self, conn):
+        conn.ping(reconnect=False)
+
+    def first_insert_id(self, cursor, rows: int) -> int:
+        # 多行 INSERT 是 "simple insert"，InnoDB 一次性分配连续的自增ID，
+        # lastrowid 为本语句插入的第一行ID
+        return cursor.lastrowid
+
+    def explain(self, conn, sql: str, params: Any = None) -> List[Dict[str, Any]]:
+        with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+            cursor.execute("EXPLAIN " + sql, params)
+            return cursor.fetchall()
+
+    def fulltext_min_term_length(self) -> int:
+        # ngram 分词长度，需与 MySQL 的 ngram_token_size 配置一致
+        return getattr(settings, 'fulltext_ngram_token_size', 2)
+
+    def fulltext_expression(self, terms: Sequence[str]) -> str:
+        # BOOLEAN MODE：每个词作为必须出现的短语，ngram 分词下等价于子串匹配
+        return " ".join(f'+"{term}"' for term in terms)
+
+    def fulltext_condition(self) -> str:
+        return f"MATCH({FULLTEXT_COLUMNS}) AGAINST (%s IN BOOLEAN MODE)"
+
+    def fulltext_order(self) -> str:
+        return f"MATCH({FULLTEXT_COLUMNS}) AGAINST (%s IN BOOLEAN MODE) DESC"
+
+    def upsert_increment_sql(self, table: str, key_columns: Sequence[str], count_column: str, rows: int) -> str:
+        sql = self._multi_row_insert(table, [*key_columns, count_column], rows)
+        return sql + f" ON DUPLICATE KEY UPDATE {count_column} = {count_column} + VALUES({count_column})"
+
+
+@functools.lru_cache(maxsize=1024)
+def translate_sql(sql: str) -> str:
+    """把 MySQL 方言的 SQL 转换为 SQLite 写法（SQL 模板数量有限，结果缓存）"""
+    return (
+        sql.replace('%s', '?')
+        .replace('NOW()', "datetime('now', 'localtime')")
+        # SQLite 没有行锁，写事务由 begin_write 的 BEGIN IMMEDIATE 串行化
+        .replace(' FOR UPDATE', '')
+    )
+
+
+def _sqlite_params(args):
+    return () if args is None else args
+
+
+class SQLiteCursor(sqlite3.Cursor):
+    """接受 MySQL 方言 SQL 和 %s 占位符的 SQLite 游标"""
+
+    def execute(self, query, args=None):
+        return super().execute(translate_sql(query), _sqlite_params(args))
+
+    def executemany(self, query, seq_of_args):
+        return super().executemany(translate_sql(query), [_sqlite_params(args) for args in seq_of_args])
+
+
+class TimedSQLiteCursor(_TimedExecuteMixin, SQLiteCursor):
+    """带执行计时的 SQLite 游标"""
+
+
+def _dict_row(cursor, row):
+    return dict(zip([column[0] for column in cursor.description], row))
+
+
+# 日期在 SQLite 中按 ISO 文本存储；时间戳使用与 datetime('now') 相同的空格分隔格式，
+# 保证文本比较与时间先后一致
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(sep=' '))
+sqlite3.register_converter("DATE", lambda raw: date.fromisoformat(raw.decode()))
+sqlite3.register_converter("TIMESTAMP", lambda raw: datetime.fromisoformat(raw.decode()))
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    嵌入式 SQLite 后端
+
+    - WAL 模式：读不阻塞写，写不阻塞读
+    - synchronous=NORMAL：WAL 模式下只在检查点时 fsync，掉电最多丢失最近的事务，不会损坏数据库
+    - busy_timeout：写锁冲突时等待而不是立即报错
+    - 较大的页缓存、内存临时表和 mmap 读
+    - 连接由连接池复用，每个连接缓存已编译的语句
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or getattr(settings, 'sqlite_path', 'work_manager.db')
+        self.busy_timeout = float(getattr(settings, 'sqlite_busy_timeout', 5.0))
+        self.pragmas = [
+            "PRAGMA synchronous = NORMAL",
+            f"PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}",
+            f"PRAGMA cache_size = -{int(getattr(settings, 'sqlite_cache_size_kb', 65536))}",
+            "PRAGMA temp_store = MEMORY",
+            f"PRAGMA mmap_size = {int(getattr(settings, 'sqlite_mmap_size', 268435456))}",
+        ]
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def _open(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            # 连接由连接池在线程间交替使用，同一时间只有一个线程持有
+            check_same_thread=False,
+            cached_statements=256
+        )
+        for pragma in self.pragmas:
+            conn.execute(pragma)
+        return conn
+
+    def _ensure_schema(self):
+        """首次连接时切换到 WAL 模式并执行建表脚本（均为幂等操作）"""
+        if self._schema_ready:
+            return
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            conn = self._open()
+            try:
+                conn.execute("PRAGMA journal_mode = WAL")
+                with open(SQLITE_SCHEMA_FILE, encoding="utf-8") as f:
+                    conn.executescript(f.read())
+                conn.commit()
+            finally:
+                conn.close()
+            self._schema_ready = True
+
+    def connect(self):
+        self._ensure_schema()
+        return self._open()
+
+    def cursor(self, conn, dict_cursor: bool = True, unbuffered: bool = False):
+        # sqlite3 游标本身按需逐行执行，不会预先读取整个结果集
+        cursor = conn.cursor(TimedSQLiteCursor)
+        if dict_cursor or unbuffered:
+            cursor.row_factory = _dict_row
+        return cursor
+
+    def in_transaction(self, conn) -> bool:
+        return conn.in_transaction
+
+    def ping(self, conn):
+        conn.execute("SELECT 1").fetchone()
+
+    def begin_write(self, cursor):
+        # 默认的延迟事务在先读后写时升级写锁可能直接失败，这里一开始就获取写锁
+        if not cursor.connection.in_transaction:
+            cursor.execute("BEGIN IMMEDIATE")
+
+    def first_insert_id(self, cursor, rows: int) -> int:
+        # SQLite 的 lastrowid 是最后一行ID；同一语句持有写锁，插入的 rowid 连续
+        return cursor.lastrowid - rows + 1
+
+    def explain(self, conn, sql: str, params: Any = None) -> List[Dict[str, Any]]:
+        cursor = conn.cursor(SQLiteCursor)
+        try:
+            cursor.row_factory = _dict_row
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def fulltext_min_term_length(self) -> int:
+        # trigram 分词要求检索词至少 3 个字符
+        return 3
+
+    def fulltext_expression(self, terms: Sequence[str]) -> str:
+        # FTS5：空格分隔的短语默认为 AND，短语内的双引号需要转义
+        return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+    def fulltext_condition(self) -> str:
+        return "id IN (SELECT rowid FROM work_items_fts WHERE work_items_fts MATCH %s)"
+
+    def fulltext_order(self) -> str:
+        # bm25 越小越相关
+        return ("(SELECT bm25(work_items_fts) FROM work_items_fts "
+                "WHERE work_items_fts MATCH %s AND rowid = work_items.id) ASC")
+
+    def upsert_increment_sql(self, table: str, key_columns: Sequence[str], count_column: str, rows: int) -> str:
+        sql = self._multi_row_insert(table, [*key_columns, count_column], rows)
+        return (sql + f" ON CONFLICT({', '.join(key_columns)}) "
+                f"DO UPDATE SET {count_column} = {count_column} + excluded.{count_column}")
+
+
+def create_backend() -> StorageBackend:
+    """按配置创建存储后端：mysql（默认）或 sqlite"""
+    backend_name = getattr(settings, 'db_backend', 'mysql')
+    if backend_name == 'sqlite':
+        return SQLiteBackend()
+    if backend_name != 'mysql':
+        raise ValueError(f"不支持的存储后端: {backend_name}")
+    return MySQLBackend()
+
+
+# 全局存储后端实例；SQL 模板按它的方言生成
+storage_backend = create_backend()
+
+
+def get_storage_backend() -> StorageBackend:
+    """获取存储后端实例"""
+    return storage_backend
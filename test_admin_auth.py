@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+测试管理和统计接口的令牌校验（使用进程内客户端，不依赖数据库和服务进程）
+"""
+from fastapi.testclient import TestClient
+
+from config import settings
+from main import app
+
+ADMIN_PATHS = [("GET", "/pool_stats"), ("GET", "/cache_stats"),
+               ("GET", "/admin/slow_queries"), ("DELETE", "/admin/slow_queries")]
+
+
+def status_codes(client, headers=None):
+    return {path: client.request(method, path, headers=headers).status_code for method, path in ADMIN_PATHS}
+
+
+def check_admin_auth(set_token):
+    client = TestClient(app)
+
+    # 未配置令牌：一律拒绝
+    set_token(None)
+    assert set(status_codes(client).values()) == {403}
+    assert set(status_codes(client, {"X-Admin-Token": ""}).values()) == {403}
+    print("✅ 未配置 ADMIN_TOKEN 时管理接口全部拒绝")
+
+    set_token("secret-token")
+    assert set(status_codes(client).values()) == {403}
+    assert set(status_codes(client, {"X-Admin-Token": "wrong"}).values()) == {403}
+    assert set(status_codes(client, {"X-Admin-Token": "secret-token"}).values()) == {200}
+    print("✅ 令牌一致时才允许访问")
+
+
+def test_admin_auth(monkeypatch):
+    check_admin_auth(lambda token: monkeypatch.setattr(settings, 'admin_token', token, raising=False))
+
+
+if __name__ == "__main__":
+    print("🧪 测试管理接口鉴权")
+    print("=" * 50)
+    original = getattr(settings, 'admin_token', None)
+    try:
+        check_admin_auth(lambda token: setattr(settings, 'admin_token', token))
+    finally:
+        setattr(settings, 'admin_token', original)
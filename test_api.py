@@ -126,10 +126,27 @@ def test_query_work_items():
             if result.get('data'):
                 for item in result['data'][:2]:  # 只显示前2个
                     print(f"  - {item['summary']} ({item['type']}) - {item['status']}")
-                    
+
         except Exception as e:
             print(f"❌ 查询失败: {e}")
 
+    print("\n📋 只返回指定字段")
+    try:
+        response = requests.post(
+            f"{BASE_URL}/query_work_items",
+            headers=HEADERS,
+            json={"fields": ["status", "content", "tags"], "page_size": 5}
+        )
+        print(f"状态码: {response.status_code}")
+        items = response.json().get('data') or []
+        unexpected = [item for item in items if set(item) != {"id", "status", "content", "tags"}]
+        if unexpected:
+            print(f"❌ 返回了多余或缺少的字段: {sorted(unexpected[0])}")
+        else:
+            print(f"✅ {len(items)} 个事项只包含 id、status、content、tags")
+    except Exception as e:
+        print(f"❌ 查询失败: {e}")
+
 def test_update_work_item():
     """测试更新工作事项接口"""
     print("\n✏️ 测试更新工作事项接口...")
@@ -177,6 +194,47 @@ def test_update_work_item():
     except Exception as e:
         print(f"❌ 更新失败: {e}")
 
+def test_bulk_update_work_items():
+    """测试按条件批量更新接口：先预览数量，再执行更新"""
+    print("\n✏️ 测试批量更新工作事项接口...")
+
+    bulk_data = {
+        "user_input": "把所有会议都标记为进行中",
+        "item_type": "meeting",
+        "new_status": "in_progress",
+        "dry_run": True
+    }
+
+    try:
+        response = requests.post(
+            f"{BASE_URL}/bulk_update_work_items",
+            headers=HEADERS,
+            json=bulk_data
+        )
+        print(f"预览状态码: {response.status_code}")
+        print(f"预览响应: {response.json()}")
+        if response.status_code != 200:
+            print("❌ 批量更新预览失败")
+            return
+
+        bulk_data["dry_run"] = False
+        response = requests.post(
+            f"{BASE_URL}/bulk_update_work_items",
+            headers=HEADERS,
+            json=bulk_data
+        )
+        print(f"状态码: {response.status_code}")
+        result = response.json()
+        print(f"响应: {result}")
+
+        if response.status_code == 200 and result.get('updated') == result.get('matched'):
+            print("✅ 批量更新成功")
+        else:
+            print("❌ 批量更新失败")
+
+    except Exception as e:
+        print(f"❌ 批量更新失败: {e}")
+
 def main():
     """主测试函数"""
     print("🚀 开始测试 Work Manager Backend API")
@@ -202,6 +260,9 @@ def main():
     
     # 测试更新工作事项
     test_update_work_item()
+
+    # 测试批量更新工作事项
+    test_bulk_update_work_items()
     
     print("\n" + "=" * 50)
     print("🎉 API 测试完成")
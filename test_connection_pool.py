@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+测试连接池（使用假的 connect / ping，不依赖数据库）
+
+覆盖后进先出复用、空闲回收、最大存活时间回收、ping 失败重建、会话初始化和取连接超时。
+"""
+import threading
+import time
+
+import pytest
+
+from database import ConnectionPool, PoolTimeoutError
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, statement):
+        self.conn.statements.append(statement)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.statements = []
+        self.closed = False
+        self.broken = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class FakeDatabase:
+    """记录建立的所有连接；ping 在连接被标记为 broken 时失败"""
+
+    def __init__(self):
+        self.connections = []
+        self.pings = 0
+
+    def connect(self):
+        conn = FakeConnection(len(self.connections) + 1)
+        self.connections.append(conn)
+        return conn
+
+    def ping(self, conn):
+        self.pings += 1
+        if conn.broken:
+            raise ConnectionError("连接已断开")
+
+
+def make_pool(**kwargs):
+    database = FakeDatabase()
+    options = dict(min_size=0, max_size=3, idle_timeout=300.0, max_lifetime=3600.0,
+                   checkout_timeout=1.0, ping_interval=-1)
+    options.update(kwargs)
+    return database, ConnectionPool(database.connect, ping=database.ping, **options)
+
+
+def test_lifo_reuse():
+    database, pool = make_pool()
+    first, second = pool.acquire(), pool.acquire()
+    pool.release(first)
+    pool.release(second)
+
+    # 最近归还的连接最先被复用
+    assert pool.acquire() is second
+    assert pool.acquire() is first
+    stats = pool.stats()
+    assert stats['created'] == 2 and stats['checkouts'] == 4 and stats['in_use'] == 2
+    print("✅ 后进先出复用")
+
+
+def test_idle_culling_keeps_min_size():
+    database, pool = make_pool(min_size=1, idle_timeout=60.0)
+    entries = [pool.acquire() for _ in range(3)]
+    for entry in entries:
+        pool.release(entry)
+
+    # 最早归还的两个连接空闲超时；回收时保留 min_size 个
+    for entry in entries:
+        entry.last_used_at -= 120
+    entry = pool.acquire()
+    stats = pool.stats()
+    assert stats['recycled_idle'] == 2 and stats['size'] == 1
+    assert entry.conn is database.connections[2]
+    assert [conn.closed for conn in database.connections] == [True, True, False]
+    print("✅ 空闲超时的连接被回收，保留 min_size 个")
+
+
+def test_max_lifetime_recycled_on_release():
+    database, pool = make_pool(max_lifetime=10.0)
+    entry = pool.acquire()
+    entry.created_at -= 11
+    pool.release(entry)
+
+    stats = pool.stats()
+    assert stats['recycled_lifetime'] == 1 and stats['closed'] == 1 and stats['size'] == 0
+    assert database.connections[0].closed
+
+    # 下一次取出时建立新连接
+    assert pool.acquire().conn is database.connections[1]
+    print("✅ 超过最大存活时间的连接在归还时关闭")
+
+
+def test_ping_failure_replaces_connection():
+    database, pool = make_pool(ping_interval=0)
+    entry = pool.acquire()
+    pool.release(entry)
+    database.connections[0].broken = True
+
+    replacement = pool.acquire()
+    assert replacement.conn is database.connections[1]
+    assert database.connections[0].closed
+    stats = pool.stats()
+    assert stats['ping_failures'] == 1 and stats['size'] == 1 and stats['in_use'] == 1
+
+    # 刚用过的连接不需要 ping
+    quiet_database, quiet_pool = make_pool(ping_interval=60.0)
+    quiet_pool.release(quiet_pool.acquire())
+    quiet_pool.acquire()
+    assert quiet_database.pings == 0 and database.pings == 1
+    print("✅ ping 失败的连接被关闭并在同一名额上重建")
+
+
+def test_session_init_runs_once_per_connection():
+    database, pool = make_pool(session_init=["SET time_zone = '+08:00'"])
+    for _ in range(3):
+        pool.release(pool.acquire())
+    assert len(database.connections) == 1
+    assert database.connections[0].statements == ["SET time_zone = '+08:00'"]
+    print("✅ 会话初始化只在建立连接时执行一次")
+
+
+def test_checkout_timeout():
+    database, pool = make_pool(max_size=1)
+    held = pool.acquire()
+
+    start = time.monotonic()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire(timeout=0.05)
+    assert time.monotonic() - start >= 0.05
+    stats = pool.stats()
+    assert stats['wait_timeouts'] == 1 and stats['waits'] >= 1
+
+    # 等待中的请求在连接归还后拿到同一个连接
+    result = {}
+    waiter = threading.Thread(target=lambda: result.setdefault('entry', pool.acquire(timeout=1.0)))
+    waiter.start()
+    time.sleep(0.05)
+    pool.release(held)
+    waiter.join()
+    assert result['entry'] is held
+    print("✅ 连接耗尽时等待超时抛出 PoolTimeoutError，归还后唤醒等待者")
+
+
+def test_failed_connect_frees_slot():
+    database, pool = make_pool(max_size=1)
+
+    def refuse():
+        raise ConnectionError("无法连接数据库")
+    pool._connect = refuse
+    with pytest.raises(ConnectionError):
+        pool.acquire()
+    assert pool.stats()['size'] == 0
+
+    pool._connect = database.connect
+    assert pool.acquire(timeout=0.05).conn is database.connections[0]
+    print("✅ 建立连接失败时归还名额")
+
+
+if __name__ == "__main__":
+    print("🧪 测试连接池")
+    print("=" * 50)
+    test_lifo_reuse()
+    test_idle_culling_keeps_min_size()
+    test_max_lifetime_recycled_on_release()
+    test_ping_failure_replaces_connection()
+    test_session_init_runs_once_per_connection()
+    test_checkout_timeout()
+    test_failed_connect_frees_slot()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+测试列表查询的 ETag（使用临时 SQLite 数据库，不依赖 MySQL 和服务进程）
+
+ETag 由数据库中的用户数据版本生成，不依赖查询缓存，直接写库也会改变它。
+"""
+from conftest import temp_sqlite_db_manager
+from etag import etag_matches, get_etag_stats, make_etag, read_data_version
+from models import QueryWorkItemsRequest
+
+USER_ID = "etag_test_user"
+
+
+def insert(cursor, summary, updated_at=None):
+    if updated_at is None:
+        cursor.execute("INSERT INTO work_items (user_id, type, content, summary) VALUES (%s, 'task', %s, %s)",
+                       (USER_ID, summary, summary))
+    else:
+        cursor.execute("INSERT INTO work_items (user_id, type, content, summary, updated_at) "
+                       "VALUES (%s, 'task', %s, %s, %s)", (USER_ID, summary, summary, updated_at))
+
+
+def version(db_manager):
+    with db_manager.get_db_cursor() as cursor:
+        return read_data_version(cursor, USER_ID)
+
+
+def test_data_version(db_manager):
+    assert version(db_manager) == (0, 0, "")
+
+    with db_manager.get_db_cursor() as cursor:
+        insert(cursor, "周报", "2025-01-01 09:00:00")
+    first = version(db_manager)
+    assert first == (1, 1, "2025-01-01 09:00:00")
+
+    # 绕过 API 的写入同样改变版本
+    with db_manager.get_db_cursor() as cursor:
+        cursor.execute("UPDATE work_items SET summary = %s, updated_at = %s WHERE user_id = %s",
+                       ("月报", "2025-01-02 09:00:00", USER_ID))
+    second = version(db_manager)
+    assert second != first
+
+    # 补录一条较早的事项、删除事项时最近修改时间不变，由事项数和最大 ID 区分
+    with db_manager.get_db_cursor() as cursor:
+        insert(cursor, "季报", "2024-12-01 09:00:00")
+    third = version(db_manager)
+    with db_manager.get_db_cursor() as cursor:
+        cursor.execute("DELETE FROM work_items WHERE id = 1")
+    assert len({first, second, third, version(db_manager)}) == 4
+
+    # 最近一次修改就在当前这一秒内：版本不稳定，不生成 ETag
+    with db_manager.get_db_cursor() as cursor:
+        insert(cursor, "刚记录的事项")
+    assert version(db_manager) is None
+    assert make_etag(USER_ID, QueryWorkItemsRequest(), None) is None
+    print("✅ 数据版本随写入改变，当前秒内的修改不生成 ETag")
+
+
+def test_etag_matching():
+    request = QueryWorkItemsRequest(status="todo")
+    data_version = (3, 42, "2025-01-01 09:00:00")
+    etag = make_etag(USER_ID, request, data_version)
+    assert etag == make_etag(USER_ID, QueryWorkItemsRequest(status="todo"), data_version)
+    assert etag != make_etag(USER_ID, QueryWorkItemsRequest(status="completed"), data_version)
+    assert etag != make_etag("other_user", request, data_version)
+    assert etag != make_etag(USER_ID, request, (3, 42, "2025-01-01 09:00:01"))
+
+    before = get_etag_stats()['not_modified']
+    assert etag_matches(etag, etag)
+    assert etag_matches(etag, f'"other", {etag.removeprefix("W/")}')
+    assert etag_matches(etag, "*")
+    assert not etag_matches(etag, '"other"')
+    assert not etag_matches(etag, None)
+    assert not etag_matches(None, "*")
+    assert get_etag_stats()['not_modified'] == before + 3
+    print("✅ ETag 随请求和数据版本改变，If-None-Match 弱比较正常")
+
+
+if __name__ == "__main__":
+    print("🧪 测试列表查询 ETag")
+    print("=" * 50)
+    with temp_sqlite_db_manager() as db_manager:
+        test_data_version(db_manager)
+    test_etag_matching()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+检查每个时间范围生成的查询是否使用 (user_id, 日期列) 复合索引
+
+需要连接已执行 migrations/002_time_range_indexes.sql 的 MySQL 数据库，
+存储后端不是 MySQL 或连接不上时跳过。
+脚本会为测试用户写入一批分布在两年内的数据，检查结束后删除。
+"""
+import random
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+import pytest
+
+from database import db_manager
+from models import QueryWorkItemsRequest, TimeRange
+from query_builder import build_list_query
+
+TEST_USER = "explain_index_test_user"
+SEED_ROWS = 5000
+
+DUE_DATE_INDEXES = {"idx_work_items_user_list", "idx_work_items_user_start_date"}
+CREATED_AT_INDEXES = {"idx_work_items_user_created_at"}
+
+# 每个时间范围允许使用的索引（index_merge 时 key 中会列出多个索引）
+EXPECTED_INDEXES = {
+    TimeRange.TODAY: DUE_DATE_INDEXES,
+    TimeRange.TOMORROW: DUE_DATE_INDEXES,
+    TimeRange.THIS_WEEK: DUE_DATE_INDEXES,
+    TimeRange.NEXT_WEEK: DUE_DATE_INDEXES,
+    TimeRange.THIS_MONTH: DUE_DATE_INDEXES,
+    TimeRange.RECENT: DUE_DATE_INDEXES | CREATED_AT_INDEXES,
+    TimeRange.PAST_WEEK: CREATED_AT_INDEXES,
+    TimeRange.PAST_MONTH: CREATED_AT_INDEXES,
+    # 没有时间条件时只要求按 user_id 前缀走索引
+    TimeRange.ALL: None,
+}
+
+
+def mysql_unavailable() -> Optional[str]:
+    """返回不能执行索引检查的原因，MySQL 可用时返回 None"""
+    if db_manager.backend.name != "mysql":
+        return f"存储后端为 {db_manager.backend.name}，索引检查只针对 MySQL"
+    if not db_manager.test_connection():
+        return "无法连接 MySQL"
+    return None
+
+
+def seed_rows(cursor):
+    """写入分布在过去一年到未来一年的测试数据"""
+    today = date.today()
+    rng = random.Random(42)
+    rows = []
+    for i in range(SEED_ROWS):
+        due = today + timedelta(days=rng.randint(-365, 365))
+        start = due - timedelta(days=rng.randint(0, 14))
+        created = datetime.combine(start, datetime.min.time()) - timedelta(hours=rng.randint(0, 240))
+        rows.append((TEST_USER, "task", f"索引测试 {i}", f"索引测试 {i}", due, start, "todo", 3, created))
+    cursor.executemany(
+        """
+        INSERT INTO work_items (user_id, type, content, summary, due_date, start_date, status, priority, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """,
+        rows
+    )
+    cursor.execute("ANALYZE TABLE work_items")
+    cursor.fetchall()
+
+
+def explain_keys(cursor, time_range: TimeRange) -> set:
+    """返回查询计划中 work_items 使用的索引集合"""
+    sql, params = build_list_query(QueryWorkItemsRequest(time_range=time_range), TEST_USER)
+    cursor.execute("EXPLAIN " + sql, params)
+    plan = cursor.fetchall()
+    keys = set()
+    for row in plan:
+        if row.get("table") == "work_items" and row.get("key"):
+            keys.update(row["key"].split(","))
+    return keys
+
+
+def test_time_range_indexes():
+    """每个时间范围的查询都应使用对应的复合索引"""
+    reason = mysql_unavailable()
+    if reason:
+        pytest.skip(reason)
+
+    failures = []
+    with db_manager.get_db_cursor() as cursor:
+        cursor.execute("DELETE FROM work_items WHERE user_id = %s", (TEST_USER,))
+        seed_rows(cursor)
+
+    try:
+        with db_manager.get_db_cursor() as cursor:
+            for time_range, expected in EXPECTED_INDEXES.items():
+                keys = explain_keys(cursor, time_range)
+                if expected is None:
+                    ok = bool(keys) and all(key.startswith("idx_work_items_user") for key in keys)
+                else:
+                    ok = bool(keys) and keys <= expected
+                print(f"{'✅' if ok else '❌'} {time_range.value}: {', '.join(sorted(keys)) or '全表扫描'}")
+                if not ok:
+                    failures.append(time_range.value)
+    finally:
+        with db_manager.get_db_cursor() as cursor:
+            cursor.execute("DELETE FROM work_items WHERE user_id = %s", (TEST_USER,))
+
+    assert not failures, f"以下时间范围未使用预期索引: {failures}"
+
+
+if __name__ == "__main__":
+    print("🔍 检查时间范围查询的索引使用情况")
+    print("=" * 50)
+    reason = mysql_unavailable()
+    if reason:
+        print(f"⚠️ {reason}，跳过")
+    else:
+        test_time_range_indexes()
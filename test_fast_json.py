@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+测试快速 JSON 响应与默认响应逐字节一致（不依赖数据库和服务进程）
+
+默认路径按 FastAPI 处理 response_model 的方式生成响应体：ApiResponse 经 /query_work_items
+的响应字段校验、序列化后由 JSONResponse 编码；快速路径直接编码字典。
+指定 fields 的结果应符合 SparseApiResponse（未选择的字段不出现）。
+orjson 和标准库 json 两种编码器都要一致。
+"""
+import asyncio
+from datetime import date, datetime
+
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+import fast_json
+from fast_json import FastJSONResponse
+from main import _list_response_content, _selected_fields, _work_item_fields, app
+from metrics import TimedJSONResponse
+from models import ApiResponse, SparseApiResponse
+
+# 使用路由上实际声明的响应字段，与线上的校验和序列化方式一致
+RESPONSE_FIELD = next(route for route in app.routes if getattr(route, "path", None) == "/query_work_items").response_field
+SPARSE_FIELD = create_model_field(name="Response_query_work_items_sparse", type_=SparseApiResponse, mode="serialization")
+
+# 覆盖需要转义的字符、非 ASCII 字符和各种空值
+TRICKY_SUMMARIES = [
+    "普通中文摘要",
+    'quote " backslash \\ slash / done',
+    "换行\n回车\r制表\t",
+    "控制字符\x00\x01\x1f\x7f",
+    "emoji 🚀 与补充平面 𠀀",
+    "行分隔符 段分隔符 ",
+    "</script><script>alert(1)</script>",
+    "",
+]
+
+
+def make_rows():
+    rows = []
+    for i, summary in enumerate(TRICKY_SUMMARIES):
+        rows.append({
+            'id': 1000 + i,
+            'type': 'task',
+            'summary': summary,
+            'project_name': None if i % 2 else "UMS项目",
+            'due_date': date(2025, 1, i + 1) if i % 3 else None,
+            'status': 'todo' if i % 4 else None,
+            'priority': i % 5 + 1 if i % 3 else None,
+            'created_at': datetime(2025, 1, 1, 9, 30, i, 123456 if i == 2 else 0),
+            'updated_at': None if i == 5 else datetime(2025, 2, 1, 18, 0),
+        })
+    return rows
+
+
+def default_body(content):
+    value = asyncio.run(serialize_response(field=RESPONSE_FIELD, response_content=ApiResponse(**content)))
+    return TimedJSONResponse(value).body
+
+
+def sparse_body(content):
+    value = asyncio.run(serialize_response(
+        field=SPARSE_FIELD, response_content=SparseApiResponse(**content), exclude_unset=True
+    ))
+    return TimedJSONResponse(value).body
+
+
+def check(label, content, expected_body=default_body):
+    expected = expected_body(content)
+    actual = FastJSONResponse(content).body
+    status = "✅" if actual == expected else "❌"
+    print(f"  {status} {label}: {len(actual)} 字节")
+    assert actual == expected, (expected, actual)
+
+
+def run_cases():
+    rows = make_rows()
+    check("多行结果带游标", _list_response_content([_work_item_fields(row) for row in rows], "eyJjdXJzb3IiOjF9"))
+    check("多行结果无游标", _list_response_content([_work_item_fields(row) for row in rows], None))
+    check("空结果", _list_response_content([], None))
+
+    fields = ["id", "summary", "due_date", "priority", "tags"]
+    for row in rows:
+        row['tags'] = '["周报", "跟进"]' if row['id'] % 2 else None
+    sparse = _list_response_content([_selected_fields(row, fields) for row in rows], None)
+    check("fields 部分字段", sparse, sparse_body)
+    assert all(set(item) == set(fields) for item in sparse['data'])
+
+
+def test_orjson_encoder():
+    if fast_json.orjson is None:
+        print("  ⚠️ 未安装 orjson，跳过")
+        return
+    run_cases()
+
+
+def test_stdlib_encoder():
+    saved = fast_json.orjson
+    fast_json.orjson = None
+    try:
+        run_cases()
+    finally:
+        fast_json.orjson = saved
+
+
+if __name__ == "__main__":
+    print("🧪 测试快速 JSON 响应的字节兼容性")
+    print("=" * 50)
+    print("orjson:")
+    test_orjson_encoder()
+    print("标准库 json:")
+    test_stdlib_encoder()
+    print("\n🎉 测试完成")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+测试后台就绪探测（使用临时 SQLite 数据库，不依赖 MySQL 和服务进程）
+"""
+import time
+from contextlib import ExitStack
+
+from conftest import temp_sqlite_db_manager
+from health import HealthMonitor
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_health_monitor(db_manager):
+    monitor = HealthMonitor(db_manager, interval=0.05, probe_timeout=0.1, stale_after=0.5)
+    try:
+        assert not monitor.is_ready(), "第一次探测之前不应就绪"
+
+        # 多次探测复用同一个连接池连接
+        monitor.start()
+        assert wait_for(lambda: monitor.probes >= 5)
+        status = monitor.status()
+        print(f"探测 {monitor.probes} 次后: ready={status['ready']} pool={status['pool']}")
+        assert status['ready'] and status['last_success_at'] is not None
+        assert db_manager.get_pool_stats()['created'] == 1
+
+        # 占满连接池：探测等待连接超时，仍然就绪，只报告饱和
+        with ExitStack() as stack:
+            for _ in range(db_manager.pool.max_size):
+                stack.enter_context(db_manager.get_db_connection())
+            assert wait_for(lambda: monitor.saturated)
+            status = monitor.status()
+            print(f"连接池占满: ready={status['ready']} saturated={status['saturated']} "
+                  f"saturation={status['pool']['saturation']}")
+            assert status['ready'] and status['last_error'] is None
+            assert status['pool']['saturation'] == 1.0
+            assert monitor.metrics()['saturated'] == 1
+
+        assert wait_for(lambda: not monitor.saturated)
+        assert monitor.is_ready()
+        print("✅ 连接归还后不再饱和")
+
+        # 探测停止后，超过 stale_after 没有成功探测即视为未就绪
+        monitor.stop()
+        assert wait_for(lambda: not monitor.is_ready(), timeout=1.0)
+        assert monitor.status()['last_error'] is None
+        print("✅ 探测停止后按 stale_after 过期")
+    finally:
+        monitor.stop()
+
+
+def test_saturation_goes_stale(db_manager):
+    # 连接池一直占满（如连接都卡在无响应的数据库上）：饱和的探测不算成功，超过 stale_after 后未就绪
+    monitor = HealthMonitor(db_manager, interval=0.05, probe_timeout=0.1, stale_after=0.5)
+    try:
+        monitor.start()
+        assert wait_for(monitor.is_ready)
+        with ExitStack() as stack:
+            for _ in range(db_manager.pool.max_size):
+                stack.enter_context(db_manager.get_db_connection())
+            assert wait_for(lambda: not monitor.is_ready())
+            status = monitor.status()
+            print(f"持续饱和: ready={status['ready']} saturated={status['saturated']} "
+                  f"last_success_age={status['last_success_age_seconds']}")
+            assert status['saturated'] and status['last_error'] is None
+            assert status['last_success_age_seconds'] > monitor.stale_after
+            assert monitor.metrics()['failures'] == 0
+
+        assert wait_for(monitor.is_ready)
+        print("✅ 持续饱和超过 stale_after 后未就绪，连接归还后恢复")
+    finally:
+        monitor.stop()
+
+
+def test_probe_failure_not_ready(db_manager):
+    # 只有连接或 ping 失败才视为未就绪
+    def unreachable(checkout_timeout=None):
+        raise ConnectionError("无法连接数据库")
+    db_manager.probe = unreachable
+
+    monitor = HealthMonitor(db_manager, interval=0.05, probe_timeout=0.1)
+    assert not monitor.probe_once()
+    status = monitor.status()
+    assert not status['ready'] and not status['saturated'] and "无法连接" in status['last_error']
+    assert monitor.metrics()['failures'] == 1
+    print("✅ 数据库连接失败时未就绪")
+
+
+if __name__ == "__main__":
+    print("🧪 测试就绪探测")
+    print("=" * 50)
+    with temp_sqlite_db_manager() as db_manager:
+        test_health_monitor(db_manager)
+    with temp_sqlite_db_manager() as db_manager:
+        test_saturation_goes_stale(db_manager)
+    with temp_sqlite_db_manager() as db_manager:
+        test_probe_failure_not_ready(db_manager)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+测试查询结果缓存（不依赖数据库和 Redis）
+"""
+import time
+
+from models import QueryWorkItemsRequest, TimeRange
+from query_cache import InMemoryCacheBackend, QueryResultCache, RedisCacheBackend
+
+
+class LocalRedisStandIn:
+    """Redis 的本地替身，只实现 RedisCacheBackend 用到的命令"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        value = self.data.get(key)
+        if value is None:
+            return None
+        raw, expires_at = value
+        if expires_at is not None and expires_at < time.monotonic():
+            del self.data[key]
+            return None
+        return raw
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and self.get(key) is not None:
+            return None
+        self.data[key] = (str(value), time.monotonic() + ex if ex else None)
+        return True
+
+    def incr(self, key):
+        raw = self.get(key)
+        value = int(raw or 0) + 1
+        self.data[key] = (str(value), None)
+        return value
+
+
+def check_backend(backend):
+    cache = QueryResultCache(backend, ttl=60)
+    request = QueryWorkItemsRequest(time_range=TimeRange.TODAY, keyword="会议")
+    payload = {"message": "查询成功", "error": False, "data": [], "next_cursor": None}
+
+    key, value = cache.lookup("alice", request)
+    assert value is None
+    cache.store(key, payload)
+
+    # 相同用户 + 相同请求命中
+    _, value = cache.lookup("alice", QueryWorkItemsRequest(keyword="会议", time_range="today"))
+    assert value == payload
+
+    # 其他用户不命中
+    _, value = cache.lookup("bob", request)
+    assert value is None
+
+    # 写入后失效
+    cache.invalidate_user("alice")
+    _, value = cache.lookup("alice", request)
+    assert value is None
+
+    # 失效前开始的查询用旧键写回，不会污染新代数
+    cache.store(key, payload)
+    _, value = cache.lookup("alice", request)
+    assert value is None
+
+    assert cache.hits == 1
+    print(f"✅ {type(backend).__name__}: {cache.stats()}")
+
+
+def test_in_memory_backend():
+    check_backend(InMemoryCacheBackend(max_entries=100))
+
+
+def test_shared_backend_with_stand_in():
+    check_backend(RedisCacheBackend(client=LocalRedisStandIn()))
+
+
+def test_shared_generation_reseeded():
+    """代数键被淘汰后从时间戳重新开始，不回到用过的代数，旧缓存键不会被误命中"""
+    backend = RedisCacheBackend(client=LocalRedisStandIn())
+    cache = QueryResultCache(backend, ttl=60)
+    request = QueryWorkItemsRequest(status="todo")
+    cache.invalidate_user("alice")
+    key = cache.current_key("alice", request)
+    cache.store(key, {"data": []})
+
+    time.sleep(0.002)
+    for name in [name for name in backend.client.data if ":gen:" in name]:
+        del backend.client.data[name]
+    new_key, value = cache.lookup("alice", request)
+    assert new_key != key and value is None
+    print("✅ 代数键淘汰后不复用旧代数")
+
+
+def test_lru_and_ttl():
+    backend = InMemoryCacheBackend(max_entries=2)
+    backend.set("a", 1, ttl=60)
+    backend.set("b", 2, ttl=60)
+    backend.get("a")
+    backend.set("c", 3, ttl=60)
+    assert backend.get("b") is None and backend.get("a") == 1
+
+    backend.set("d", 4, ttl=0.01)
+    time.sleep(0.02)
+    assert backend.get("d") is None
+    print("✅ LRU 淘汰和 TTL 过期正常")
+
+
+if __name__ == "__main__":
+    print("🧪 测试查询结果缓存")
+    print("=" * 50)
+    test_in_memory_backend()
+    test_shared_backend_with_stand_in()
+    test_shared_generation_reseeded()
+    test_lru_and_ttl()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+测试慢查询记录（不依赖数据库）
+"""
+import time
+from datetime import date
+
+from slow_query_log import SlowQueryRecorder, normalize_sql, redact_params
+
+
+def test_threshold_and_ring_buffer():
+    recorder = SlowQueryRecorder(threshold_ms=10, capacity=3)
+    assert recorder.record("SELECT 1", None, 0.005, 1) is None
+
+    for i in range(5):
+        recorder.record(f"SELECT {i}\n  FROM   work_items", None, 0.02, i)
+
+    entries = recorder.entries()
+    assert [entry['sql'] for entry in entries] == [
+        "SELECT 4 FROM work_items", "SELECT 3 FROM work_items", "SELECT 2 FROM work_items"
+    ]
+    assert recorder.stats()['recorded'] == 5
+    assert len(recorder.entries(limit=1)) == 1
+    print(f"✅ 阈值和环形缓冲区正常: {recorder.stats()}")
+
+
+def test_redaction():
+    params = ("alice", 3, date(2025, 1, 2), None, "%会议%")
+    assert redact_params(params) == ["<str:5>", 3, "2025-01-02", None, "<str:4>"]
+
+    recorder = SlowQueryRecorder(threshold_ms=1, redact=False)
+    entry = recorder.record("SELECT * FROM work_items WHERE user_id = %s", ("alice",), 0.01, 0)
+    assert entry['params'] == ["alice"]
+    print("✅ 参数脱敏正常")
+
+
+def test_async_explain():
+    calls = []
+
+    def fake_explain(sql, params):
+        calls.append((sql, params))
+        time.sleep(0.01)
+        return [{"table": "work_items", "key": "idx_work_items_user_list", "rows": 120}]
+
+    recorder = SlowQueryRecorder(threshold_ms=1, explain=fake_explain)
+    entry = recorder.record("SELECT id FROM work_items WHERE user_id = %s", ("alice",), 0.05, 3)
+    # SELECT / UPDATE / DELETE 以外的语句（如 INSERT）不做 EXPLAIN
+    insert = recorder.record("INSERT INTO work_items (user_id) VALUES (%s)", ("alice",), 0.05, 1)
+    assert insert['explain'] is None
+
+    deadline = time.time() + 2
+    while entry['explain'] == 'pending' and time.time() < deadline:
+        time.sleep(0.005)
+    recorder.close()
+
+    # EXPLAIN 使用原始参数，记录中保存的是脱敏后的参数
+    assert calls == [("SELECT id FROM work_items WHERE user_id = %s", ("alice",))]
+    assert entry['params'] == ["<str:5>"]
+    assert entry['rows_examined_estimate'] == 120
+    print(f"✅ 异步 EXPLAIN 正常: {entry['explain']}")
+
+
+if __name__ == "__main__":
+    print("🧪 测试慢查询记录")
+    print("=" * 50)
+    assert normalize_sql(" SELECT  *\n FROM t ") == "SELECT * FROM t"
+    test_threshold_and_ring_buffer()
+    test_redaction()
+    test_async_explain()
@@ -37,6 +37,27 @@ def test_text_parser():
                 print(f"  {key}: {value}")
         print("-" * 40)
 
+def test_overlapping_keywords():
+    """互相重叠的关键词都要识别，字段取值按关键词表顺序取优先级最高的命中"""
+    print("\n🧩 测试重叠关键词")
+    print("=" * 60)
+
+    cases = [
+        # "需要做"（任务）和"做完"（已完成）共用"做"
+        ("需要做完", {'item_type': 'task', 'status': 'completed'}),
+        ("要做完的任务", {'item_type': 'task', 'status': 'completed'}),
+        # "不做"（已取消）和"做完"（已完成）重叠，状态表中已完成排在前面
+        ("不做完", {'item_type': None, 'status': 'completed'}),
+        # 关键词按最长匹配整体移除，不会留下"已"
+        ("UMS已完成的任务", {'status': 'completed', 'keyword': 'ums的'}),
+    ]
+
+    for user_input, expected in cases:
+        result = parse_user_query(user_input)
+        actual = {key: result[key] for key in expected}
+        print(f"{'✅' if actual == expected else '❌'} '{user_input}': {actual}")
+        assert actual == expected, (user_input, expected, actual)
+
 def test_smart_query_api():
     """测试智能查询API"""
     print("\n🚀 测试智能查询API")
@@ -118,6 +139,9 @@ if __name__ == "__main__":
     # 测试文本解析器
     test_text_parser()
     
+    # 测试重叠关键词
+    test_overlapping_keywords()
+
     # 测试智能查询API
     test_smart_query_api()
     
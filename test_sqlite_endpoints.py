@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+在 SQLite 后端上测试列表、关键词、分页游标、按关键词更新和批量更新接口
+（使用临时 SQLite 数据库和进程内客户端，不依赖 MySQL 和服务进程）
+
+全局配置的存储后端可以是 MySQL：接口生成的 SQL 必须使用所注入的数据库管理器自己的方言。
+"""
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+
+from conftest import temp_sqlite_db_manager
+from database import get_db_manager
+from main import app
+from query_cache import QueryResultCache, get_query_cache
+
+HEADERS = {"X-Dify-User-ID": "sqlite_endpoint_user"}
+
+ITEMS = [
+    {"user_input": "整理项目周报", "item_type": "task", "summary": "整理项目周报", "project_name": "UMS",
+     "due_date": str(date.today() + timedelta(days=1)), "status": "todo"},
+    {"user_input": "评审数据平台方案", "item_type": "meeting", "summary": "数据平台方案评审",
+     "project_name": "数据平台", "due_date": str(date.today() + timedelta(days=2)), "status": "todo"},
+    {"user_input": "修复登录故障", "item_type": "issue", "summary": "修复登录故障", "project_name": "UMS",
+     "due_date": str(date.today() + timedelta(days=3)), "status": "in_progress"},
+    {"user_input": "周报模板改版", "item_type": "idea", "summary": "周报模板改版想法"},
+    {"user_input": "周报汇总会议", "item_type": "meeting", "summary": "周报汇总会议", "project_name": "UMS",
+     "status": "todo"},
+]
+
+
+def make_client(db_manager):
+    app.dependency_overrides[get_db_manager] = lambda: db_manager
+    # 不使用查询缓存，每次查询都访问数据库
+    app.dependency_overrides[get_query_cache] = lambda: QueryResultCache(None)
+    return TestClient(app)
+
+
+def query(client, **payload):
+    response = client.post("/query_work_items", json=payload, headers=HEADERS)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def summaries(body):
+    return sorted(item["summary"] for item in body["data"])
+
+
+def test_sqlite_endpoints(db_manager):
+    client = make_client(db_manager)
+    try:
+        response = client.post("/smart_record_work_items", json=ITEMS, headers=HEADERS)
+        assert response.status_code == 200, response.text
+        assert len(response.json()["item_ids"]) == len(ITEMS)
+
+        # 列表
+        body = query(client)
+        assert len(body["data"]) == len(ITEMS) and body["next_cursor"] is None
+        print(f"✅ 列表: {len(body['data'])} 条")
+
+        # 关键词：3 个字及以上走 FTS5 全文检索，更短的回退到 LIKE
+        assert summaries(query(client, keyword="项目周报")) == ["整理项目周报"]
+        assert summaries(query(client, keyword="周报")) == ["周报模板改版想法", "周报汇总会议", "整理项目周报"]
+        relevance = query(client, keyword="周报汇总", order_by_relevance=True)
+        assert summaries(relevance) == ["周报汇总会议"]
+        print("✅ 关键词: 全文检索、LIKE 回退和相关度排序")
+
+        # 分页游标：逐页取完，不重复、不遗漏
+        seen, cursor = [], None
+        while True:
+            body = query(client, page_size=2, **({"cursor": cursor} if cursor else {}))
+            seen.extend(item["id"] for item in body["data"])
+            cursor = body["next_cursor"]
+            if not cursor:
+                break
+        assert len(seen) == len(set(seen)) == len(ITEMS)
+        print(f"✅ 分页游标: {len(seen)} 条，每页 2 条")
+
+        # 按关键词更新：唯一匹配时更新，多个匹配时返回 400
+        response = client.post("/update_work_item", headers=HEADERS, json={
+            "user_input": "登录故障修好了", "keyword": "登录故障", "new_status": "completed"
+        })
+        assert response.status_code == 200, response.text
+        assert query(client, keyword="登录故障", status="completed")["data"]
+        response = client.post("/update_work_item", headers=HEADERS, json={
+            "user_input": "周报改成高优先级", "keyword": "周报", "new_priority": 1
+        })
+        assert response.status_code == 400, response.text
+        print("✅ 按关键词更新")
+
+        # 批量更新：预览不修改，执行后按条件全部更新
+        bulk = {"user_input": "周报相关的都完成", "keyword": "周报", "new_status": "completed"}
+        response = client.post("/bulk_update_work_items", headers=HEADERS, json={**bulk, "dry_run": True})
+        assert response.status_code == 200 and response.json()["matched"] == 3, response.text
+        response = client.post("/bulk_update_work_items", headers=HEADERS, json=bulk)
+        assert response.status_code == 200 and response.json()["updated"] == 3, response.text
+        assert len(query(client, status="completed")["data"]) == 4
+        print("✅ 批量更新")
+    finally:
+        app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    print("🧪 在 SQLite 后端上测试接口")
+    print("=" * 50)
+    with temp_sqlite_db_manager() as db_manager:
+        test_sqlite_endpoints(db_manager)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+测试流式导出的编码和分批读取（使用临时 SQLite 数据库，不依赖 MySQL 和服务进程）
+"""
+import csv
+import gzip
+import io
+import json
+from datetime import date
+
+from conftest import temp_sqlite_db_manager
+from query_builder import EXPORT_COLUMNS
+from work_item_export import EXPORT_FIELDS, CsvEncoder, GzipStream, NdjsonEncoder, fetch_batches
+
+USER_ID = "export_test_user"
+
+
+def seed(db_manager, count):
+    with db_manager.get_db_cursor() as cursor:
+        for i in range(count):
+            cursor.execute(
+                "INSERT INTO work_items (user_id, type, content, summary, project_name, due_date, status, priority, tags) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                (USER_ID, "task", f"内容，含逗号和\"引号\" {i}", f"事项{i}", "UMS" if i % 2 else None,
+                 date(2025, 1, 1 + i % 28), "todo", i % 5 + 1, json.dumps(["导出"], ensure_ascii=False) if i % 3 else None)
+            )
+
+
+def export(db_manager, encoder, batch_size, compress=False):
+    gzip_stream = GzipStream() if compress else None
+    sql = f"SELECT {EXPORT_COLUMNS} FROM work_items WHERE user_id = %s ORDER BY id"
+    chunks = [encoder.header()]
+    batch_sizes = []
+    for rows in fetch_batches(db_manager, sql, (USER_ID,), batch_size):
+        batch_sizes.append(len(rows))
+        chunks.append(encoder.encode(rows))
+    data = b"".join(chunks)
+    if gzip_stream:
+        # 按块压缩，模拟边读边发送
+        data = b"".join(gzip_stream.compress(chunk) for chunk in chunks) + gzip_stream.finish()
+    return data, batch_sizes
+
+
+def test_export(db_manager):
+    seed(db_manager, 25)
+
+    data, batch_sizes = export(db_manager, NdjsonEncoder(), 10)
+    records = [json.loads(line) for line in data.decode("utf-8").splitlines()]
+    print(f"NDJSON: {len(records)} 行，批大小 {batch_sizes}")
+    assert batch_sizes == [10, 10, 5]
+    assert [int(record["id"]) for record in records] == list(range(1, 26))
+    assert list(records[0]) == EXPORT_FIELDS
+    assert records[0]["tags"] == [] and records[1]["tags"] == ["导出"]
+    assert records[0]["due_date"] == "2025-01-01" and records[0]["project_name"] is None
+
+    data, _ = export(db_manager, CsvEncoder(), 7)
+    text = data.decode("utf-8")
+    assert text.startswith("\ufeff")
+    rows = list(csv.reader(io.StringIO(text.lstrip("\ufeff"))))
+    print(f"CSV: 表头 + {len(rows) - 1} 行")
+    assert rows[0] == EXPORT_FIELDS and len(rows) == 26
+    assert rows[1][EXPORT_FIELDS.index("content")] == '内容，含逗号和"引号" 0'
+    assert json.loads(rows[2][EXPORT_FIELDS.index("tags")]) == ["导出"]
+
+    plain, _ = export(db_manager, NdjsonEncoder(), 10)
+    compressed, _ = export(db_manager, NdjsonEncoder(), 10, compress=True)
+    print(f"gzip: {len(plain)} → {len(compressed)} 字节")
+    assert gzip.decompress(compressed) == plain
+    print("✅ 导出测试通过")
+
+
+if __name__ == "__main__":
+    print("🧪 测试流式导出")
+    print("=" * 50)
+    with temp_sqlite_db_manager() as db_manager:
+        test_export(db_manager)
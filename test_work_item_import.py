@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+测试流式导入的记录解析（不依赖数据库和服务进程）
+
+请求体按随机位置切块（包括切开多字节字符和 CSV 引号内的换行），解析结果应与整体解析一致。
+"""
+import codecs
+import json
+import random
+
+from work_item_import import CsvRecordReader, NdjsonRecordReader
+
+NDJSON_BODY = "\n".join([
+    json.dumps({"user_input": "准备周会材料", "item_type": "task", "summary": "周会材料", "priority": 2}, ensure_ascii=False),
+    "",
+    json.dumps({"user_input": "讨论方案", "item_type": "meeting", "summary": "方案讨论",
+                "due_date": "2025-08-01", "tags": ["会议", "方案"]}, ensure_ascii=False),
+    '{"user_input": "缺少类型", "summary": "无类型"}',
+    "不是 JSON",
+    json.dumps({"user_input": "优先级越界", "item_type": "task", "summary": "越界", "priority": 9}, ensure_ascii=False),
+    json.dumps(["数组"], ensure_ascii=False),
+    json.dumps({"user_input": "x" * 300, "item_type": "note", "summary": "超长"}, ensure_ascii=False),
+    json.dumps({"user_input": "最后一行没有换行", "item_type": "idea", "summary": "想法"}, ensure_ascii=False),
+]).encode("utf-8")
+
+CSV_BODY = (
+    "\ufeffuser_input,item_type,summary,project_name,due_date,priority,tags,unknown\r\n"
+    "整理周报,task,周报,UMS,2025-08-01,2,\"周报,跟进\",忽略\r\n"
+    "\"多行内容\n第二行，含\"\"引号\"\"\",note,多行,,,,[\"笔记\"],\r\n"
+    "\r\n"
+    "缺少摘要,task,,,,,,\r\n"
+    "日期错误,task,日期,,2025-13-01,,,\r\n"
+    "\"引号没有闭合,task,坏行\r\n"
+).encode("utf-8")
+
+
+def parse(reader, body, cut_points):
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    results = []
+    start = 0
+    for end in list(cut_points) + [len(body)]:
+        results.extend(reader.feed(decoder.decode(body[start:end])))
+        start = end
+    results.extend(reader.feed(decoder.decode(b"", final=True)))
+    results.extend(reader.finish())
+    return [(line_no, parsed if isinstance(parsed, str) else parsed.model_dump(mode="json"))
+            for line_no, parsed in results]
+
+
+def check_random_splits(make_reader, body, rounds=200):
+    expected = parse(make_reader(), body, [])
+    rng = random.Random(7)
+    for _ in range(rounds):
+        cuts = sorted(rng.sample(range(1, len(body)), rng.randint(1, 12)))
+        assert parse(make_reader(), body, cuts) == expected, cuts
+    return expected
+
+
+def summarize(results):
+    for line_no, parsed in results:
+        mark = "❌" if isinstance(parsed, str) else "✅"
+        detail = parsed if isinstance(parsed, str) else parsed["summary"]
+        print(f"  {mark} 第 {line_no} 行: {detail[:80]}")
+
+
+def test_ndjson_reader():
+    results = check_random_splits(lambda: NdjsonRecordReader(max_record_chars=200), NDJSON_BODY)
+    summarize(results)
+    valid = [line_no for line_no, parsed in results if not isinstance(parsed, str)]
+    invalid = [line_no for line_no, parsed in results if isinstance(parsed, str)]
+    assert valid == [1, 3, 9]
+    assert invalid == [4, 5, 6, 7, 8]
+    assert "超过 200 个字符" in dict(results)[8]
+
+
+def test_csv_reader():
+    results = check_random_splits(CsvRecordReader, CSV_BODY)
+    summarize(results)
+    records = dict(results)
+    assert records[2]["tags"] == ["周报", "跟进"] and records[2]["project_name"] == "UMS"
+    assert records[3]["user_input"] == '多行内容\n第二行，含"引号"' and records[3]["tags"] == ["笔记"]
+    assert isinstance(records[6], str) and "summary" in records[6]
+    assert isinstance(records[7], str) and "due_date" in records[7]
+    assert records[8] == "CSV 格式错误: 引号没有闭合"
+
+
+if __name__ == "__main__":
+    print("🧪 测试流式导入解析")
+    print("=" * 50)
+    print("NDJSON:")
+    test_ndjson_reader()
+    print("CSV:")
+    test_csv_reader()
+    print("\n🎉 测试完成")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+测试统计汇总表的增量维护（使用临时 SQLite 数据库，不依赖 MySQL 和服务进程）
+
+经过记录、单条更新、批量更新后，增量维护的汇总结果应与从 work_items 重建的结果一致。
+"""
+from datetime import date, timedelta
+
+from conftest import temp_sqlite_db_manager
+from main import _bulk_update_work_items, _insert_work_items, _stat_changes, _update_set_parts, _update_work_item
+from models import (
+    BulkUpdateWorkItemsRequest,
+    ItemStatus,
+    ItemType,
+    QueryWorkItemsRequest,
+    SmartRecordWorkItemRequest,
+    UpdateWorkItemRequest
+)
+from query_builder import build_bulk_update_queries, build_update_target_query
+from utils import get_date_range
+from work_item_stats import read_stats, rebuild_stats
+
+USER_ID = "stats_test_user"
+
+
+def snapshot(db_manager):
+    week_start, week_end = get_date_range('this_week')
+    with db_manager.get_db_cursor() as cursor:
+        return read_stats(cursor, USER_ID, date.today(), week_start, week_end)
+
+
+def record_items(db_manager):
+    today = date.today()
+    items = [
+        SmartRecordWorkItemRequest(user_input="周会", item_type=ItemType.MEETING, summary="项目周会",
+                                   project_name="UMS", due_date=today, status=ItemStatus.TODO),
+        SmartRecordWorkItemRequest(user_input="评审", item_type=ItemType.MEETING, summary="方案评审会",
+                                   due_date=today - timedelta(days=3), status=ItemStatus.TODO),
+        SmartRecordWorkItemRequest(user_input="修复", item_type=ItemType.ISSUE, summary="修复登录故障",
+                                   project_name="UMS", due_date=today - timedelta(days=10)),
+        SmartRecordWorkItemRequest(user_input="想法", item_type=ItemType.IDEA, summary="自动调整优先级"),
+        SmartRecordWorkItemRequest(user_input="周报", item_type=ItemType.TASK, summary="整理项目周报",
+                                   project_name="数据平台", due_date=today + timedelta(days=30),
+                                   status=ItemStatus.IN_PROGRESS),
+    ]
+    return _insert_work_items(db_manager, USER_ID, items)
+
+
+def update_item(db_manager, request):
+    parts, params = _update_set_parts(request)
+    target_query = None
+    if not request.item_id:
+        target_query = build_update_target_query(QueryWorkItemsRequest(time_range=request.time_context), USER_ID,
+                                                 db_manager.backend)
+    return _update_work_item(db_manager, USER_ID, request.item_id, target_query,
+                             ", ".join(parts), params, _stat_changes(request))
+
+
+def bulk_update(db_manager, request):
+    parts, params = _update_set_parts(request)
+    count_sql, chunk_sql, filter_params = build_bulk_update_queries(
+        QueryWorkItemsRequest(item_type=request.item_type), USER_ID, db_manager.backend
+    )
+    return _bulk_update_work_items(db_manager, USER_ID, count_sql, chunk_sql, filter_params,
+                                   ", ".join(parts), params, _stat_changes(request), 100, 1, False)
+
+
+def check(label, db_manager):
+    incremental = snapshot(db_manager)
+    rebuild_stats(db_manager, USER_ID)
+    rebuilt = snapshot(db_manager)
+    status = "✅" if incremental == rebuilt else "❌"
+    print(f"{status} {label}: {incremental}")
+    assert incremental == rebuilt, f"重建结果不一致: {rebuilt}"
+    return incremental
+
+
+def test_incremental_stats_match_rebuild(db_manager):
+    item_ids = record_items(db_manager)
+    stats = check("记录 5 个事项后", db_manager)
+    assert stats["total"] == 5
+    assert stats["by_project"] == {"UMS": 2, "数据平台": 1, "未指定": 2}
+    assert stats["overdue"] == 2
+
+    # 直接按ID更新截止日期：逾期数减少
+    update_item(db_manager, UpdateWorkItemRequest(
+        user_input="延期", item_id=str(item_ids[2]), new_due_date=date.today() + timedelta(days=60)
+    ))
+    stats = check("按ID延期后", db_manager)
+    assert stats["overdue"] == 1
+
+    # 按时间上下文定位今天的会议并完成（与逾期无关）
+    update_item(db_manager, UpdateWorkItemRequest(
+        user_input="今天的周会开完了", time_context="today", new_status=ItemStatus.COMPLETED
+    ))
+    stats = check("按时间上下文完成后", db_manager)
+    assert stats["overdue"] == 1
+    assert stats["by_status"]["completed"] == 1
+
+    # 批量更新（每块 1 行）：逾期的评审会也被完成
+    matched, updated = bulk_update(db_manager, BulkUpdateWorkItemsRequest(
+        user_input="会议都标记为完成", item_type=ItemType.MEETING, new_status=ItemStatus.COMPLETED
+    ))
+    assert matched == updated == 2
+    stats = check("批量完成会议后", db_manager)
+    assert stats["overdue"] == 0
+    assert stats["by_status"]["completed"] == 2
+    assert "todo" not in stats["by_status"]
+
+    # 只改优先级不影响统计
+    update_item(db_manager, UpdateWorkItemRequest(user_input="调整", item_id=str(item_ids[3]), new_priority=1))
+    assert check("修改优先级后", db_manager) == stats
+
+
+if __name__ == "__main__":
+    print("🧪 测试统计汇总表增量维护")
+    print("=" * 50)
+    with temp_sqlite_db_manager() as db_manager:
+        test_incremental_stats_match_rebuild(db_manager)
+    print("\n🎉 测试完成")
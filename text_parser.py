@@ -2,8 +2,13 @@
 智能文本解析模块 - 识别模糊的时间和查询意图
 """
 import re
+import time
 from datetime import date, timedelta
-from typing import Optional, Dict, Any
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Optional, Dict, Any, Mapping, Tuple
+from config import settings
+from metrics import PARSER_SECONDS
 from models import TimeRange, ItemType, ItemStatus
 
 class QueryParser:
@@ -89,7 +94,63 @@ class QueryParser:
             r'查看', r'看看', r'显示', r'列出',
             r'告诉我', r'给我', r'帮我找'
         ]
+
+        # 把所有关键词表编译成一个匹配器
+        self._build_matcher()
     
+    def _build_matcher(self):
+        """
+        把意图、时间、类型、状态关键词合并为一个按长度降序排列的正则分支，
+        一次扫描即可找出所有命中并完成关键词剥离（最长匹配优先）。
+
+        每个词记录它所属的 (类别, 优先级, 取值)；同一个词可能属于多个类别
+        （如"待办"既是类型也是状态）。较长的词还继承被它包含的较短词的标签，
+        保证最长匹配不会吞掉其他类别的命中。
+
+        扫描会消耗命中的字符，从命中的词中间开始、越过词尾的词（如"需要做完"中
+        "需要做"之后的"做完"）扫描不到。这类重叠只可能发生在词尾是另一个词开头的词上，
+        预先为这些词算出可能重叠的词和起始偏移，命中时逐个比较，
+        识别结果与逐个关键词 re.search 一致。
+        """
+        tables = [
+            ('time_range', self.time_patterns),
+            ('item_type', self.type_patterns),
+            ('status', self.status_patterns),
+        ]
+
+        labels: Dict[str, set] = {}
+        for pattern in self.query_intent_patterns:
+            labels.setdefault(pattern, set()).add(('is_query', 0, True))
+        for field, table in tables:
+            for rank, (value, patterns) in enumerate(table.items()):
+                for pattern in patterns:
+                    labels.setdefault(pattern, set()).add((field, rank, value))
+
+        words = sorted(labels, key=len, reverse=True)
+        self._labels: Dict[str, Tuple[Tuple[str, int, Any], ...]] = {}
+        for word in words:
+            inherited = set()
+            for other in words:
+                if other in word:
+                    inherited |= labels[other]
+            self._labels[word] = tuple(inherited)
+
+        # 词尾是其他词开头的词：(偏移, 其他词)，其他词从偏移处开始并越过本词词尾
+        self._overlaps: Dict[str, Tuple[Tuple[int, str], ...]] = {}
+        for word in words:
+            overlaps = tuple(
+                (offset, other)
+                for offset in range(1, len(word))
+                for other in words
+                if len(other) > len(word) - offset and other.startswith(word[offset:])
+            )
+            if overlaps:
+                self._overlaps[word] = overlaps
+
+        # 关键词表中都是普通字面量，转义后拼成一个分支
+        self._matcher = re.compile('|'.join(re.escape(word) for word in words))
+        self._separator = re.compile(r'[，。！？、\s]+')
+
     def parse_query(self, user_input: str) -> Dict[str, Any]:
         """
         解析用户输入，提取查询参数
@@ -101,7 +162,7 @@ class QueryParser:
             解析后的查询参数字典
         """
         user_input = user_input.lower().strip()
-        
+
         result = {
             'time_range': None,
             'item_type': None,
@@ -109,91 +170,89 @@ class QueryParser:
             'keyword': None,
             'is_query': False
         }
-        
-        # 检查是否是查询意图
-        for pattern in self.query_intent_patterns:
-            if re.search(pattern, user_input):
-                result['is_query'] = True
-                break
-        
-        # 解析时间范围
-        result['time_range'] = self._parse_time_range(user_input)
-        
-        # 解析事项类型
-        result['item_type'] = self._parse_item_type(user_input)
-        
-        # 解析状态
-        result['status'] = self._parse_status(user_input)
-        
+
+        # 每个字段取优先级最高（在关键词表中最靠前）的命中
+        best_rank: Dict[str, int] = {}
+        labels = self._labels
+        overlaps = self._overlaps
+
+        def strip_hit(match) -> str:
+            word = match.group()
+            hits = labels[word]
+            if word in overlaps:
+                start = match.start()
+                for offset, other in overlaps[word]:
+                    if user_input.startswith(other, start + offset):
+                        hits += labels[other]
+            for field, rank, value in hits:
+                if field not in best_rank or rank < best_rank[field]:
+                    best_rank[field] = rank
+                    result[field] = value
+            return ''
+
+        # 一次扫描：识别意图、时间、类型、状态，同时移除这些词
+        cleaned_text = self._matcher.sub(strip_hit, user_input)
+
         # 提取关键词（移除时间、类型、状态相关词汇后的剩余内容）
-        result['keyword'] = self._extract_keyword(user_input)
-        
+        result['keyword'] = self._clean_keyword(cleaned_text)
+
         return result
-    
-    def _parse_time_range(self, text: str) -> Optional[str]:
-        """解析时间范围"""
-        for time_range, patterns in self.time_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, text):
-                    return time_range
-        return None
-    
-    def _parse_item_type(self, text: str) -> Optional[str]:
-        """解析事项类型"""
-        for item_type, patterns in self.type_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, text):
-                    return item_type
-        return None
-    
-    def _parse_status(self, text: str) -> Optional[str]:
-        """解析状态"""
-        for status, patterns in self.status_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, text):
-                    return status
-        return None
-    
-    def _extract_keyword(self, text: str) -> Optional[str]:
-        """提取关键词"""
-        # 移除常见的查询词汇
-        cleaned_text = text
-        
-        # 移除查询意图词
-        for pattern in self.query_intent_patterns:
-            cleaned_text = re.sub(pattern, '', cleaned_text)
-        
-        # 移除时间词汇
-        for patterns in self.time_patterns.values():
-            for pattern in patterns:
-                cleaned_text = re.sub(pattern, '', cleaned_text)
-        
-        # 移除类型词汇
-        for patterns in self.type_patterns.values():
-            for pattern in patterns:
-                cleaned_text = re.sub(pattern, '', cleaned_text)
-        
-        # 移除状态词汇
-        for patterns in self.status_patterns.values():
-            for pattern in patterns:
-                cleaned_text = re.sub(pattern, '', cleaned_text)
-        
-        # 清理空格和标点
-        cleaned_text = re.sub(r'[，。！？、\s]+', ' ', cleaned_text).strip()
-        
+
+    def _clean_keyword(self, text: str) -> Optional[str]:
+        """清理空格和标点，得到关键词"""
+        cleaned_text = self._separator.sub(' ', text).strip()
         return cleaned_text if cleaned_text and len(cleaned_text) > 1 else None
 
 # 全局解析器实例
 query_parser = QueryParser()
 
-def parse_user_query(user_input: str) -> Dict[str, Any]:
+
+def normalize_query(user_input: str) -> str:
+    """规范化用户输入：小写并合并连续空白，作为解析缓存的键"""
+    return ' '.join(user_input.lower().split())
+
+
+def _parse_normalized(normalized_input: str) -> Mapping[str, Any]:
+    """解析规范化后的输入，返回只读结果，缓存中的值不会被调用方修改"""
+    return MappingProxyType(query_parser.parse_query(normalized_input))
+
+
+_cached_parse = lru_cache(maxsize=getattr(settings, 'parse_cache_size', 1024))(_parse_normalized)
+
+
+def configure_parse_cache(maxsize: int):
+    """
+    调整解析缓存大小（会清空已有缓存和计数）
+
+    Args:
+        maxsize: 最多缓存的不同输入数，0 表示关闭缓存
+    """
+    global _cached_parse
+    _cached_parse = lru_cache(maxsize=maxsize)(_parse_normalized)
+
+
+def get_parse_cache_stats() -> Dict[str, int]:
+    """解析缓存命中统计"""
+    info = _cached_parse.cache_info()
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'maxsize': info.maxsize,
+    }
+
+
+def parse_user_query(user_input: str) -> Mapping[str, Any]:
     """
-    解析用户查询的便捷函数
+    解析用户查询的便捷函数，相同（规范化后）的输入直接返回缓存结果
     
     Args:
         user_input: 用户输入
         
     Returns:
-        解析结果
+        只读的解析结果
     """
-    return query_parser.parse_query(user_input)
+    start = time.perf_counter()
+    result = _cached_parse(normalize_query(user_input))
+    PARSER_SECONDS.observe(time.perf_counter() - start)
+    return result
@@ -2,7 +2,7 @@
 工具函数模块
 """
 from datetime import date, timedelta
-from typing import Tuple, Optional
+from typing import Mapping, Tuple, Optional
 from models import TimeRange
 
 
@@ -108,12 +108,12 @@ def validate_priority(priority: Optional[int]) -> bool:
     return 1 <= priority <= 5
 
 
-def get_user_id_from_request(headers: dict) -> str:
+def get_user_id_from_request(headers: Mapping[str, str]) -> str:
     """
     从请求头中获取用户ID
     
     Args:
-        headers: 请求头字典
+        headers: 请求头映射（小写键的字典，或直接传入 Starlette 的 Headers，无需复制）
         
     Returns:
         用户ID，如果没有则返回默认值
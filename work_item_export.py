@@ -0,0 +1,215 @@
+"""
+工作事项流式导出
+
+从流式游标逐批读取事项，按批编码为 NDJSON 或 CSV 字节块，可选地即时 gzip 压缩。
+任何时刻内存中只有一批行和一个编码缓冲区，占用与导出的总行数无关。
+"""
+import csv
+import io
+import json
+import logging
+import threading
+import zlib
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+import anyio
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+# 导出字段，顺序与 query_builder.EXPORT_COLUMNS 一致，也是 CSV 的列顺序
+EXPORT_FIELDS = [
+    "id", "type", "summary", "content", "project_name", "due_date", "start_date",
+    "status", "priority", "tags", "created_at", "updated_at",
+]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def export_record(row: Dict[str, Any]) -> Dict[str, Any]:
+    """把一行数据转换为导出记录：ID 为字符串，日期为 ISO 文本，tags 为列表"""
+    tags = row["tags"]
+    return {
+        "id": str(row["id"]),
+        "type": row["type"],
+        "summary": row["summary"],
+        "content": row["content"],
+        "project_name": row["project_name"],
+        "due_date": _text(row["due_date"]),
+        "start_date": _text(row["start_date"]),
+        "status": row["status"],
+        "priority": row["priority"],
+        "tags": json.loads(tags) if tags else [],
+        "created_at": _text(row["created_at"]),
+        "updated_at": _text(row["updated_at"]),
+    }
+
+
+class NdjsonEncoder:
+    """每个事项一行 JSON"""
+
+    def header(self) -> bytes:
+        return b""
+
+    def encode(self, rows: List[Dict[str, Any]]) -> bytes:
+        return "".join(
+            json.dumps(export_record(row), ensure_ascii=False) + "\n" for row in rows
+        ).encode("utf-8")
+
+
+class CsvEncoder:
+    """带表头的 CSV；tags 列为 JSON 数组文本"""
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode("utf-8")
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def header(self) -> bytes:
+        # UTF-8 BOM，使 Excel 按 UTF-8 打开中文内容
+        self._writer.writerow(EXPORT_FIELDS)
+        return "\ufeff".encode("utf-8") + self._drain()
+
+    def encode(self, rows: List[Dict[str, Any]]) -> bytes:
+        for row in rows:
+            record = export_record(row)
+            record["tags"] = json.dumps(record["tags"], ensure_ascii=False) if record["tags"] else ""
+            self._writer.writerow(["" if record[field] is None else record[field] for field in EXPORT_FIELDS])
+        return self._drain()
+
+
+ENCODERS = {
+    "ndjson": NdjsonEncoder,
+    "csv": CsvEncoder,
+}
+
+
+class GzipStream:
+    """即时 gzip 压缩：每批数据压缩后立即输出，不缓存整个响应"""
+
+    def __init__(self, level: int = 6):
+        # wbits=31：带 gzip 头和校验尾
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        # Z_SYNC_FLUSH 让已压缩的数据立即可发送，客户端可以边下载边解压
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+def fetch_batches(db_manager, sql: str, params: tuple, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """
+    用流式游标逐批读取结果（同步生成器，每次 next 在数据库线程池中调用）
+
+    生成器关闭时归还连接；中途关闭时未读完的结果由驱动丢弃。
+    """
+    with db_manager.get_db_cursor(unbuffered=True) as cursor:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield rows
+
+
+class ExportLimiter:
+    """
+    限制同时进行的导出数
+
+    每个导出在客户端下载完之前一直占用一个连接池连接（SQLite 上还有一个未结束的读事务），
+    不限制时几个慢速下载就能占满连接池。名额用完时立即拒绝，不排队等待。
+    """
+
+    def __init__(self, max_concurrent: int):
+        self.max_concurrent = max(1, max_concurrent)
+        self._active = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self._active >= self.max_concurrent:
+                self._rejected += 1
+                return False
+            self._active += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'active': self._active,
+                'max_concurrent': self.max_concurrent,
+                'rejected': self._rejected,
+            }
+
+
+class ExportStreamingResponse(StreamingResponse):
+    """
+    响应结束后一定关闭 body 生成器并执行清理的流式响应
+
+    客户端中途断开时，StreamingResponse 取消发送任务后直接返回，
+    停在 yield 处的生成器要等垃圾回收才会关闭，其中持有的数据库连接也迟迟不能归还。
+    客户端停止读取但不断开时，发送会一直阻塞在写缓冲上；每次发送最多等待 send_timeout 秒，
+    超时即放弃这次导出。
+    """
+
+    def __init__(
+        self,
+        content,
+        send_timeout: Optional[float] = None,
+        on_close: Optional[Callable[[], Awaitable[None]]] = None,
+        **kwargs
+    ):
+        super().__init__(content, **kwargs)
+        self.send_timeout = send_timeout
+        self.on_close = on_close
+
+    async def __call__(self, scope, receive, send):
+        timed_out = False
+
+        async def send_with_timeout(message):
+            nonlocal timed_out
+            try:
+                with anyio.fail_after(self.send_timeout):
+                    await send(message)
+            except TimeoutError:
+                timed_out = True
+                raise
+
+        try:
+            await super().__call__(scope, receive, send_with_timeout if self.send_timeout else send)
+        except Exception:
+            # StreamingResponse 可能把超时（OSError 的子类）转换为 ClientDisconnect，按标记判断
+            if not timed_out:
+                raise
+            logger.warning(f"导出发送超时（{self.send_timeout}s 内客户端未读取数据），中止导出")
+        finally:
+            with anyio.CancelScope(shield=True):
+                await self.body_iterator.aclose()
+                if self.on_close is not None:
+                    await self.on_close()
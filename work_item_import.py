@@ -0,0 +1,201 @@
+"""
+工作事项流式导入的解析
+
+请求体按网络数据块到达，RecordReader 把任意切分的文本块还原为完整记录，
+逐条校验为 SmartRecordWorkItemRequest。内存中只保留当前未结束的一行（或一条跨行的 CSV 记录），
+单条记录超过长度上限时报告为该行的错误并跳过，不会无限制地缓存。
+"""
+import csv
+import json
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+
+from models import SmartRecordWorkItemRequest
+
+# 单条记录的默认长度上限（字符）
+DEFAULT_MAX_RECORD_CHARS = 1024 * 1024
+
+# (起始行号, 校验后的请求或错误信息)
+ParsedRecord = Tuple[int, Union[SmartRecordWorkItemRequest, str]]
+
+
+def format_validation_error(error: ValidationError) -> str:
+    """把 pydantic 校验错误压缩成一行"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or '记录'}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+def validate_record(record: Any) -> Union[SmartRecordWorkItemRequest, str]:
+    """校验一条记录，失败时返回错误信息"""
+    if not isinstance(record, dict):
+        return "每条记录必须是 JSON 对象"
+    try:
+        return SmartRecordWorkItemRequest.model_validate(record)
+    except ValidationError as e:
+        return format_validation_error(e)
+
+
+class _LineSplitter:
+    """把任意切分的文本块还原为完整的行，超长的行只记录行号不保留内容"""
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.line_no = 0
+        self._pieces: List[str] = []
+        self._length = 0
+        self._overflow = False
+
+    def _append(self, piece: str):
+        if self._overflow:
+            return
+        self._length += len(piece)
+        if self._length > self.max_chars:
+            self._overflow = True
+            self._pieces.clear()
+        else:
+            self._pieces.append(piece)
+
+    def _take(self) -> Tuple[int, Optional[str]]:
+        self.line_no += 1
+        line = None if self._overflow else "".join(self._pieces).rstrip("\r")
+        self._pieces.clear()
+        self._length = 0
+        self._overflow = False
+        return self.line_no, line
+
+    def feed(self, text: str) -> Iterator[Tuple[int, Optional[str]]]:
+        """返回 text 中结束的各行：(行号, 行内容)，行内容为 None 表示超长"""
+        start = 0
+        while True:
+            end = text.find("\n", start)
+            if end < 0:
+                if start < len(text):
+                    self._append(text[start:])
+                return
+            self._append(text[start:end])
+            yield self._take()
+            start = end + 1
+
+    def finish(self) -> Iterator[Tuple[int, Optional[str]]]:
+        """返回最后一行（没有以换行结尾时）"""
+        if self._pieces or self._overflow:
+            yield self._take()
+
+
+class NdjsonRecordReader:
+    """每行一个 JSON 对象，空行忽略"""
+
+    def __init__(self, max_record_chars: int = DEFAULT_MAX_RECORD_CHARS):
+        self._lines = _LineSplitter(max_record_chars)
+        self.max_record_chars = max_record_chars
+
+    def _parse(self, lines: Iterator[Tuple[int, Optional[str]]]) -> Iterator[ParsedRecord]:
+        for line_no, line in lines:
+            if line is None:
+                yield line_no, f"记录超过 {self.max_record_chars} 个字符"
+                continue
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_no, f"JSON 格式错误: {e}"
+                continue
+            yield line_no, validate_record(record)
+
+    def feed(self, text: str) -> Iterator[ParsedRecord]:
+        return self._parse(self._lines.feed(text))
+
+    def finish(self) -> Iterator[ParsedRecord]:
+        return self._parse(self._lines.finish())
+
+
+def _csv_value(field: str, value: str) -> Any:
+    if value == "":
+        return None
+    if field == "tags":
+        # 兼容导出格式的 JSON 数组和手工填写的逗号分隔
+        if value.startswith("["):
+            try:
+                return json.loads(value)
+            except ValueError:
+                pass
+        return [tag.strip() for tag in value.replace("，", ",").split(",") if tag.strip()]
+    return value
+
+
+class CsvRecordReader:
+    """
+    第一行为表头（列名与 SmartRecordWorkItemRequest 字段一致，未知列忽略），空单元格视为未填写
+
+    带引号的字段可以包含换行：累积的行中双引号个数为奇数时说明记录尚未结束。
+    """
+
+    def __init__(self, max_record_chars: int = DEFAULT_MAX_RECORD_CHARS):
+        self._lines = _LineSplitter(max_record_chars)
+        self.max_record_chars = max_record_chars
+        self._header: Optional[List[str]] = None
+        self._pending: List[str] = []
+        self._pending_start = 0
+        self._pending_chars = 0
+        self._quotes = 0
+
+    def _record(self, line_no: int, text: str) -> Optional[ParsedRecord]:
+        values = next(csv.reader([text]), [])
+        if self._header is None:
+            self._header = [name.strip() for name in values]
+            return None
+        if not any(value.strip() for value in values):
+            return None
+        if len(values) > len(self._header):
+            return line_no, f"列数 {len(values)} 多于表头的 {len(self._header)} 列"
+        record: Dict[str, Any] = {}
+        for field, value in zip(self._header, values):
+            if field in SmartRecordWorkItemRequest.model_fields:
+                record[field] = _csv_value(field, value)
+        return line_no, validate_record(record)
+
+    def _parse(self, lines: Iterator[Tuple[int, Optional[str]]]) -> Iterator[ParsedRecord]:
+        for line_no, line in lines:
+            if not self._pending:
+                self._pending_start = line_no
+            if line is None or self._pending_chars + len(line) > self.max_record_chars:
+                # 超长记录整体跳过；无法再判断引号是否配对，从下一行重新开始
+                self._pending.clear()
+                self._pending_chars = 0
+                self._quotes = 0
+                yield self._pending_start, f"记录超过 {self.max_record_chars} 个字符"
+                continue
+            self._pending.append(line)
+            self._pending_chars += len(line) + 1
+            self._quotes += line.count('"')
+            if self._quotes % 2:
+                continue
+            text = "\n".join(self._pending)
+            self._pending.clear()
+            self._pending_chars = 0
+            self._quotes = 0
+            try:
+                parsed = self._record(self._pending_start, text)
+            except csv.Error as e:
+                parsed = self._pending_start, f"CSV 格式错误: {e}"
+            if parsed is not None:
+                yield parsed
+
+    def feed(self, text: str) -> Iterator[ParsedRecord]:
+        return self._parse(self._lines.feed(text))
+
+    def finish(self) -> Iterator[ParsedRecord]:
+        yield from self._parse(self._lines.finish())
+        if self._pending:
+            self._pending.clear()
+            yield self._pending_start, "CSV 格式错误: 引号没有闭合"
+
+
+READERS = {
+    "ndjson": NdjsonRecordReader,
+    "csv": CsvRecordReader,
+}
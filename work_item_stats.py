@@ -0,0 +1,150 @@
+"""
+按用户的工作事项统计汇总表
+
+work_item_stats 按 (user_id, dimension, value) 保存事项数：
+
+- status / type / project：按状态、类型、项目统计的事项数（空值记为 ''）
+- open_due：未结束（不是 completed / resolved / cancelled）且有截止日期的事项，按截止日期计数。
+  逾期数和本周到期数在读取时按当天日期对这一维度求和，不会随日期推移而失效
+
+记录和更新操作在写入 work_items 的同一个事务中调用 apply_deltas 增量维护，
+统计接口只需读取一个用户的少量汇总行；rebuild_stats 用一次 GROUP BY 从 work_items 重新计算。
+"""
+from collections import Counter
+from datetime import date
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from storage import StorageBackend
+
+STATS_TABLE = "work_item_stats"
+STATS_KEY_COLUMNS = ("user_id", "dimension", "value")
+STATS_COUNT_COLUMN = "item_count"
+
+# 影响统计的事项列；更新前需要读出这些列的旧值
+STAT_COLUMNS = ("type", "project_name", "status", "due_date")
+
+CLOSED_STATUSES = frozenset({"completed", "resolved", "cancelled"})
+
+# 状态或项目为空时在统计结果中显示的名称
+UNSPECIFIED = "未指定"
+
+_READ_SQL = (
+    f"SELECT dimension, value, {STATS_COUNT_COLUMN} FROM {STATS_TABLE} "
+    f"WHERE user_id = %s AND dimension IN ('status', 'type', 'project') AND {STATS_COUNT_COLUMN} > 0"
+)
+_READ_DUE_SQL = (
+    f"SELECT SUM(CASE WHEN value < %s THEN {STATS_COUNT_COLUMN} ELSE 0 END) AS overdue, "
+    f"SUM(CASE WHEN value >= %s AND value <= %s THEN {STATS_COUNT_COLUMN} ELSE 0 END) AS due_this_week "
+    f"FROM {STATS_TABLE} WHERE user_id = %s AND dimension = 'open_due'"
+)
+_REBUILD_GROUP_SQL = (
+    "SELECT user_id, type, project_name, status, due_date, COUNT(*) AS item_count "
+    "FROM work_items{where} GROUP BY user_id, type, project_name, status, due_date"
+)
+
+
+def _date_value(value: Any) -> str:
+    return value.isoformat() if isinstance(value, date) else str(value)
+
+
+def stat_keys(row: Mapping[str, Any]) -> List[Tuple[str, str]]:
+    """一个事项计入的 (dimension, value) 列表"""
+    keys = [
+        ("status", row["status"] or ""),
+        ("type", row["type"]),
+        ("project", row["project_name"] or ""),
+    ]
+    if row["due_date"] and row["status"] not in CLOSED_STATUSES:
+        keys.append(("open_due", _date_value(row["due_date"])))
+    return keys
+
+
+def row_deltas(old_rows: Iterable[Mapping[str, Any]], new_rows: Iterable[Mapping[str, Any]]) -> Counter:
+    """事项从 old_rows 变为 new_rows 时各统计项的变化量（插入时 old_rows 为空）"""
+    deltas: Counter = Counter()
+    for row in old_rows:
+        for key in stat_keys(row):
+            deltas[key] -= 1
+    for row in new_rows:
+        for key in stat_keys(row):
+            deltas[key] += 1
+    return deltas
+
+
+def apply_deltas(cursor, backend: StorageBackend, user_id: str, deltas: Mapping[Tuple[str, str], int]):
+    """
+    把变化量累加到汇总表（在写入事项的同一个游标和事务中调用）
+
+    所有统计项用一条多行 upsert 写入；按键排序，使并发事务以相同顺序锁定汇总行。
+    """
+    items = sorted((key, delta) for key, delta in deltas.items() if delta)
+    if not items:
+        return
+    sql = backend.upsert_increment_sql(STATS_TABLE, STATS_KEY_COLUMNS, STATS_COUNT_COLUMN, len(items))
+    params: List[Any] = []
+    for (dimension, value), delta in items:
+        params.extend((user_id, dimension, value, delta))
+    cursor.execute(sql, params)
+
+
+def read_stats(cursor, user_id: str, today: date, week_start: date, week_end: date) -> Dict[str, Any]:
+    """读取一个用户的统计结果"""
+    groups: Dict[str, Dict[str, int]] = {"status": {}, "type": {}, "project": {}}
+    cursor.execute(_READ_SQL, (user_id,))
+    for row in cursor.fetchall():
+        groups[row["dimension"]][row["value"] or UNSPECIFIED] = int(row[STATS_COUNT_COLUMN])
+
+    cursor.execute(_READ_DUE_SQL, (today.isoformat(), week_start.isoformat(), week_end.isoformat(), user_id))
+    due = cursor.fetchone() or {}
+
+    return {
+        "total": sum(groups["type"].values()),
+        "by_status": groups["status"],
+        "by_type": groups["type"],
+        "by_project": groups["project"],
+        "overdue": int(due.get("overdue") or 0),
+        "due_this_week": int(due.get("due_this_week") or 0),
+    }
+
+
+def rebuild_stats(db_manager, user_id: Optional[str] = None, chunk_size: int = 500) -> int:
+    """
+    从 work_items 重新计算汇总表
+
+    对 work_items 只做一次 GROUP BY，在内存中把分组结果折算到各统计维度，
+    然后在同一个事务中删除旧汇总行并写入新结果。
+
+    Args:
+        db_manager: 数据库管理器
+        user_id: 只重建该用户，为空时重建全部用户
+        chunk_size: 每条 INSERT 写入的汇总行数
+
+    Returns:
+        写入的汇总行数
+    """
+    where = " WHERE user_id = %s" if user_id else ""
+    params = (user_id,) if user_id else ()
+    backend = db_manager.backend
+
+    with db_manager.get_db_cursor() as cursor:
+        # SQLite 在这里获取写锁，重建期间的记录/更新会等待；
+        # MySQL 的分组读取是一致性快照，重建应在写入较少时执行
+        backend.begin_write(cursor)
+        cursor.execute(_REBUILD_GROUP_SQL.format(where=where), params)
+        counts: Counter = Counter()
+        for row in cursor.fetchall():
+            for dimension, value in stat_keys(row):
+                counts[(row["user_id"], dimension, value)] += int(row["item_count"])
+
+        cursor.execute(f"DELETE FROM {STATS_TABLE}{where}", params)
+
+        items = sorted(counts.items())
+        for offset in range(0, len(items), chunk_size):
+            chunk = items[offset:offset + chunk_size]
+            sql = backend.upsert_increment_sql(STATS_TABLE, STATS_KEY_COLUMNS, STATS_COUNT_COLUMN, len(chunk))
+            chunk_params: List[Any] = []
+            for key, count in chunk:
+                chunk_params.extend((*key, count))
+            cursor.execute(sql, chunk_params)
+
+    return len(counts)